@@ -1,6 +1,15 @@
 from nomad.config.models.plugins import AppEntryPoint
-from nomad.config.models.ui import App, Column, Columns, FilterMenu, FilterMenus
-
+from nomad.config.models.ui import (
+    App,
+    Column,
+    Columns,
+    FilterMenu,
+    FilterMenus,
+    Menu,
+    MenuItemHistogram,
+    MenuItemTerms,
+    SearchQuantities,
+)
 
 myapp = AppEntryPoint(
     name='MyApp',
@@ -22,3 +31,123 @@ myapp = AppEntryPoint(
         ),
     ),
 )
+
+
+SCHEMA = 'nomad_ikz_omega_theta_xrd.schema_packages.omegascan.OmegaThetaXRD'
+
+omegathetaxrdapp = AppEntryPoint(
+    name='OmegaThetaXRDApp',
+    description='App for searching Omega Theta XRD measurements and wafer maps.',
+    app=App(
+        label='Omega Theta XRD',
+        path='omegathetaxrd',
+        category='Experiment',
+        description='Search Omega Theta XRD measurements by their map statistics.',
+        search_quantities=SearchQuantities(include=[f'*#{SCHEMA}']),
+        filters_locked={'section_defs.definition_qualified_name': [SCHEMA]},
+        columns=[
+            Column(search_quantity=f'data.name#{SCHEMA}', selected=True),
+            Column(search_quantity=f'data.samples.lab_id#{SCHEMA}', selected=True),
+            Column(search_quantity=f'data.datetime#{SCHEMA}', selected=True),
+            Column(search_quantity=f'data.measurement_type#{SCHEMA}', selected=True),
+            Column(
+                search_quantity=f'data.map_statistics.rms_tilt#{SCHEMA}',
+                selected=True,
+            ),
+            Column(
+                search_quantity=f'data.map_statistics.center_tilt#{SCHEMA}',
+                selected=True,
+            ),
+            Column(search_quantity=f'data.map_statistics.center_direction#{SCHEMA}'),
+            Column(search_quantity=f'data.map_statistics.tilt_min#{SCHEMA}'),
+            Column(search_quantity=f'data.map_statistics.tilt_max#{SCHEMA}'),
+            Column(search_quantity=f'data.map_statistics.tilt_diff_min_max#{SCHEMA}'),
+            Column(search_quantity=f'data.map_statistics.avg_tilt#{SCHEMA}'),
+            Column(search_quantity=f'data.wafer_diameter#{SCHEMA}'),
+            Column(search_quantity=f'data.grid_size#{SCHEMA}'),
+            Column(search_quantity=f'data.scan_recipe_name#{SCHEMA}'),
+            Column(
+                search_quantity=(
+                    f'data.sample_specifications.sample_preparation_status#{SCHEMA}'
+                )
+            ),
+            Column(search_quantity=f'data.instruments.lab_id#{SCHEMA}'),
+            Column(search_quantity='upload_create_time'),
+            Column(search_quantity='mainfile'),
+        ],
+        menu=Menu(
+            items=[
+                Menu(
+                    title='Map Statistics',
+                    items=[
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.rms_tilt#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.center_tilt#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.center_direction#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.tilt_min#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.tilt_max#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.tilt_diff_min_max#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(
+                            x=f'data.map_statistics.avg_tilt#{SCHEMA}',
+                        ),
+                    ],
+                ),
+                Menu(
+                    title='Measurement',
+                    items=[
+                        MenuItemTerms(
+                            search_quantity=f'data.measurement_type#{SCHEMA}',
+                            show_input=False,
+                        ),
+                        MenuItemTerms(
+                            search_quantity=f'data.scan_recipe_name#{SCHEMA}',
+                        ),
+                        MenuItemHistogram(x=f'data.wafer_diameter#{SCHEMA}'),
+                        MenuItemHistogram(x=f'data.grid_size#{SCHEMA}'),
+                        MenuItemHistogram(x=f'data.datetime#{SCHEMA}'),
+                    ],
+                ),
+                Menu(
+                    title='Sample',
+                    items=[
+                        MenuItemTerms(
+                            search_quantity=f'data.samples.lab_id#{SCHEMA}',
+                        ),
+                        MenuItemTerms(
+                            search_quantity=(
+                                'data.sample_specifications.'
+                                f'sample_preparation_status#{SCHEMA}'
+                            ),
+                        ),
+                        MenuItemTerms(
+                            search_quantity=(
+                                'data.sample_specifications.'
+                                f'sample_side_facing_down#{SCHEMA}'
+                            ),
+                            show_input=False,
+                        ),
+                    ],
+                ),
+                Menu(
+                    title='Instrument',
+                    items=[
+                        MenuItemTerms(
+                            search_quantity=f'data.instruments.lab_id#{SCHEMA}',
+                        ),
+                    ],
+                ),
+            ]
+        ),
+    ),
+)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from nomad.config.models.plugins import ParserEntryPoint
 from pydantic import Field
 
@@ -20,6 +22,30 @@ myparser = MyParserEntryPoint(
 
 class OmegaThetaXRDParserEntryPoint(ParserEntryPoint):
     parameter: int = Field(0, description='Custom configuration parameter')
+    mode: Literal['archive', 'direct', 'stub'] = Field(
+        'archive',
+        description=(
+            'How the measurement is created from a *.xrd file. "archive" writes it '
+            'into a separate <name>.archive.json entry, "direct" populates it in the '
+            'entry of the *.xrd file, "stub" only records the data file without a '
+            'measurement.'
+        ),
+    )
+    points_per_page: int = Field(
+        0,
+        description=(
+            'In "direct" mode, the scan curves of maps with more points are split into '
+            'child entries with this number of points. 0 keeps all points in the '
+            'entry of the map.'
+        ),
+    )
+    combine_single_measurements: bool = Field(
+        False,
+        description=(
+            'Combine the single measurement files of one wafer '
+            '(<sample>-MI_<point>.xrd in the same directory) into one mapping entry.'
+        ),
+    )
 
     def load(self):
         from nomad_ikz_omega_theta_xrd.parsers.omegathetaxrdparser import (
@@ -1,3 +1,5 @@
+import math
+import os
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -14,8 +16,22 @@ from nomad.datamodel.metainfo.annotations import ELNAnnotation
 from nomad.metainfo import Quantity
 from nomad.parsing.parser import MatchingParser
 
-from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import OmegaThetaXRD
-from nomad_ikz_omega_theta_xrd.schema_packages.utils import create_archive
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    OmegaThetaXRD,
+    OmegaThetaXRDPointPage,
+    PointPageReference,
+    create_parameter_list,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.omegathetaxrdreader import (
+    extract_data_and_metadata,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.timing import Timer
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import (
+    create_archive,
+    get_entry_id_from_file_name,
+    get_entry_id_from_mainfile_key,
+    get_reference,
+)
 
 configuration = config.get_plugin_entry_point(
     'nomad_ikz_omega_theta_xrd.parsers:omegathetaxrdparser'
@@ -35,7 +51,104 @@ class RawFileOmegaThetaXRDData(EntryData):
     )
 
 
+def get_single_measurement_group(mainfile):
+    """
+    Returns the sorted names of the single measurement files of the same wafer as
+    `mainfile` (`<sample>-MI_<point>.xrd` in the same directory), or None if there
+    are no other files of this wafer. The sample name may contain underscores.
+    """
+    directory, data_file = os.path.split(mainfile)
+    prefix = data_file.rsplit('_', 1)[0]
+    if not prefix.endswith('-MI'):
+        return None
+    group = sorted(
+        file_name
+        for file_name in os.listdir(directory or '.')
+        if file_name.endswith('.xrd') and file_name.rsplit('_', 1)[0] == prefix
+    )
+    return group if len(group) > 1 else None
+
+
+def count_points(mainfile):
+    """
+    Returns the number of measurements in a data file without parsing it.
+    """
+    with open(mainfile, 'rb') as file:
+        content = file.read()
+    return content.count(b'<Measurement>') + content.count(b'<Measurement ')
+
+
+def create_point_pages(mainfile, entry, archive, child_archives, points_per_page):
+    """
+    Distributes the points of the map with their scan curves to the child archives,
+    `points_per_page` points per child archive.
+    """
+    xrd_dict = extract_data_and_metadata(mainfile)
+    measurements = (
+        xrd_dict.get('MultiMeasurement', {}).get('Measurements', {}).get('Measurement')
+    )
+    if isinstance(measurements, dict):
+        measurements = [measurements]
+    upload_id = archive.metadata.upload_id
+    main_entry_id = archive.metadata.entry_id or get_entry_id_from_file_name(
+        archive.metadata.mainfile, archive
+    )
+    entry.point_pages = []
+    # the map copies the fits of its scan curves to the pages when it is normalized
+    entry.m_cache['point_pages'] = []
+    for page, key in enumerate(
+        sorted(child_archives, key=lambda key: int(key.split('_')[-1]))
+    ):
+        child_archive = child_archives[key]
+        first_point = page * points_per_page
+        points = measurements[first_point : first_point + points_per_page]
+        child_archive.data = OmegaThetaXRDPointPage(
+            name=f'{entry.name} points {first_point}-{first_point + len(points) - 1}',
+            measurement=get_reference(upload_id, main_entry_id),
+            page=page,
+            first_point=first_point,
+            peak_profile=entry.peak_profile,
+            results=[create_parameter_list(measurement) for measurement in points],
+        )
+        child_archive.metadata.entry_name = child_archive.data.name
+        entry.m_cache['point_pages'].append(child_archive.data)
+        entry.point_pages.append(
+            PointPageReference(
+                name=child_archive.data.name,
+                reference=get_reference(
+                    upload_id,
+                    child_archive.metadata.entry_id
+                    or get_entry_id_from_mainfile_key(
+                        archive.metadata.mainfile, key, archive
+                    ),
+                ),
+            )
+        )
+
+
 class OmegaThetaXRDParser(MatchingParser):
+    creates_children = True
+
+    def is_mainfile(
+        self,
+        filename: str,
+        mime: str,
+        buffer: bytes,
+        decoded_buffer: str,
+        compression: str = None,
+    ):
+        is_mainfile = super().is_mainfile(
+            filename, mime, buffer, decoded_buffer, compression
+        )
+        points_per_page = configuration.points_per_page
+        if not is_mainfile or configuration.mode != 'direct' or points_per_page < 1:
+            return is_mainfile
+        n_pages = math.ceil(count_points(filename) / points_per_page)
+        if n_pages <= 1:
+            return is_mainfile
+        # one child entry per page of points
+        return [f'points_{page}' for page in range(n_pages)]
+
     def parse(
         self,
         mainfile: str,
@@ -43,13 +156,63 @@ class OmegaThetaXRDParser(MatchingParser):
         logger: 'BoundLogger',
         child_archives: dict[str, 'EntryArchive'] = None,
     ) -> None:
-        logger.info('OmegaThetaXRDParser.parse', parameter=configuration.parameter)
+        logger.info(
+            'OmegaThetaXRDParser.parse',
+            parameter=configuration.parameter,
+            mode=configuration.mode,
+        )
+        timer = Timer(logger, 'OmegaThetaXRDParser.parse')
         data_file = mainfile.split('/')[-1]
         entry = OmegaThetaXRD()  # .m_from_dict(Ramanspectroscopy.m_def.a_template)
         entry.data_file = data_file
         entry.name = ''.join(data_file.split('.')[:-1])
-        file_name = f'{"".join(data_file.split(".")[:-1])}.archive.json'
-        archive.data = RawFileOmegaThetaXRDData(
-            measurement=create_archive(entry, archive, file_name)
-        )
+        file_name = f'{entry.name}.archive.json'
+        group = None
+        if configuration.combine_single_measurements and configuration.mode != 'stub':
+            group = get_single_measurement_group(mainfile)
+            timer.lap('group single measurements', points=len(group or []))
+        if group:
+            # The single measurements of a wafer become one mapping entry, which is
+            # created by the first file of the group. The other files only refer to it.
+            entry.data_file = group[0]
+            entry.data_files = group
+            entry.name = group[0].rsplit('_', 1)[0]
+            file_name = f'{entry.name}.archive.json'
+            if data_file != group[0]:
+                if configuration.mode == 'direct':
+                    file_name = os.path.join(
+                        os.path.dirname(archive.metadata.mainfile), group[0]
+                    )
+                archive.data = RawFileOmegaThetaXRDData(
+                    measurement=get_reference(
+                        archive.metadata.upload_id,
+                        get_entry_id_from_file_name(file_name, archive),
+                    )
+                )
+                archive.metadata.entry_name = f'{data_file} data file'
+                return
+        if configuration.mode == 'direct':
+            # The measurement is normalized as part of this entry, no second entry
+            # has to be matched and processed.
+            archive.data = entry
+            archive.metadata.entry_name = f'{data_file} measurement'
+            if child_archives:
+                create_point_pages(
+                    mainfile,
+                    entry,
+                    archive,
+                    child_archives,
+                    configuration.points_per_page,
+                )
+                timer.lap('create point pages', points=len(entry.point_pages))
+            return
+        if configuration.mode == 'stub':
+            archive.data = RawFileOmegaThetaXRDData()
+        else:
+            # the measurement is generated from the data file again, it is only
+            # rewritten and processed if its content changed
+            archive.data = RawFileOmegaThetaXRDData(
+                measurement=create_archive(entry, archive, file_name, overwrite=True)
+            )
+            timer.lap('create archive')
         archive.metadata.entry_name = f'{data_file} data file'
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from nomad.config.models.plugins import SchemaPackageEntryPoint
 from pydantic import Field
 
@@ -19,6 +21,64 @@ mypackage = MySchemaPackageEntryPoint(
 
 class OmegaThetaXRDPackageEntryPoint(SchemaPackageEntryPoint):
     parameter: int = Field(0, description='Custom configuration parameter')
+    timing: Literal['off', 'log', 'archive'] = Field(
+        'off',
+        description=(
+            'Timing of the processing stages of omega theta XRD entries. "log" emits '
+            'the duration of each stage with the number of points, curve samples and '
+            'figure bytes to the processing log, "archive" also stores them in the '
+            'processing diagnostics of the measurement.'
+        ),
+    )
+    figure_cache_size: int = Field(
+        256,
+        description=(
+            'Number of figures of omega theta XRD entries kept in memory and reused '
+            'while their data and plot versions do not change. 0 disables it.'
+        ),
+    )
+    figure_cache_directory: Optional[str] = Field(
+        None,
+        description=(
+            'Directory in which cached figures are also stored as files, shared by '
+            'all workers and kept between reprocessings.'
+        ),
+    )
+    figure_workers: int = Field(
+        1,
+        description=(
+            'Number of processes rendering the figures of a map in parallel. 1 renders '
+            'them one after the other, 0 uses all CPUs. Figures are always rendered '
+            'serially in daemonic worker processes.'
+        ),
+    )
+
+    bragg_angle: Optional[float] = Field(
+        None,
+        description=(
+            'Bragg angle (in degrees) of the reflection of the instrument, used to '
+            'recompute the tilt of omega theta XRD entries from the peak positions.'
+        ),
+    )
+    incidence_angle: Optional[float] = Field(
+        None,
+        description='Angle (in degrees) between the beam and the sample surface.',
+    )
+    plane_inclination: Optional[float] = Field(
+        None,
+        description=(
+            'Nominal angle (in degrees) between the normal of the reflecting plane '
+            'and the surface normal.'
+        ),
+    )
+    azimuth_offset: Optional[float] = Field(
+        None,
+        description=(
+            'Rotation angle (in degrees) at which the normal of the reflecting plane '
+            'points along the 0° direction. The tilt is not validated unless all '
+            'four angles are set.'
+        ),
+    )
 
     def load(self):
         from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import m_package
@@ -0,0 +1,105 @@
+import warnings
+
+import numpy as np
+
+
+def grid_gradient(array, spacing):
+    """
+    Finite difference derivatives of a 2D array on a grid with NaN for missing cells.
+    Central differences are used where both neighbors of a cell are measured,
+    one-sided differences where only one is, and NaN where none is.
+
+    Returns:
+        The derivatives along the rows (y) and along the columns (x).
+    """
+    array = np.asarray(array, dtype=float)
+    padded = np.pad(array, 1, constant_values=np.nan)
+    center = padded[1:-1, 1:-1]
+    derivatives = []
+    for forward, backward in (
+        (padded[2:, 1:-1], padded[:-2, 1:-1]),
+        (padded[1:-1, 2:], padded[1:-1, :-2]),
+    ):
+        differences = np.stack([forward - center, center - backward]) / spacing
+        # the mean of the forward and backward difference is the central difference
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            derivatives.append(np.nanmean(differences, axis=0))
+    return tuple(derivatives)
+
+
+def inverse(curvature):
+    """
+    Radius of a curvature, NaN for a vanishing or missing curvature.
+    """
+    curvature = np.asarray(curvature, dtype=float)
+    with np.errstate(divide='ignore'):
+        radius = 1 / curvature
+    return np.where(np.isfinite(radius), radius, np.nan)
+
+
+def local_curvature(component_0, component_90, spacing):
+    """
+    Curvature of the lattice planes from the spatial derivatives of the tilt
+    components (in degrees) on the measurement grid. The bending along x is the
+    derivative of component 0 along x, the bending along y that of component 90
+    along y. Curvatures are in radians per unit of the positions and positive for
+    convex lattice planes, whose normals diverge.
+
+    Returns:
+        A dict of 2D arrays: the four derivatives `dc0_dx`, `dc0_dy`, `dc90_dx`,
+        `dc90_dy` (in degrees per unit of the positions), the curvatures
+        `curvature_x`, `curvature_y`, their mean `curvature`, the `twist` from the
+        mixed derivatives and the `radius` of the mean curvature.
+    """
+    dc0_dy, dc0_dx = grid_gradient(component_0, spacing)
+    dc90_dy, dc90_dx = grid_gradient(component_90, spacing)
+    curvature_x = np.radians(dc0_dx)
+    curvature_y = np.radians(dc90_dy)
+    curvature = (curvature_x + curvature_y) / 2
+    return {
+        'dc0_dx': dc0_dx,
+        'dc0_dy': dc0_dy,
+        'dc90_dx': dc90_dx,
+        'dc90_dy': dc90_dy,
+        'curvature_x': curvature_x,
+        'curvature_y': curvature_y,
+        'curvature': curvature,
+        'twist': np.radians(dc0_dy + dc90_dx) / 2,
+        'radius': inverse(curvature),
+    }
+
+
+def global_curvature(x, y, component_0, component_90):
+    """
+    Curvature of the whole wafer from linear least squares fits of the tilt
+    components (in degrees) against the positions of the points: component 0
+    against x, component 90 against y, and both with a common slope for a
+    spherical bow.
+
+    Returns:
+        The curvatures `curvature_x`, `curvature_y` and `curvature` in radians per
+        unit of the positions.
+    """
+    x, y, component_0, component_90 = (
+        np.asarray(values, dtype=float) for values in (x, y, component_0, component_90)
+    )
+    n = x.size
+    ones, zeros = np.ones(n), np.zeros(n)
+    slope_x = np.linalg.lstsq(np.column_stack([x, ones]), component_0, rcond=None)[0]
+    slope_y = np.linalg.lstsq(np.column_stack([y, ones]), component_90, rcond=None)[0]
+    # one slope with separate offsets of the two components
+    design = np.block(
+        [
+            [x[:, None], ones[:, None], zeros[:, None]],
+            [y[:, None], zeros[:, None], ones[:, None]],
+        ]
+    )
+    slope = np.linalg.lstsq(
+        design, np.concatenate([component_0, component_90]), rcond=None
+    )[0]
+    return {
+        'curvature_x': float(np.radians(slope_x[0])),
+        'curvature_y': float(np.radians(slope_y[0])),
+        'curvature': float(np.radians(slope[0])),
+    }
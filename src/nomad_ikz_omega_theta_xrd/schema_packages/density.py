@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class TiltHistogram:
+    """
+    2D histogram of tilt vectors (component 0, component 90) on a fixed grid of
+    square bins, symmetric around zero. Point sets are added one after the other and
+    only the added points are binned, so the histogram of many maps can be updated
+    with each new map.
+
+    Args:
+        extent: Largest absolute component value covered by the bins. Points outside
+            are only counted in `outside`.
+        bin_width: Width of the bins.
+        counts: Counts of a previous histogram with the same binning, indexed
+            [component 90 bin, component 0 bin].
+        outside: Number of points outside of the bins of the previous histogram.
+    """
+
+    def __init__(self, extent, bin_width, counts=None, outside=0):
+        self.bin_width = float(bin_width)
+        self.n_bins = 2 * max(int(np.ceil(extent / bin_width)), 1)
+        self.edges = (np.arange(self.n_bins + 1) - self.n_bins // 2) * self.bin_width
+        shape = (self.n_bins, self.n_bins)
+        if counts is None or np.shape(counts) != shape:
+            counts = np.zeros(shape, dtype=np.int64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.outside = int(outside)
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def n_points(self):
+        return int(self.counts.sum()) + self.outside
+
+    def add(self, component_0, component_90):
+        """
+        Adds the tilt vectors of a set of points.
+        """
+        offset = self.n_bins // 2
+        index_0 = np.floor(np.asarray(component_0) / self.bin_width).astype(int)
+        index_90 = np.floor(np.asarray(component_90) / self.bin_width).astype(int)
+        index_0 += offset
+        index_90 += offset
+        inside = (
+            (index_0 >= 0)
+            & (index_0 < self.n_bins)
+            & (index_90 >= 0)
+            & (index_90 < self.n_bins)
+        )
+        flat_index = index_90[inside] * self.n_bins + index_0[inside]
+        self.counts += np.bincount(flat_index, minlength=self.n_bins**2).reshape(
+            self.n_bins, self.n_bins
+        )
+        self.outside += int(np.count_nonzero(~inside))
+
+    def density(self):
+        """
+        Returns the fraction of all points per unit area of the components.
+        """
+        if self.n_points == 0:
+            return np.zeros_like(self.counts, dtype=float)
+        return self.counts / (self.n_points * self.bin_width**2)
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class ControlChart:
+    """
+    Control chart of a quantity measured repeatedly, e.g. on a reference wafer. Each
+    value is added in O(1): mean and variance are updated with Welford's algorithm,
+    the exponentially weighted moving average (EWMA) with the weight `smoothing` of
+    the newest value.
+
+    Two alarms are raised once `min_count` values have been added: a single value
+    outside of the control band `mean ± n_sigma * std`, and the EWMA outside of its
+    narrower band `mean ± n_sigma * std * sqrt(smoothing / (2 - smoothing))`, which
+    detects slow drifts. Values with a value alarm are not added to mean and variance,
+    so that outliers do not widen the band.
+
+    Args:
+        n_sigma: Width of the control band in standard deviations.
+        smoothing: Weight of the newest value in the EWMA, between 0 and 1.
+        min_count: Number of values needed before alarms are raised.
+        state: The count, mean, m2 and EWMA of a previous chart, `m2` is the sum of
+            the squared deviations from the mean.
+    """
+
+    def __init__(self, *, n_sigma=3.0, smoothing=0.2, min_count=5, state=None):
+        count, mean, m2, ewma = state or (0, 0.0, 0.0, None)
+        self.n_sigma = float(n_sigma)
+        self.smoothing = float(smoothing)
+        self.min_count = int(min_count)
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.ewma = None if ewma is None else float(ewma)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    @property
+    def armed(self):
+        return self.count >= self.min_count
+
+    @property
+    def limits(self):
+        """
+        The lower and upper limit of the control band of single values.
+        """
+        width = self.n_sigma * self.std
+        return self.mean - width, self.mean + width
+
+    @property
+    def ewma_limits(self):
+        width = self.n_sigma * self.std * np.sqrt(self.smoothing / (2 - self.smoothing))
+        return self.mean - width, self.mean + width
+
+    def add(self, value):
+        """
+        Adds a value and returns its alarms, a list with "value" if the value is
+        outside of the control band and "ewma" if the EWMA is outside of its band.
+        """
+        value = float(value)
+        alarms = []
+        if self.armed:
+            lower, upper = self.limits
+            if not lower <= value <= upper:
+                alarms.append('value')
+        self.ewma = (
+            value
+            if self.ewma is None
+            else self.smoothing * value + (1 - self.smoothing) * self.ewma
+        )
+        if self.armed:
+            lower, upper = self.ewma_limits
+            if not lower <= self.ewma <= upper:
+                alarms.append('ewma')
+        if 'value' not in alarms:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        return alarms
@@ -0,0 +1,223 @@
+import itertools
+
+import h5py
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from nomad_ikz_omega_theta_xrd.schema_packages.peakfitting import stack_curves
+
+EXPORT_FORMATS = ('parquet', 'arrow', 'hdf5')
+
+# Results of the profile fit and the curve quality metrics of the points
+FIT_COLUMNS = (
+    'fwhm',
+    'background',
+    'snr',
+    'asymmetry',
+    'secondary_peak',
+    'intensity_ratio_r_l',
+)
+POINT_COLUMNS = (
+    'x_pos',
+    'y_pos',
+    'tilt',
+    'tilt_direction',
+    'component_0',
+    'component_90',
+    'reference_offset',
+    *FIT_COLUMNS,
+)
+CURVE_COLUMNS = ('omega_r', 'intensity_r', 'omega_l', 'intensity_l')
+
+
+def magnitude(value):
+    return getattr(value, 'magnitude', value)
+
+
+def get_statistics_columns(measurement):
+    section_def = measurement.m_def.all_sub_sections['map_statistics'].sub_section
+    # only the statistics defined in MapStatistics, not the inherited name
+    return tuple(quantity.name for quantity in section_def.quantities)
+
+
+def extract_entry_values(measurement):
+    """
+    Returns the values describing the whole map: name, sample, time, wafer geometry
+    and map statistics. Missing values are None, units are stripped.
+    """
+    values = {
+        'entry_name': measurement.name,
+        'lab_id': measurement.lab_id,
+        'datetime': (
+            measurement.datetime.isoformat() if measurement.datetime else None
+        ),
+        'wafer_diameter': measurement.wafer_diameter,
+        'grid_size': measurement.grid_size,
+    }
+    statistics = measurement.map_statistics
+    for name in get_statistics_columns(measurement):
+        value = statistics.m_get(name) if statistics is not None else None
+        values[name] = None if value is None else float(magnitude(value))
+    return values
+
+
+def extract_point_columns(measurement, curves=False):
+    """
+    Returns the values of the map points as arrays of shape (n_points,). With
+    `curves`, the R and L scan curves are added as arrays of shape
+    (n_points, n_samples), shorter and missing curves are padded with NaN.
+    """
+    results = measurement.results or []
+    columns = {
+        'name': np.array([result.name or '' for result in results], dtype=str),
+        **measurement.extract_map_data(),
+        **{
+            name: np.array(
+                [
+                    np.nan
+                    if result.m_get(name) is None
+                    else magnitude(result.m_get(name))
+                    for result in results
+                ],
+                float,
+            )
+            for name in FIT_COLUMNS
+        },
+    }
+    if curves:
+        for index, side in enumerate(('r', 'l')):
+            omega, intensity = stack_curves(
+                (
+                    (
+                        magnitude(result.Scan_Curves[index].omega),
+                        result.Scan_Curves[index].intensity,
+                    )
+                    if len(result.Scan_Curves or []) > index
+                    else ([], [])
+                )
+                for result in results
+            )
+            columns[f'omega_{side}'] = omega
+            columns[f'intensity_{side}'] = intensity
+    return columns
+
+
+def get_arrow_schema(measurement, curves=False):
+    fields = [
+        pa.field('entry_name', pa.string()),
+        pa.field('lab_id', pa.string()),
+        pa.field('datetime', pa.string()),
+        pa.field('wafer_diameter', pa.float64()),
+        pa.field('grid_size', pa.float64()),
+        *(pa.field(name, pa.float64()) for name in get_statistics_columns(measurement)),
+        pa.field('name', pa.string()),
+        *(pa.field(name, pa.float64()) for name in POINT_COLUMNS),
+    ]
+    if curves:
+        fields.extend(pa.field(name, pa.list_(pa.float64())) for name in CURVE_COLUMNS)
+    return pa.schema(fields)
+
+
+def to_arrow_table(measurement, curves=False, schema=None):
+    """
+    Returns the map of the measurement as a pyarrow table with one row per point.
+    """
+    schema = schema or get_arrow_schema(measurement, curves)
+    columns = extract_point_columns(measurement, curves)
+    entry_values = extract_entry_values(measurement)
+    n_points = len(columns['name'])
+    arrays = []
+    for field in schema:
+        if field.name in columns and field.name in CURVE_COLUMNS:
+            values = columns[field.name]
+            offsets = np.arange(n_points + 1, dtype=np.int32) * values.shape[1]
+            arrays.append(pa.ListArray.from_arrays(offsets, values.ravel()))
+        elif field.name in columns:
+            arrays.append(pa.array(columns[field.name].tolist(), type=field.type))
+        else:
+            value = entry_values[field.name]
+            arrays.append(pa.array([value] * n_points, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_hdf5_group(group, measurement, curves=False):
+    """
+    Writes the map columns as datasets and the entry values as attributes of the
+    given h5py group.
+    """
+    for name, value in extract_entry_values(measurement).items():
+        if value is not None:
+            group.attrs[name] = value
+    for name, values in extract_point_columns(measurement, curves).items():
+        if values.dtype.kind == 'U':
+            group.create_dataset(
+                name, data=values.astype(object), dtype=h5py.string_dtype()
+            )
+        else:
+            group.create_dataset(name, data=values, compression='gzip')
+
+
+def export_maps(measurements, path, format='parquet', curves=False):
+    """
+    Writes the maps of several measurements into one file. The measurements are
+    converted and written one after the other, so only one map is held in memory
+    and `measurements` can be a generator, e.g. over the results of an archive
+    query.
+
+    Parquet and Arrow IPC files contain one table with a row per point, the values
+    of the measurement and its map statistics are repeated for each point. HDF5
+    files contain a group per measurement with the point columns as datasets and the
+    values of the measurement as attributes. Parquet and Arrow need pyarrow, their
+    schema is taken from the first measurement. Without measurements no file is
+    written.
+
+    Args:
+        measurements: `OmegaThetaXRD` sections or archives with one as data.
+        path: The file to write.
+        format: "parquet", "arrow" or "hdf5".
+        curves: Also write the R and L scan curves of the points.
+
+    Returns:
+        The number of written measurements.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(
+            f'Unknown export format "{format}", use one of {EXPORT_FORMATS}.'
+        )
+    measurements = (
+        getattr(measurement, 'data', measurement) for measurement in measurements
+    )
+    count = 0
+    if format == 'hdf5':
+        with h5py.File(path, 'w') as file:
+            for measurement in measurements:
+                group = file.create_group(f'{count:06d}')
+                write_hdf5_group(group, measurement, curves)
+                count += 1
+        return count
+
+    if pa is None:
+        raise ImportError(
+            f'Exporting to {format} needs pyarrow, install it with '
+            '"pip install nomad-ikz_omega_theta_xrd[export]".'
+        )
+
+    first = next(measurements, None)
+    if first is None:
+        return count
+    measurements = itertools.chain([first], measurements)
+    schema = get_arrow_schema(first, curves)
+    if format == 'parquet':
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    with writer:
+        for measurement in measurements:
+            writer.write_table(to_arrow_table(measurement, curves, schema))
+            count += 1
+    return count
@@ -0,0 +1,192 @@
+import functools
+import os
+import tempfile
+
+import numpy as np
+from cachetools import LRUCache
+from nomad.config import config
+from nomad.datamodel.metainfo.plot import PlotlyFigure
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+from nomad_ikz_omega_theta_xrd.schema_packages.parallel import parallel_map
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import (
+    get_fingerprint,
+    get_json_encoder,
+)
+
+
+def get_figure_key(name, version, inputs):
+    """
+    Returns the cache key of a figure from its name, the version of its spec and a
+    dict with everything the figure is created from. Arrays are hashed by their
+    values, all other inputs by their repr.
+    """
+    arrays = {
+        key: value for key, value in inputs.items() if isinstance(value, np.ndarray)
+    }
+    parameters = {key: value for key, value in inputs.items() if key not in arrays}
+    return get_fingerprint(
+        *arrays.values(),
+        figure=name,
+        version=version,
+        arrays=tuple(arrays),
+        **parameters,
+    )
+
+
+def render_figure(task):
+    """
+    Creates a plotly figure with `function(*args)` and returns its JSON.
+    """
+    function, args = task
+    return function(*args).to_plotly_json()
+
+
+class FigureCache:
+    """
+    Plotly figure JSON by the key of the figure. The figures are kept in memory and,
+    if `figure_cache_directory` is set in the schema package config, also as files in
+    that directory, which are shared by all workers and kept between reprocessings.
+    """
+
+    def __init__(self, maxsize=None, directory=None, max_workers=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_workers = max_workers
+        self.memory = None
+
+    def _configure(self):
+        if self.memory is not None:
+            return
+        configuration = config.get_plugin_entry_point(
+            'nomad_ikz_omega_theta_xrd.schema_packages:omegascan'
+        )
+        if self.maxsize is None:
+            self.maxsize = configuration.figure_cache_size
+        if self.directory is None:
+            self.directory = configuration.figure_cache_directory
+        if self.max_workers is None:
+            self.max_workers = configuration.figure_workers
+        self.memory = LRUCache(maxsize=max(self.maxsize, 1))
+        self.dumps = get_json_encoder()
+        self.loads = loads
+
+    @property
+    def enabled(self):
+        self._configure()
+        return self.maxsize > 0 or bool(self.directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, key):
+        """
+        Returns the cached figure as a dict with label and figure or None.
+        """
+        self._configure()
+        content = self.memory.get(key) if self.maxsize > 0 else None
+        if content is None and self.directory:
+            try:
+                with open(self._path(key), 'rb') as file:
+                    content = file.read()
+            except OSError:
+                return None
+            if self.maxsize > 0:
+                self.memory[key] = content
+        return None if content is None else self.loads(content)
+
+    def set(self, key, figure):
+        self._configure()
+        content = self.dumps(figure)
+        if self.maxsize > 0:
+            self.memory[key] = content
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # written to a temporary file first, so that other workers never read
+            # a partially written figure
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path), suffix='.tmp', delete=False
+            ) as file:
+                file.write(content)
+            os.replace(file.name, path)
+        except OSError:
+            pass
+
+    def get_or_create(self, name, version, inputs, create):
+        """
+        Returns the cached plotly figure JSON or creates it with `create()`.
+        """
+        if not self.enabled:
+            return create()
+        key = get_figure_key(name, version, inputs)
+        cached = self.get(key)
+        if cached is not None:
+            return cached['figure']
+        figure = create()
+        self.set(key, {'figure': figure})
+        return figure
+
+    def get_or_render(self, figures):
+        """
+        Returns the plotly figure JSON of several figures in the given order. The
+        figures are given as (name, version, inputs, function, args). Figures which
+        are not cached are rendered with `function(*args)` in a process pool, see
+        `parallel_map`, so `function` and `args` have to be picklable.
+        """
+        enabled = self.enabled
+        keys = [
+            get_figure_key(name, version, inputs) if enabled else None
+            for name, version, inputs, _, _ in figures
+        ]
+        results = [self.get(key) if enabled else None for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        rendered = parallel_map(
+            render_figure,
+            [figures[index][3:] for index in missing],
+            max_workers=self.max_workers or None,
+        )
+        for index, figure in zip(missing, rendered):
+            results[index] = {'figure': figure}
+            if enabled:
+                self.set(keys[index], results[index])
+        return [result['figure'] for result in results]
+
+    def clear(self):
+        if self.memory is not None:
+            self.memory.clear()
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(version, inputs):
+    """
+    Caches the `PlotlyFigure` returned by a figure generating method of a section.
+    `inputs` is called with the section and returns a dict with everything the
+    figure is created from. Increase `version` when the figure spec changes.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self):
+            if not figure_cache.enabled:
+                return function(self)
+            key = get_figure_key(function.__qualname__, version, inputs(self))
+            cached = figure_cache.get(key)
+            if cached is not None:
+                return PlotlyFigure(label=cached['label'], figure=cached['figure'])
+            plot = function(self)
+            figure_cache.set(key, {'label': plot.label, 'figure': plot.figure})
+            return plot
+
+        wrapper.figure_version = version
+        return wrapper
+
+    return decorator
@@ -0,0 +1,69 @@
+import numpy as np
+from scipy.interpolate import (
+    CloughTocher2DInterpolator,
+    LinearNDInterpolator,
+    RBFInterpolator,
+)
+from scipy.spatial import Delaunay
+
+INTERPOLATION_METHODS = ['linear', 'cubic', 'thin_plate_spline']
+
+
+def wafer_raster(wafer_diameter, resolution):
+    """
+    Create a regular raster covering the wafer. Returns the x and y axes and a
+    boolean mask of shape (len(y_axis), len(x_axis)) which is True inside the wafer.
+    """
+    radius = wafer_diameter / 2
+    n_steps = int(np.floor(radius / resolution))
+    axis = np.arange(-n_steps, n_steps + 1) * resolution
+    grid_x, grid_y = np.meshgrid(axis, axis)
+    mask = grid_x**2 + grid_y**2 <= radius**2
+    return axis, axis.copy(), mask
+
+
+def interpolate_map(positions, values, wafer_diameter, *, resolution, method='linear'):
+    """
+    Resample scattered map values onto a regular raster clipped to the wafer circle.
+
+    Args:
+        positions: The x and y positions of the measured points, shape (n,) each.
+        values: Values at the measured points, shape (n,) or (n, m) to interpolate
+            several quantities at once.
+        wafer_diameter: Diameter of the wafer, the raster is clipped to this circle.
+        resolution: Spacing of the raster in the units of the positions.
+        method: One of `INTERPOLATION_METHODS`.
+
+    Returns:
+        The x axis, the y axis and the raster of shape (ny, nx) or (m, ny, nx).
+        Raster cells outside the wafer (and outside the convex hull of the points
+        for `linear` and `cubic`) are NaN.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f'Unknown interpolation method "{method}".')
+
+    x, y = positions
+    points = np.column_stack([np.asarray(x, float), np.asarray(y, float)])
+    values = np.asarray(values, dtype=float)
+    single = values.ndim == 1
+    if single:
+        values = values[:, np.newaxis]
+
+    x_axis, y_axis, mask = wafer_raster(wafer_diameter, resolution)
+    grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+    targets = np.column_stack([grid_x[mask], grid_y[mask]])
+
+    if method == 'thin_plate_spline':
+        interpolator = RBFInterpolator(points, values, kernel='thin_plate_spline')
+    else:
+        triangulation = Delaunay(points)
+        if method == 'linear':
+            interpolator = LinearNDInterpolator(triangulation, values)
+        else:
+            interpolator = CloughTocher2DInterpolator(triangulation, values)
+
+    raster = np.full((values.shape[1], *mask.shape), np.nan)
+    raster[:, mask] = interpolator(targets).T
+    if single:
+        raster = raster[0]
+    return x_axis, y_axis, raster
@@ -16,6 +16,7 @@
 # limitations under the License.
 #
 
+import copy
 from datetime import datetime
 from typing import TYPE_CHECKING
 
@@ -24,34 +25,935 @@ import numpy as np
 import plotly.colors as pc
 import plotly.figure_factory as ff
 import plotly.graph_objects as go
+from nomad.config import config
 from nomad.datamodel.data import ArchiveSection, EntryData
 from nomad.datamodel.metainfo.basesections import (
     CompositeSystemReference,
+    EntityReference,
     Instrument,
     InstrumentReference,
     Measurement,
     MeasurementResult,
+    SectionReference,
 )
 from nomad.datamodel.metainfo.plot import PlotlyFigure, PlotSection
-from nomad.metainfo import MEnum, Package, Quantity, Section, SubSection
+from nomad.metainfo import (
+    Datetime,
+    MEnum,
+    Package,
+    Quantity,
+    Reference,
+    Section,
+    SectionProxy,
+    SubSection,
+)
+from plotly.subplots import make_subplots
 
+from nomad_ikz_omega_theta_xrd.schema_packages.curvature import (
+    global_curvature,
+    inverse,
+    local_curvature,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.density import TiltHistogram
+from nomad_ikz_omega_theta_xrd.schema_packages.drift import ControlChart
+from nomad_ikz_omega_theta_xrd.schema_packages.export import export_maps
+from nomad_ikz_omega_theta_xrd.schema_packages.figurecache import (
+    cached_figure,
+    figure_cache,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.interpolation import (
+    INTERPOLATION_METHODS,
+    interpolate_map,
+)
 from nomad_ikz_omega_theta_xrd.schema_packages.omegathetaxrdreader import (
     extract_data_and_metadata,
     extract_general_info,
     extract_parameter_list,
     extract_scan_data,
 )
-from nomad_ikz_omega_theta_xrd.schema_packages.utils import create_archive
+from nomad_ikz_omega_theta_xrd.schema_packages.parallel import parallel_map
+from nomad_ikz_omega_theta_xrd.schema_packages.peakfitting import (
+    PEAK_PROFILES,
+    curve_quality,
+    fit_peaks,
+    stack_curves,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.profiles import (
+    extract_line_profile,
+    extract_radial_profile,
+    min_max_direction,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.projection import (
+    arrow_angles,
+    line_segments,
+    stereographic_projection,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.references import (
+    get_entry_id,
+    normalize_reference,
+    resolver,
+    search_processing_times,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.registration import (
+    difference_statistics,
+    register_map,
+    transform_map,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.spatial import MapGrid, MapIndex
+from nomad_ikz_omega_theta_xrd.schema_packages.tiltanalysis import (
+    detect_spatial_outliers,
+    recompute_tilt,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.timing import (
+    Timer,
+    count_curve_samples,
+    count_figure_bytes,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import (
+    create_archive,
+    get_fingerprint,
+)
 
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import EntryArchive
     from structlog.stdlib import BoundLogger
-import pandas as pd
 
 m_package = Package(name='Omega Theta XRD')
 
+# Versions of the figure specs of the map plots created in the normalizer. Increase
+# them when changing the plot functions, so that cached figures are recreated.
+MAP_PLOT_VERSION = 3
+QUIVER_PLOT_VERSION = 1
+STEREOGRAPHIC_PLOT_VERSION = 2
+
+# Points of a map needed to fit the local gradients of the outlier detection
+MIN_MAP_POINTS = 4
+# Geometry of the instrument used to recompute the tilt from the peak positions
+TILT_GEOMETRY = (
+    'bragg_angle',
+    'incidence_angle',
+    'plane_inclination',
+    'azimuth_offset',
+)
+# Scan curves of a point, the R curve is the first one
+SCAN_CURVE_SIDES = ('R', 'L')
+# Quantities set by the fits of the scan curves, per curve and per point
+SCAN_CURVE_FIT_QUANTITIES = (
+    'peak_position',
+    'fwhm',
+    'peak_intensity',
+    'background',
+    'integrated_intensity',
+    'noise',
+    'snr',
+    'asymmetry',
+    'secondary_peak',
+)
+POINT_FIT_QUANTITIES = (
+    'fwhm',
+    'background',
+    'snr',
+    'asymmetry',
+    'secondary_peak',
+    'intensity_ratio_r_l',
+)
+
+# Map plots of the fit results and the curve quality metrics of the points
+FIT_MAP_TITLES = {
+    'fwhm': 'FWHM',
+    'snr': 'SNR',
+    'background': 'Background',
+    'asymmetry': 'Asymmetry',
+    'secondary_peak': 'Secondary Peak',
+    'intensity_ratio_r_l': 'R/L Intensity Ratio',
+}
+# Values of reference measurements tracked for drifts of the instruments
+DRIFT_TITLES = {
+    'center_tilt': 'Center Tilt (°)',
+    'reference_offset_mean': 'Mean Reference Offset',
+    'reference_offset_std': 'Std. of the Reference Offset',
+    'throughput': 'Throughput (points/h)',
+}
+
+
+def create_raster_plot(x_axis, y_axis, layers, title, wafer_diameter):
+    """
+    Contour plot of rasters on a common x and y axis with a dropdown to switch
+    between the layers, given as a list of (title, raster) tuples.
+    """
+    fig = go.Figure()
+    for index, (layer_title, raster) in enumerate(layers):
+        fig.add_trace(
+            go.Contour(
+                x=np.asarray(x_axis).tolist(),
+                y=np.asarray(y_axis).tolist(),
+                # NaN is not valid JSON, cells outside the wafer are left empty
+                z=np.where(np.isnan(raster), None, raster).tolist(),
+                colorscale='Picnic',
+                contours_coloring='heatmap',
+                connectgaps=False,
+                name=layer_title,
+                visible=index == 0,
+            )
+        )
+    circle_radius = wafer_diameter / 2
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=-circle_radius,
+        y0=-circle_radius,
+        x1=circle_radius,
+        y1=circle_radius,
+        line=dict(color='darkgrey', width=2),
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title='X Position',
+        yaxis_title='Y Position',
+        plot_bgcolor='white',
+        xaxis=dict(showgrid=True, zeroline=False),
+        yaxis=dict(showgrid=True, zeroline=False, scaleanchor='x', scaleratio=1),
+        updatemenus=[
+            dict(
+                buttons=[
+                    dict(
+                        label=layer_title,
+                        method='update',
+                        args=[{'visible': [i == index for i in range(len(layers))]}],
+                    )
+                    for index, (layer_title, _) in enumerate(layers)
+                ],
+                x=1.0,
+                y=1.15,
+            )
+        ],
+        hovermode='closest',
+        dragmode='zoom',
+    )
+    return fig
+
+
+def get_colors_pl(values):
+    colorscale = pc.get_colorscale('Picnic')
+    low, high = min(values), max(values)
+    # values which do not span a range get the color of the center of the scale
+    if not np.isfinite(high - low) or high - low <= np.finfo(float).eps * max(
+        abs(low), abs(high)
+    ):
+        scaled_values = np.full(len(values), 0.5)
+    else:
+        scaled_values = plt.Normalize(low, high)(values)
+
+    def get_interpolated_color(scaled_value):
+        for i in range(1, len(colorscale)):
+            low_pos, low_color = colorscale[i - 1]
+            high_pos, high_color = colorscale[i]
+
+            # Ensure positions are treated as floats
+            low_pos = float(low_pos)
+            high_pos = float(high_pos)
+
+            if low_pos <= scaled_value <= high_pos:
+                color = pc.find_intermediate_color(
+                    lowcolor=pc.unlabel_rgb(low_color),
+                    highcolor=pc.unlabel_rgb(high_color),
+                    intermed=(scaled_value - low_pos)
+                    / (high_pos - low_pos),
+                    colortype='tuple',
+                )
+                # plotly does not accept components in scientific notation
+                return pc.label_rgb(tuple(round(component) for component in color))
+
+        # Return the last color if value exceeds the colorscale range
+        return colorscale[-1][1]
+
+    return [get_interpolated_color(value) for value in scaled_values]
+
+
+# Function to create a scatter plot with text annotations and color gradient boxes
+def create_map_plot(
+    x_coords, y_coords, values, title, wafer_diameter, grid_size, flagged=None
+):
+    colors = get_colors_pl(values)
+    # hex_colors = [rgba_to_hex(color) for color in colors]
+
+    fig = go.Figure()
+
+    # Define the circle's center and radius
+    circle_center_x = 0  # sum(x_coords) / len(
+    # x_coords
+    # )  # Center of x_coords
+    circle_center_y = 0  # sum(y_coords) / len(
+    # y_coords
+    # )  # Center of y_coords
+    circle_radius = wafer_diameter / 2
+    # (
+    #     1
+    #     + max(
+    #         max(x_coords) - min(x_coords),
+    #         max(y_coords) - min(y_coords),
+    #     )
+    #     / 2
+    # )
+
+    # Add the circle to the plot
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=circle_center_x - circle_radius,
+        y0=circle_center_y - circle_radius,
+        x1=circle_center_x + circle_radius,
+        y1=circle_center_y + circle_radius,
+        line=dict(color='darkgrey', width=2),
+        fillcolor='grey',
+        opacity=0.3,
+    )
+
+    for x, y, value, color in zip(
+        x_coords,
+        y_coords,
+        values,
+        colors,  # hex_colors
+    ):
+        if title == 'Tilt Direction':
+            text_format = f'{float(value):.1f}'
+        else:
+            text_format = f'{float(value):.3f}'
+
+        # Adding box around the text with color gradient
+        fig.add_shape(
+            type='rect',
+            x0=x - grid_size / 2,
+            y0=y - grid_size / 2,
+            x1=x + grid_size / 2,
+            y1=y + grid_size / 2,
+            line=dict(color=color, width=2),
+            fillcolor=color,
+            opacity=1,
+        )
+        # fig.add_trace(
+        #     go.Scatter(
+        #         x=[x],
+        #         y=[y],
+        #         mode='text',
+        #         # marker=dict(
+        #         #    size=0,
+        #         # ),
+        #         text=text_format,  # [f'{float(value):.3f}'],
+        #         textfont=dict(
+        #             size=12,  # Font size
+        #             color='black',  # Font color
+        #             family='Arial',  # Font family
+        #             weight='bold',  # Font weight for bold text
+        #         ),
+        #         textposition='middle center',
+        #         showlegend=False,
+        #     )
+        # )
+        # Add text annotation on top of the colored box
+        fig.add_annotation(
+            x=x,
+            y=y,
+            text=text_format,
+            showarrow=False,
+            font=dict(color='black', size=12),
+            xanchor='center',
+            yanchor='middle',
+        )
+
+    # Outline the points flagged as spatial outliers
+    flagged = np.zeros(len(values), dtype=bool) if flagged is None else flagged
+    for x, y in zip(
+        np.asarray(x_coords)[np.asarray(flagged, dtype=bool)],
+        np.asarray(y_coords)[np.asarray(flagged, dtype=bool)],
+    ):
+        fig.add_shape(
+            type='rect',
+            x0=x - grid_size / 2,
+            y0=y - grid_size / 2,
+            x1=x + grid_size / 2,
+            y1=y + grid_size / 2,
+            line=dict(color='red', width=3),
+        )
+
+    # Add color bar
+    fig.add_trace(
+        go.Scatter(
+            x=x_coords,
+            y=y_coords,
+            mode='markers',
+            opacity=0,
+            marker=dict(
+                size=0,  # Hide the markers
+                color=values,
+                colorscale='Picnic',  # Choose a colorscale
+                colorbar=dict(
+                    title='',
+                    titleside='right',
+                ),
+            ),
+            showlegend=False,
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title='X Position',
+        yaxis_title='Y Position',
+        plot_bgcolor='white',
+        xaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            # scaleanchor='y',
+            # scaleratio=1,
+        ),
+        yaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            scaleanchor='x',
+            scaleratio=1,
+        ),
+        hovermode='closest',
+        dragmode='zoom',
+    )
+    return fig
+
+
+def add_arrow_traces(fig, x, y, dx, dy, customdata, hovertemplate, color):
+    """
+    Adds arrows from (x, y) by (dx, dy) for all points as one line trace and one
+    trace of arrow heads, which carries the hover information.
+    """
+    line_x, line_y = line_segments(x, y, x + dx, y + dy)
+    fig.add_trace(
+        go.Scatter(
+            x=line_x,
+            y=line_y,
+            mode='lines',
+            line=dict(color=color, width=2),
+            hoverinfo='skip',
+            showlegend=False,
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=x + dx,
+            y=y + dy,
+            mode='markers',
+            marker=dict(
+                symbol='arrow',
+                size=15,
+                angle=arrow_angles(dx, dy),
+                color=color,
+            ),
+            customdata=customdata,
+            hovertemplate=hovertemplate,
+            showlegend=False,
+        )
+    )
+
+
+def create_projection_figure(x, y, circle_center, title):
+    fig = go.Figure()
+    circle_radius = 3 + max(np.ptp(x), np.ptp(y)) / 2
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=circle_center[0] - circle_radius,
+        y0=circle_center[1] - circle_radius,
+        x1=circle_center[0] + circle_radius,
+        y1=circle_center[1] + circle_radius,
+        line=dict(color='darkgrey', width=2),
+        fillcolor='grey',
+        opacity=0.3,
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title='X Position',
+        yaxis_title='Y Position',
+        plot_bgcolor='white',
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True,
+            zeroline=False,
+        ),
+        yaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            scaleanchor='x',
+            scaleratio=1,
+        ),
+    )
+    return fig
+
+
+def create_stereographic_projection_plot(
+    x_coords, y_coords, tilt, tilt_direction, title
+):
+    """
+    Pole figure of the lattice plane normals of all points in the stereographic
+    projection, the pole of a point is at the distance tan(tilt / 2) from the
+    surface normal in the center. The circle passes through the pole with the
+    largest tilt.
+    """
+    pole_x, pole_y = stereographic_projection(tilt, tilt_direction)
+    radius = np.max(np.hypot(pole_x, pole_y), initial=0)
+    fig = go.Figure()
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=-radius,
+        y0=-radius,
+        x1=radius,
+        y1=radius,
+        line=dict(color='darkgrey', width=2),
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=pole_x,
+            y=pole_y,
+            mode='markers',
+            marker=dict(symbol='circle', size=6, color='RoyalBlue'),
+            customdata=np.column_stack([x_coords, y_coords, tilt, tilt_direction]),
+            hovertemplate=(
+                'X: %{customdata[0]}<br>'
+                'Y: %{customdata[1]}<br>'
+                'Tilt Angle: %{customdata[2]:.3f}<br>'
+                'Tilt Direction: %{customdata[3]:.1f}°<br>'
+                '<extra></extra>'
+            ),
+            showlegend=False,
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title='Pole X (tan(tilt / 2))',
+        yaxis_title='Pole Y (tan(tilt / 2))',
+        plot_bgcolor='white',
+        showlegend=False,
+        xaxis=dict(showgrid=True, zeroline=True),
+        yaxis=dict(showgrid=True, zeroline=True, scaleanchor='x', scaleratio=1),
+    )
+    return fig
+
+
+def create_stereographic_projection_plot_cartesian(
+    x_coords,
+    y_coords,
+    tilt,
+    tilt_direction,
+    component_0_values,
+    component_90_values,
+    title,
+):
+    """
+    Map of the tilt of all points as arrows given by the tilt components, the x axis
+    is inverted for component 0.
+    """
+    x = np.asarray(x_coords, dtype=float)
+    y = np.asarray(y_coords, dtype=float)
+    fig = create_projection_figure(x, y, (0, 0), title)
+    scaling_factor = 15
+    dx = -np.asarray(component_0_values, dtype=float) * scaling_factor
+    dy = np.asarray(component_90_values, dtype=float) * scaling_factor
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=y,
+            mode='markers',
+            marker=dict(symbol='circle', size=10, color='blue'),
+            hoverinfo='skip',
+            showlegend=False,
+        )
+    )
+    add_arrow_traces(
+        fig,
+        x,
+        y,
+        dx,
+        dy,
+        customdata=np.column_stack([x, y, tilt, tilt_direction, x + dx, y + dy]),
+        hovertemplate=(
+            'X: %{customdata[0]}<br>'
+            'Y: %{customdata[1]}<br>'
+            'Tilt Angle: %{customdata[2]:.3f}<br>'
+            'Tilt Direction: %{customdata[3]:.1f}°<br>'
+            'X Projection: %{customdata[4]:.1f}<br>'
+            'Y Projection: %{customdata[5]:.1f}<br>'
+            '<extra></extra>'
+        ),
+        color='blue',
+    )
+    return fig
+
+
+def create_stereographic_projection_quiver_plot(
+    x_coords,
+    y_coords,
+    tilt_values,
+    tilt_direction_values,
+    component_0_values,
+    component_90_values,
+    title,
+    wafer_diameter=25,  # Default wafer diameter
+):
+    # Compute the u and v components
+    u = [
+        -comp0 for comp0 in component_0_values
+    ]  # Inverted x-component
+    v = [
+        comp90 for comp90 in component_90_values
+    ]  # y-component
+
+    # Create hover text
+    hovertext = [
+        f'X: {x}<br>Y: {y}<br>Tilt: {tilt:.3f}<br>Direction: {tilt_dir:.1f}°'
+        for x, y, tilt, tilt_dir in zip(
+            x_coords,
+            y_coords,
+            tilt_values,
+            tilt_direction_values,
+        )
+    ]
+
+    # Define slider steps and frames
+    steps = []
+    frames = []
+    scales = np.linspace(
+        1, 20, 20
+    )  # Range of scale values for the slider
+
+    for i, scale in enumerate(scales):
+        # Create quiver plot for each scale
+        quiver = ff.create_quiver(
+            x_coords,
+            y_coords,
+            u,
+            v,
+            scale=scale,
+            arrow_scale=0.2,
+            name='Tilt Direction',
+            hoverinfo='text',
+            text=hovertext,
+        )
+        # Add frame for the current scale
+        frames.append(dict(data=quiver.data, name=f'frame{i}'))
+
+        # Add a step to the slider
+        step = dict(
+            method='animate',
+            args=[
+                [f'frame{i}'],  # The frame name to animate to
+                dict(
+                    frame=dict(duration=0, redraw=True),
+                    mode='immediate',
+                ),
+            ],
+            label=f'{scale:.1f}',
+        )
+        steps.append(step)
+
+    # Create the initial quiver plot with the first scale
+    initial_scale = scales[0]
+    fig = ff.create_quiver(
+        x_coords,
+        y_coords,
+        u,
+        v,
+        scale=initial_scale,
+        arrow_scale=0.2,
+        name='Tilt Direction',
+        hoverinfo='text',
+        text=hovertext,
+    )
+
+    # Add the circle representing the wafer
+    circle_center_x = 0
+    circle_center_y = 0
+    circle_radius = wafer_diameter / 2
+
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=circle_center_x - circle_radius,
+        y0=circle_center_y - circle_radius,
+        x1=circle_center_x + circle_radius,
+        y1=circle_center_y + circle_radius,
+        line=dict(color='darkgrey', width=2),
+        fillcolor='grey',
+        opacity=0.3,
+    )
+
+    # Add frames and slider to the figure
+    fig.frames = frames
+    sliders = [
+        dict(
+            steps=steps,
+            active=0,
+            currentvalue={'prefix': 'Scale: '},
+        )
+    ]
+
+    # Update the layout to include the slider
+    fig.update_layout(
+        sliders=sliders,
+        title=title,
+        xaxis_title='X Position',
+        yaxis_title='Y Position',
+        plot_bgcolor='white',
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True, zeroline=False, fixedrange=False
+        ),
+        yaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            scaleanchor='x',
+            scaleratio=1,
+            fixedrange=False,
+        ),
+        hovermode='closest',
+        dragmode='zoom',
+    )
+
+    return fig
+
+
+def create_stereographic_projection_quiver_plot_alt(
+    x_coords,
+    y_coords,
+    tilt_values,
+    tilt_direction_values,
+    component_0_values,
+    component_90_values,
+    title,
+    wafer_diameter,
+    # scaling_factor=1,
+):
+    # Use quiver to plot arrows from the positions defined by x_coords and y_coords
+    # u (x-component) is component_0_values, v (y-component) is component_90_values
+    u = [
+        -comp0 for comp0 in component_0_values
+    ]  # Inverted x-component
+    v = [
+        comp90 for comp90 in component_90_values
+    ]  # y-component
+
+    hovertext = [
+        f'X: {x}<br>Y: {y}<br>Tilt: {tilt:.3f}<br>Direction: {tilt_dir:.1f}°'
+        for x, y, tilt, tilt_dir in zip(
+            x_coords,
+            y_coords,
+            tilt_values,
+            tilt_direction_values,
+        )
+    ]
+
+    # Create quiver plot
+    waferdiameter = wafer_diameter
+    if waferdiameter <= 10:
+        scaling = 2
+    elif waferdiameter <= 25:
+        scaling = 15
+    else:
+        scaling = 20  # adjust when tested with larger wafers
+    fig = ff.create_quiver(
+        x_coords,
+        y_coords,
+        u,
+        v,
+        scale=scaling,
+        arrow_scale=0.2,
+        name='Tilt Direction',
+        hoverinfo='text',
+        text=hovertext,  # Add hover text for each arrow
+    )
+    # Define the circle's center and radius
+    circle_center_x = 0
+    circle_center_y = 0
+    circle_radius = wafer_diameter / 2
+
+    # Add the circle to the plot
+    fig.add_shape(
+        type='circle',
+        xref='x',
+        yref='y',
+        x0=circle_center_x - circle_radius,
+        y0=circle_center_y - circle_radius,
+        x1=circle_center_x + circle_radius,
+        y1=circle_center_y + circle_radius,
+        line=dict(color='darkgrey', width=2),
+        fillcolor='grey',
+        opacity=0.3,
+    )
+
+    # Add layout settings
+    fig.update_layout(
+        #template='plotly_white',
+        title=title,
+        xaxis_title='X Position',
+        yaxis_title='Y Position',
+        plot_bgcolor='white',
+        showlegend=False,
+        xaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            fixedrange=False,
+        ),
+        yaxis=dict(
+            showgrid=True,
+            zeroline=False,
+            scaleanchor='x',  # Make sure x and y are on the same scale
+            scaleratio=1,
+            fixedrange=False,
+        ),
+        hovermode='closest',
+        dragmode='zoom',
+    )
+
+    return fig
+
+
+class DriftRecord(ArchiveSection):
+    m_def = Section(label='Reference Measurement')
+    reference = Quantity(
+        type=Reference(SectionProxy('OmegaThetaXRD')),
+        description='The reference measurement, e.g. of a reference wafer.',
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    name = Quantity(
+        type=str,
+        description='Name of the reference measurement',
+    )
+    datetime = Quantity(
+        type=Datetime,
+        description='Start of the reference measurement',
+    )
+    center_tilt = Quantity(
+        type=np.float64,
+        description='Tilt of the point closest to the center of the wafer',
+        unit='\u00b0',
+    )
+    reference_offset_mean = Quantity(
+        type=np.float64,
+        description='Mean reference offset of the points',
+    )
+    reference_offset_std = Quantity(
+        type=np.float64,
+        description='Standard deviation of the reference offset of the points',
+    )
+    throughput = Quantity(
+        type=np.float64,
+        description='Measured points per hour, from the time stamps of the points',
+    )
+    alarms = Quantity(
+        type=str,
+        shape=['*'],
+        description="""
+        Tracked values with an alarm, "<value>" if the value is outside of the
+        control band and "<value> ewma" if the moving average is outside of its band.
+        """,
+    )
+    tracked = Quantity(
+        type=bool,
+        description='The values are included in the drift trackers.',
+    )
+
+
+class DriftTracker(ArchiveSection):
+    """
+    Control chart of one value of the reference measurements, see `ControlChart`.
+    """
+
+    m_def = Section(label='Drift Tracker')
+    name = Quantity(
+        type=str,
+        description='The tracked value of the reference measurements',
+    )
+    n_sigma = Quantity(
+        type=np.float64,
+        default=3.0,
+        description='Width of the control band in standard deviations.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    smoothing = Quantity(
+        type=np.float64,
+        default=0.2,
+        description='Weight of the newest value in the moving average.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    min_count = Quantity(
+        type=int,
+        default=5,
+        description='Number of values needed before alarms are raised.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    count = Quantity(
+        type=int,
+        description='Number of values in mean and standard deviation.',
+    )
+    mean = Quantity(
+        type=np.float64,
+        description='Mean of the values.',
+    )
+    m2 = Quantity(
+        type=np.float64,
+        description='Sum of the squared deviations from the mean.',
+    )
+    std = Quantity(
+        type=np.float64,
+        description='Standard deviation of the values.',
+    )
+    ewma = Quantity(
+        type=np.float64,
+        description='Exponentially weighted moving average of the values.',
+    )
+    lower_limit = Quantity(
+        type=np.float64,
+        description='Lower limit of the control band.',
+    )
+    upper_limit = Quantity(
+        type=np.float64,
+        description='Upper limit of the control band.',
+    )
+    alarm = Quantity(
+        type=bool,
+        description='The last value or the moving average is outside of its band.',
+    )
+
+    def get_chart(self):
+        return ControlChart(
+            n_sigma=self.n_sigma,
+            smoothing=self.smoothing,
+            min_count=self.min_count,
+            state=(self.count or 0, self.mean or 0.0, self.m2 or 0.0, self.ewma),
+        )
 
-class OmegaThetaXRDInstrument(Instrument, EntryData, ArchiveSection):
+    def set_chart(self, chart):
+        self.count = chart.count
+        self.mean = chart.mean
+        self.m2 = chart.m2
+        self.ewma = chart.ewma
+        armed = chart.armed
+        self.std = chart.std if chart.count > 1 else None
+        self.lower_limit, self.upper_limit = chart.limits if armed else (None, None)
+
+    def reset(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.std = None
+        self.ewma = None
+        self.lower_limit = None
+        self.upper_limit = None
+        self.alarm = None
+
+
+class OmegaThetaXRDInstrument(Instrument, PlotSection, EntryData, ArchiveSection):
     """
     Class autogenerated from yaml schema.
     """
@@ -68,6 +970,127 @@ class OmegaThetaXRDInstrument(Instrument, EntryData, ArchiveSection):
         default='26-0019',
         label='serial_number',
     )
+    n_tracked = Quantity(
+        type=int,
+        description='Number of reference measurements in the drift trackers.',
+    )
+    reference_measurements = SubSection(
+        section_def=DriftRecord,
+        description="""
+        Measurements of reference samples in the order they were measured. Only
+        the values of added measurements are read and added to the drift trackers.
+        """,
+        repeats=True,
+    )
+    drift_trackers = SubSection(
+        section_def=DriftTracker,
+        repeats=True,
+    )
+
+    def track_drift(self, logger):
+        """
+        Adds the values of the reference measurements which are not yet tracked to
+        the drift trackers, in O(1) per measurement and value. The trackers are
+        rebuilt from all reference measurements if tracked ones were removed.
+        """
+        trackers = {tracker.name: tracker for tracker in self.drift_trackers}
+        for name in DRIFT_TITLES:
+            if name not in trackers:
+                trackers[name] = DriftTracker(name=name)
+                self.drift_trackers.append(trackers[name])
+        records = self.reference_measurements
+        if sum(bool(record.tracked) for record in records) != (self.n_tracked or 0):
+            for tracker in trackers.values():
+                tracker.reset()
+            for record in records:
+                record.tracked = False
+        charts = {name: trackers[name].get_chart() for name in DRIFT_TITLES}
+        for record in records:
+            if record.tracked or record.reference is None:
+                continue
+            measurement = record.reference
+            record.name = measurement.name
+            record.datetime = measurement.datetime
+            record.alarms = []
+            for name, value in measurement.get_drift_values().items():
+                setattr(record, name, value)
+                if value is None or not np.isfinite(value):
+                    continue
+                alarms = charts[name].add(value)
+                trackers[name].alarm = bool(alarms)
+                record.alarms.extend(
+                    name if alarm == 'value' else f'{name} ewma' for alarm in alarms
+                )
+            record.tracked = True
+            if record.alarms:
+                logger.warn(
+                    f'Drift alarm of instrument "{self.lab_id}" for reference '
+                    f'measurement "{record.name}": {", ".join(record.alarms)}.'
+                )
+        for name, chart in charts.items():
+            trackers[name].set_chart(chart)
+        self.n_tracked = sum(bool(record.tracked) for record in records)
+
+    def generate_drift_plot(self):
+        records = [record for record in self.reference_measurements if record.tracked]
+        names = [
+            name
+            for name in DRIFT_TITLES
+            if any(record.m_get(name) is not None for record in records)
+        ]
+        trackers = {tracker.name: tracker for tracker in self.drift_trackers}
+        fig = make_subplots(
+            rows=len(names),
+            cols=1,
+            shared_xaxes=True,
+            subplot_titles=[DRIFT_TITLES[name] for name in names],
+        )
+        x = [
+            record.datetime.isoformat() if record.datetime else index
+            for index, record in enumerate(records)
+        ]
+        for row, name in enumerate(names, start=1):
+            values = [record.m_get(name) for record in records]
+            values = [
+                None if value is None else float(getattr(value, 'magnitude', value))
+                for value in values
+            ]
+            alarms = [
+                any(alarm.split()[0] == name for alarm in record.alarms or [])
+                for record in records
+            ]
+            fig.add_trace(
+                go.Scatter(
+                    x=x,
+                    y=values,
+                    mode='lines+markers',
+                    marker=dict(color=['red' if alarm else 'blue' for alarm in alarms]),
+                    text=[record.name for record in records],
+                    name=DRIFT_TITLES[name],
+                    showlegend=False,
+                ),
+                row=row,
+                col=1,
+            )
+            # the control band, once alarms are raised
+            tracker = trackers[name]
+            if tracker.lower_limit is not None:
+                for limit, dash in (
+                    (tracker.lower_limit, 'dash'),
+                    (tracker.mean, 'solid'),
+                    (tracker.upper_limit, 'dash'),
+                ):
+                    fig.add_hline(
+                        y=limit, line=dict(color='grey', dash=dash), row=row, col=1
+                    )
+        fig.update_layout(
+            title='Drift of the Reference Measurements',
+            template='plotly_white',
+            height=250 * max(len(names), 1),
+            hovermode='closest',
+            dragmode='zoom',
+        )
+        return PlotlyFigure(label='Drift', figure=fig.to_plotly_json())
 
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
@@ -78,6 +1101,9 @@ class OmegaThetaXRDInstrument(Instrument, EntryData, ArchiveSection):
             normalized.
             logger (BoundLogger): A structlog logger.
         """
+        if self.reference_measurements:
+            self.track_drift(logger)
+            self.figures = [self.generate_drift_plot()]
         super().normalize(archive, logger)
 
 
@@ -104,7 +1130,10 @@ class OmegaThetaXRDInstrumentReference(InstrumentReference):
             normalized.
             logger (BoundLogger): A structlog logger.
         """
-        super().normalize(archive, logger)
+        # the lab id is resolved with the cached lookup instead of the search of
+        # EntityReference
+        super(EntityReference, self).normalize(archive, logger)
+        normalize_reference(self, archive, logger)
 
 
 class ScanCurve(PlotSection, ArchiveSection):
@@ -134,6 +1163,50 @@ class ScanCurve(PlotSection, ArchiveSection):
         # unit='\u00b0',
         a_plot={'x': 'omega', 'y': 'intensity'},
     )
+    peak_position = Quantity(
+        type=np.float64,
+        description='Peak position from the profile fit',
+        unit='\u00b0',
+    )
+    fwhm = Quantity(
+        type=np.float64,
+        description='Full width at half maximum from the profile fit',
+        unit='\u00b0',
+    )
+    peak_intensity = Quantity(
+        type=np.float64,
+        description='Peak intensity above background from the profile fit',
+    )
+    background = Quantity(
+        type=np.float64,
+        description='Constant background from the profile fit',
+    )
+    integrated_intensity = Quantity(
+        type=np.float64,
+        description='Integrated intensity of the fitted profile without background',
+    )
+    noise = Quantity(
+        type=np.float64,
+        description='Robust standard deviation of the residuals of the profile fit',
+    )
+    snr = Quantity(
+        type=np.float64,
+        description='Peak intensity above background over noise',
+    )
+    asymmetry = Quantity(
+        type=np.float64,
+        description=(
+            'Difference of the intensity right and left of the peak over their sum '
+            'within two FWHM, positive for a tail to larger omega'
+        ),
+    )
+    secondary_peak = Quantity(
+        type=np.float64,
+        description=(
+            'Largest excess of the curve over the fitted profile relative to the '
+            'peak intensity, e.g. from a second grain'
+        ),
+    )
 
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
@@ -144,6 +1217,8 @@ class ScanCurve(PlotSection, ArchiveSection):
             normalized.
             logger (BoundLogger): A structlog logger.
         """
+        if is_rebuilt_by_map(self):
+            return
         super().normalize(archive, logger)
 
 
@@ -205,6 +1280,81 @@ class ParameterList(MeasurementResult, PlotSection, ArchiveSection):
         description='Reference axis',
         a_eln={'component': 'StringEditQuantity'},
     )
+    time_stamp = Quantity(
+        type=Datetime,
+        description='Time of the measurement of the point',
+    )
+    grid_row = Quantity(
+        type=int,
+        description='Row of the point in the arrays of the grid map',
+    )
+    grid_column = Quantity(
+        type=int,
+        description='Column of the point in the arrays of the grid map',
+    )
+    fwhm = Quantity(
+        type=np.float64,
+        description='Mean FWHM of the fitted R and L curves',
+        unit='\u00b0',
+    )
+    background = Quantity(
+        type=np.float64,
+        description='Mean background of the fitted R and L curves',
+    )
+    snr = Quantity(
+        type=np.float64,
+        description='Lowest signal to noise ratio of the R and L curves',
+    )
+    asymmetry = Quantity(
+        type=np.float64,
+        description='Mean peak asymmetry of the R and L curves',
+    )
+    secondary_peak = Quantity(
+        type=np.float64,
+        description='Largest secondary peak indicator of the R and L curves',
+    )
+    intensity_ratio_r_l = Quantity(
+        type=np.float64,
+        description='Integrated intensity of the R curve over that of the L curve',
+    )
+    recomputed_tilt = Quantity(
+        type=np.float64,
+        description='Tilt recomputed from the peak positions of the R and L curves',
+        unit='\u00b0',
+    )
+    recomputed_tilt_direction = Quantity(
+        type=np.float64,
+        description='Tilt direction recomputed from the R and L peak positions',
+        unit='\u00b0',
+    )
+    recomputed_component_0 = Quantity(
+        type=np.float64,
+        description='Component 0 recomputed from the R and L peak positions',
+    )
+    recomputed_component_90 = Quantity(
+        type=np.float64,
+        description='Component 90 recomputed from the R and L peak positions',
+    )
+    tilt_residual = Quantity(
+        type=np.float64,
+        description='Difference between the recomputed and the reported tilt vector',
+        unit='\u00b0',
+    )
+    tilt_residual_exceeded = Quantity(
+        type=bool,
+        description='Tilt residual is above the tolerance of the tilt validation',
+    )
+    outlier_score = Quantity(
+        type=np.float64,
+        description=(
+            'Difference of the tilt components to the neighboring points in units '
+            'of the scaled median absolute deviation of the map'
+        ),
+    )
+    spatial_outlier = Quantity(
+        type=bool,
+        description='Outlier score is above the threshold of the spatial outliers',
+    )
     Scan_Curves = SubSection(
         section_def=ScanCurve,
         repeats=True,
@@ -215,6 +1365,16 @@ class ParameterList(MeasurementResult, PlotSection, ArchiveSection):
         a_eln={'component': 'BoolEditQuantity'},
     )
 
+    @cached_figure(
+        version=1,
+        inputs=lambda self: {
+            f'{quantity}_{index}': np.asarray(
+                getattr(getattr(curve, quantity), 'magnitude', getattr(curve, quantity))
+            )
+            for index, curve in enumerate(self.Scan_Curves[:2])
+            for quantity in ('omega', 'intensity')
+        },
+    )
     def generate_scan_plot(self):
         fig = go.Figure()
         fig.add_trace(
@@ -255,6 +1415,14 @@ class ParameterList(MeasurementResult, PlotSection, ArchiveSection):
         )
         return PlotlyFigure(label='Omega Scans', figure=fig.to_plotly_json())
 
+    @cached_figure(
+        version=1,
+        inputs=lambda self: {
+            'tilt': self.tilt.magnitude,
+            'tilt_direction': self.tilt_direction.magnitude,
+            'reference_axis': self.reference_axis,
+        },
+    )
     def generate_stereographic_plot(self):
         # Werte für Tiltwinkel (Rho) und Azimut (Theta)
         rho = self.tilt.magnitude
@@ -326,6 +1494,9 @@ class ParameterList(MeasurementResult, PlotSection, ArchiveSection):
             normalized.
             logger (BoundLogger): A structlog logger.
         """
+        if is_rebuilt_by_map(self):
+            # the polar plots of all points are generated with the map
+            return
         if self.show_polar_plot is True:
             self.figures.append(self.generate_stereographic_plot())
 
@@ -390,24 +1561,654 @@ class MapStatistics(MeasurementResult, ArchiveSection):
     )
 
 
-class Samples(CompositeSystemReference):
-    m_def = Section(label='Sample', a_eln=dict(overview=True))
-
+class TiltValidation(ArchiveSection):
+    m_def = Section(label='Tilt Validation', a_eln=dict(overview=True))
 
-class SampleSpecifications(ArchiveSection):
-    m_def = Section(a_eln=dict(overview=True))
-    sample_preparation_status = Quantity(
-        type=str,
-        description='Status of the sample preparation',
-        a_eln={'component': 'StringEditQuantity'},
+    tolerance = Quantity(
+        type=np.float64,
+        default=0.005,
+        unit='\u00b0',
+        description='Points with a larger tilt residual are flagged.',
+        a_eln={'component': 'NumberEditQuantity'},
     )
-    sample_side_facing_down = Quantity(
-        type=MEnum(['Al unten', 'N unten']),
-        description='sample surface facing downwards',
-        a_eln={'component': 'EnumEditQuantity'},
+    bragg_angle = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description="""
+        Bragg angle of the reflection. Defaults to the `bragg_angle` setting of the
+        schema package.
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
     )
-
-
+    incidence_angle = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description="""
+        Angle between the beam and the sample surface. Defaults to the
+        `incidence_angle` setting of the schema package.
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    plane_inclination = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description="""
+        Nominal angle between the normal of the reflecting plane and the surface
+        normal. Defaults to the `plane_inclination` setting of the schema package.
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    azimuth_offset = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description="""
+        Rotation angle at which the normal of the reflecting plane points along the
+        0° direction. Defaults to the `azimuth_offset` setting of the schema
+        package.
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    n_flagged = Quantity(
+        type=int,
+        description='Number of points with a tilt residual above the tolerance.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    max_residual = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Maximum tilt residual of the map.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    rms_residual = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Root mean square tilt residual of the map.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+
+class SpatialOutliers(ArchiveSection):
+    m_def = Section(label='Spatial Outliers', a_eln=dict(overview=True))
+
+    n_neighbors = Quantity(
+        type=int,
+        default=8,
+        description='Number of nearest points within 1.5 grid sizes compared to.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    threshold = Quantity(
+        type=np.float64,
+        default=5.0,
+        description="""
+        Points with a larger outlier score, i.e. difference of their tilt components
+        to the neighboring points in units of the scaled median absolute deviation
+        of the map, are flagged.
+        """,
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    n_flagged = Quantity(
+        type=int,
+        description='Number of points flagged as spatial outliers.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    flagged_points = Quantity(
+        type=str,
+        shape=['*'],
+        description='Names of the points flagged as spatial outliers.',
+    )
+    map_statistics = SubSection(
+        section_def=MapStatistics,
+        description='Statistics of the map without the flagged points.',
+    )
+
+
+class InterpolatedMap(ArchiveSection):
+    m_def = Section(label='Interpolated Map')
+
+    method = Quantity(
+        type=MEnum(INTERPOLATION_METHODS),
+        default='linear',
+        description='Method used to interpolate the map points onto the raster.',
+        a_eln={'component': 'EnumEditQuantity'},
+    )
+    resolution = Quantity(
+        type=np.float64,
+        description='Spacing of the raster. Defaults to a quarter of the grid size.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    x_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='X positions of the raster columns.',
+    )
+    y_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Y positions of the raster rows.',
+    )
+    tilt = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        unit='\u00b0',
+        description='Interpolated tilt, NaN outside of the wafer.',
+    )
+    component_0 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Interpolated component 0, NaN outside of the wafer.',
+    )
+    component_90 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Interpolated component 90, NaN outside of the wafer.',
+    )
+    data_fingerprint = Quantity(
+        type=str,
+        description='Hash of the point data and settings the raster was computed from.',
+    )
+
+
+class GridMap(ArchiveSection):
+    m_def = Section(label='Grid Map')
+
+    x_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='X positions of the grid columns.',
+    )
+    y_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Y positions of the grid rows.',
+    )
+    inside = Quantity(
+        type=np.bool_,
+        shape=['*', '*'],
+        description='Cells with their center on the wafer.',
+    )
+    n_missing = Quantity(
+        type=int,
+        description='Number of cells on the wafer without a point.',
+    )
+    tilt = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        unit='\u00b0',
+        description='Tilt of the points, NaN for cells without a point.',
+    )
+    tilt_direction = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        unit='\u00b0',
+        description='Tilt direction of the points, NaN for cells without a point.',
+    )
+    component_0 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Component 0 of the points, NaN for cells without a point.',
+    )
+    component_90 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Component 90 of the points, NaN for cells without a point.',
+    )
+    reference_offset = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Reference offset of the points, NaN for cells without a point.',
+    )
+
+
+class CurvatureMap(ArchiveSection):
+    """
+    Bowing of the lattice planes from the spatial derivatives of the tilt
+    components on the grid map, see `local_curvature`. Curvatures are in radians
+    and radii in the unit of the positions, both positive for convex lattice
+    planes.
+    """
+
+    m_def = Section(label='Curvature Map')
+
+    dc0_dx = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Derivative of component 0 along x.',
+    )
+    dc0_dy = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Derivative of component 0 along y.',
+    )
+    dc90_dx = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Derivative of component 90 along x.',
+    )
+    dc90_dy = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Derivative of component 90 along y.',
+    )
+    curvature_x = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Local curvature along x.',
+    )
+    curvature_y = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Local curvature along y.',
+    )
+    curvature = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Local mean curvature of x and y.',
+    )
+    twist = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Local twist from the mixed derivatives.',
+    )
+    radius = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Local radius of the mean curvature.',
+    )
+    global_radius = Quantity(
+        type=np.float64,
+        description='Radius of a spherical bow fitted to the components of all points',
+    )
+    global_radius_x = Quantity(
+        type=np.float64,
+        description='Radius of the linear fit of component 0 against x',
+    )
+    global_radius_y = Quantity(
+        type=np.float64,
+        description='Radius of the linear fit of component 90 against y',
+    )
+    mean_curvature = Quantity(
+        type=np.float64,
+        description='Mean of the local mean curvature',
+    )
+    curvature_std = Quantity(
+        type=np.float64,
+        description='Standard deviation of the local curvature',
+    )
+    median_radius = Quantity(
+        type=np.float64,
+        description='Radius of the median local curvature',
+    )
+    min_radius = Quantity(
+        type=np.float64,
+        description='Local radius of the most strongly bent cell, with its sign',
+    )
+
+
+class LineProfile(ArchiveSection):
+    m_def = Section(label='Line Profile')
+
+    name = Quantity(
+        type=str,
+        description='Name of the profile',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    angle = Quantity(
+        type=np.float64,
+        default=0,
+        unit='\u00b0',
+        description='Direction of the line, counterclockwise from the x axis.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    origin_x = Quantity(
+        type=np.float64,
+        default=0,
+        description='X position the line passes through.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    origin_y = Quantity(
+        type=np.float64,
+        default=0,
+        description='Y position the line passes through.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    min_max_direction = Quantity(
+        type=bool,
+        default=False,
+        description='Place the line through the minimum and maximum tilt of the map.',
+        a_eln={'component': 'BoolEditQuantity'},
+    )
+    position = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Position along the line relative to the origin.',
+    )
+    tilt = Quantity(
+        type=np.float64,
+        shape=['*'],
+        unit='\u00b0',
+        description='Tilt along the line.',
+    )
+    component_0 = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Component 0 along the line.',
+    )
+    component_90 = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Component 90 along the line.',
+    )
+    fwhm = Quantity(
+        type=np.float64,
+        shape=['*'],
+        unit='\u00b0',
+        description='FWHM along the line.',
+    )
+
+
+class RadialProfile(ArchiveSection):
+    m_def = Section(label='Radial Profile')
+
+    bin_width = Quantity(
+        type=np.float64,
+        description='Width of the rings. Defaults to the grid size.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    radius = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Mean distance of the points in each ring from the center.',
+    )
+    tilt = Quantity(
+        type=np.float64,
+        shape=['*'],
+        unit='\u00b0',
+        description='Azimuthally averaged tilt.',
+    )
+    component_0 = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Azimuthally averaged component 0.',
+    )
+    component_90 = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Azimuthally averaged component 90.',
+    )
+    fwhm = Quantity(
+        type=np.float64,
+        shape=['*'],
+        unit='\u00b0',
+        description='Azimuthally averaged FWHM.',
+    )
+
+
+class TimingSpan(ArchiveSection):
+    m_def = Section(label='Timing Span')
+
+    name = Quantity(
+        type=str,
+        description='Name of the processing stage.',
+    )
+    duration = Quantity(
+        type=np.float64,
+        unit='s',
+        description='Duration of the stage.',
+    )
+    points = Quantity(
+        type=int,
+        description='Number of map points processed in the stage.',
+    )
+    curve_samples = Quantity(
+        type=int,
+        description='Number of scan curve samples processed in the stage.',
+    )
+    figure_bytes = Quantity(
+        type=int,
+        description='Size of the figures created in the stage as JSON.',
+    )
+
+
+class ProcessingDiagnostics(ArchiveSection):
+    m_def = Section(label='Processing Diagnostics')
+
+    total_duration = Quantity(
+        type=np.float64,
+        unit='s',
+        description='Duration of the normalization.',
+    )
+    spans = SubSection(
+        section_def=TimingSpan,
+        repeats=True,
+    )
+
+
+class Samples(CompositeSystemReference):
+    m_def = Section(label='Sample', a_eln=dict(overview=True))
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        # the lab id is resolved with the cached lookup instead of the search of
+        # EntityReference
+        super(EntityReference, self).normalize(archive, logger)
+        normalize_reference(self, archive, logger)
+
+
+class SampleSpecifications(ArchiveSection):
+    m_def = Section(a_eln=dict(overview=True))
+    sample_preparation_status = Quantity(
+        type=str,
+        description='Status of the sample preparation',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    sample_side_facing_down = Quantity(
+        type=MEnum(['Al unten', 'N unten']),
+        description='sample surface facing downwards',
+        a_eln={'component': 'EnumEditQuantity'},
+    )
+
+
+def create_parameter_list(measurement):
+    """
+    Creates the results of one point from a Measurement of the data file.
+    """
+    info_dict = extract_general_info(measurement)
+    paramter_dict = extract_parameter_list(measurement)
+    results = ParameterList()
+    results.name = info_dict.get('name')
+    results.x_pos = float(paramter_dict.get('xpos'))
+    results.y_pos = float(paramter_dict.get('ypos'))
+    results.tilt = float(paramter_dict.get('tilt'))
+    results.tilt_direction = float(paramter_dict.get('tilt_direction'))
+    results.component_0 = float(paramter_dict.get('component_0'))
+    results.component_90 = float(paramter_dict.get('component_90'))
+    results.reference_offset = float(paramter_dict.get('reference_offset'))
+    results.reference_axis = paramter_dict.get('reference_axis')
+    if info_dict.get('time_stamp'):
+        results.time_stamp = datetime.strptime(
+            info_dict.get('time_stamp'), '%m/%d/%Y %H:%M:%S'
+        )
+    if measurement.get('Scans'):
+        scan_dict = extract_scan_data(measurement)
+        scan_r = ScanCurve()
+        scan_r.name = scan_dict.get('scan_r').get('name')
+        scan_r.omega = scan_dict.get('scan_r').get('omega')
+        scan_r.intensity = scan_dict.get('scan_r').get('intensity')
+        scan_l = ScanCurve()
+        scan_l.name = scan_dict.get('scan_l').get('name')
+        scan_l.omega = scan_dict.get('scan_l').get('omega')
+        scan_l.intensity = scan_dict.get('scan_l').get('intensity')
+        results.Scan_Curves = [scan_r, scan_l]
+    return results
+
+
+def fit_scan_curves(results, profile):
+    """
+    Fits all R and L curves of the given points in one batch and computes their
+    quality metrics.
+    """
+    scan_curves = [
+        scan_curve for result in results for scan_curve in result.Scan_Curves
+    ]
+    if not scan_curves:
+        return
+    omega, intensity = stack_curves(
+        (scan_curve.omega.magnitude, scan_curve.intensity) for scan_curve in scan_curves
+    )
+    fit = fit_peaks(omega, intensity, profile=profile)
+    quality = curve_quality(omega, intensity, fit)
+    for index, scan_curve in enumerate(scan_curves):
+        scan_curve.peak_position = fit['peak_position'][index]
+        scan_curve.fwhm = fit['fwhm'][index]
+        scan_curve.peak_intensity = fit['amplitude'][index]
+        scan_curve.background = fit['background'][index]
+        scan_curve.integrated_intensity = fit['integrated_intensity'][index]
+        scan_curve.noise = quality['noise'][index]
+        scan_curve.snr = quality['snr'][index]
+        scan_curve.asymmetry = quality['asymmetry'][index]
+        scan_curve.secondary_peak = quality['secondary_peak'][index]
+    for result in results:
+        if result.Scan_Curves:
+            result.fwhm = np.mean(
+                [scan_curve.fwhm.magnitude for scan_curve in result.Scan_Curves]
+            )
+            result.background = np.mean(
+                [scan_curve.background for scan_curve in result.Scan_Curves]
+            )
+            result.snr = np.min([scan_curve.snr for scan_curve in result.Scan_Curves])
+            result.asymmetry = np.mean(
+                [scan_curve.asymmetry for scan_curve in result.Scan_Curves]
+            )
+            result.secondary_peak = np.max(
+                [scan_curve.secondary_peak for scan_curve in result.Scan_Curves]
+            )
+        if len(result.Scan_Curves) == len(SCAN_CURVE_SIDES):
+            r_curve, l_curve = result.Scan_Curves
+            result.intensity_ratio_r_l = (
+                r_curve.integrated_intensity / l_curve.integrated_intensity
+            )
+
+
+def copy_scan_curve_fits(results, pages):
+    """
+    Copies the fits of the scan curves of the map points to the same points of the
+    point pages, so that the pages do not fit the curves again.
+    """
+    for page in pages:
+        for index, result in enumerate(page.results, start=page.first_point):
+            source = results[index]
+            for name in POINT_FIT_QUANTITIES:
+                if source.m_get(name) is not None:
+                    result.m_set(name, source.m_get(name))
+            for source_curve, scan_curve in zip(
+                source.Scan_Curves, result.Scan_Curves
+            ):
+                for name in SCAN_CURVE_FIT_QUANTITIES:
+                    scan_curve.m_set(name, source_curve.m_get(name))
+
+
+def is_fitted(results):
+    return all(
+        scan_curve.peak_position is not None
+        for result in results
+        for scan_curve in result.Scan_Curves
+    )
+
+
+def is_rebuilt_by_map(section):
+    """
+    Whether the section belongs to a measurement which rebuilds all points from its
+    data file. The normalizers of the points run before the one of the measurement,
+    anything they produce would be replaced.
+    """
+    parent = section.m_parent
+    while parent is not None:
+        if isinstance(parent, OmegaThetaXRD):
+            return parent.data_file is not None
+        parent = parent.m_parent
+    return False
+
+
+def generate_stereographic_plots(results):
+    """
+    Adds the stereographic plot to the figures of the given points. The figure
+    is built with plotly once, the other points get a copy with their values, which is
+    much faster than building the figure for every point.
+    """
+    template = None
+    for result in results:
+        if template is None:
+            plot = result.generate_stereographic_plot()
+            template = plot.figure
+        else:
+            rho = result.tilt.magnitude
+            figure = copy.deepcopy(template)
+            figure['data'][0]['r'] = [0, rho]
+            figure['data'][0]['theta'] = [0, result.tilt_direction.magnitude]
+            figure['layout']['polar']['radialaxis']['range'] = [
+                0,
+                np.ceil(rho * 10) / 10,
+            ]
+            figure['layout']['annotations'][0]['text'] = (
+                '(' + result.reference_axis + ')'
+            )
+            plot = PlotlyFigure(label=plot.label, figure=figure)
+        result.figures.append(plot)
+
+
+class OmegaThetaXRDPointPage(EntryData, ArchiveSection):
+    """
+    Scan curves and fits of a range of points of a large map, stored in a child
+    entry of the map so that they are only loaded on demand.
+    """
+
+    m_def = Section(label='Omega Theta XRD Point Page')
+    name = Quantity(
+        type=str,
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    measurement = Quantity(
+        type=Measurement,
+        description='The map the points belong to.',
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    page = Quantity(
+        type=int,
+        description='Index of the page',
+    )
+    first_point = Quantity(
+        type=int,
+        description='Index of the first point of the page in the map',
+    )
+    peak_profile = Quantity(
+        type=MEnum(PEAK_PROFILES),
+        default='pseudo_voigt',
+        description='Profile fitted to the scan curves',
+        a_eln={'component': 'EnumEditQuantity'},
+    )
+    results = SubSection(section_def=ParameterList, repeats=True)
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        """
+        The normalizer for the `OmegaThetaXRDPointPage` class.
+
+        Args:
+            archive (EntryArchive): The archive containing the section that is being
+            normalized.
+            logger (BoundLogger): A structlog logger.
+        """
+        super().normalize(archive, logger)
+        # the fits are copied from the map if it is processed together with its pages
+        if not is_fitted(self.results):
+            fit_scan_curves(self.results, self.peak_profile)
+
+
+class PointPageReference(SectionReference):
+    reference = Quantity(
+        type=OmegaThetaXRDPointPage,
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+
+
 class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
     """
     Class autogenerated from yaml schema.
@@ -424,6 +2225,14 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
         description='Data file *.xrd containing the XRD data.',
         a_eln={'component': 'FileEditQuantity'},
     )
+    data_files = Quantity(
+        type=str,
+        shape=['*'],
+        description=(
+            'Single measurement *.xrd files of one wafer which are combined into a '
+            'mapping.'
+        ),
+    )
     # time_stamp = Quantity(
     #     type=Datetime,
     #     a_eln={'component': 'DateTimeEditQuantity'},
@@ -445,6 +2254,12 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
         a_eln={'component': 'NumberEditQuantity'},
         # unit='cm', ?
     )
+    peak_profile = Quantity(
+        type=MEnum(PEAK_PROFILES),
+        default='pseudo_voigt',
+        description='Profile fitted to the scan curves',
+        a_eln={'component': 'EnumEditQuantity'},
+    )
 
     samples = SubSection(section_def=Samples, repeats=True)
     sample_specifications = SubSection(
@@ -455,12 +2270,51 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
         section_def=ParameterList,
         repeats=True,
     )
+    point_pages = SubSection(
+        section_def=PointPageReference,
+        description=(
+            'Child entries with the scan curves and fits of the points. If set, the '
+            'results of this entry do not contain the scan curves.'
+        ),
+        repeats=True,
+    )
     map_statistics = SubSection(
         section_def=MapStatistics,
     )
+    tilt_validation = SubSection(
+        section_def=TiltValidation,
+    )
+    spatial_outliers = SubSection(
+        section_def=SpatialOutliers,
+    )
+    interpolated_map = SubSection(
+        section_def=InterpolatedMap,
+    )
+    grid_map = SubSection(
+        section_def=GridMap,
+        description=(
+            'The points as 2D arrays on the lattice of the measurement, for array '
+            'operations like gradients and filters.'
+        ),
+    )
+    curvature_map = SubSection(
+        section_def=CurvatureMap,
+        description='Bowing and curvature radius of the lattice planes.',
+    )
+    line_profiles = SubSection(
+        section_def=LineProfile,
+        repeats=True,
+    )
+    radial_profile = SubSection(
+        section_def=RadialProfile,
+    )
     instruments = SubSection(
         section_def=OmegaThetaXRDInstrumentReference,
     )
+    processing_diagnostics = SubSection(
+        section_def=ProcessingDiagnostics,
+        description='Timing of the processing stages, see the `timing` setting.',
+    )
 
     # def generate_table_plot(self):
     #     # Extract the values for each column from all self.results
@@ -540,95 +2394,605 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
             reference_offset_list,
             reference_axis_list,
         )
-    def generate_map_statistics(self):
-        (
-            x_pos_list,
-            y_pos_list,
-            tilt_list,
-            tilt_direction_list,
-            component_0_list,
-            component_90_list,
-            reference_offset_list,
-            reference_axis_list,
-        ) = self.extract_table_data()
 
+    def extract_map_data(self):
+        """
+        Returns the numeric values of all map points as arrays (one per column).
+        """
+        return {
+            'x_pos': np.array([result.x_pos for result in self.results], float),
+            'y_pos': np.array([result.y_pos for result in self.results], float),
+            'tilt': np.array([result.tilt.magnitude for result in self.results]),
+            'tilt_direction': np.array(
+                [result.tilt_direction.magnitude for result in self.results]
+            ),
+            'component_0': np.array(
+                [result.component_0 for result in self.results], float
+            ),
+            'component_90': np.array(
+                [result.component_90 for result in self.results], float
+            ),
+            'reference_offset': np.array(
+                [result.reference_offset for result in self.results], float
+            ),
+        }
+
+    def get_drift_values(self):
+        """
+        Returns the values of the measurement tracked for drifts of the instrument
+        if it is a reference measurement, see `DRIFT_TITLES`. Missing values are None.
+        """
+        values = dict.fromkeys(DRIFT_TITLES)
+        if not self.results:
+            return values
+        if self.map_statistics is not None:
+            values['center_tilt'] = self.map_statistics.center_tilt.magnitude
+        else:
+            values['center_tilt'] = self.results[0].tilt.magnitude
+        reference_offset = self.extract_map_data()['reference_offset']
+        values['reference_offset_mean'] = np.mean(reference_offset)
+        values['reference_offset_std'] = np.std(reference_offset)
+        time_stamps = [
+            result.time_stamp for result in self.results if result.time_stamp
+        ]
+        if len(time_stamps) > 1:
+            duration = (max(time_stamps) - min(time_stamps)).total_seconds()
+            if duration > 0:
+                # the points are started n - 1 intervals apart
+                values['throughput'] = 3600 * (len(time_stamps) - 1) / duration
+        return values
+
+    def export(self, path, format='parquet', curves=False):
+        """
+        Writes the map columns, the map statistics and optionally the scan curves
+        to a Parquet, Arrow IPC or HDF5 file, see `export_maps`.
+        """
+        export_maps([self], path, format=format, curves=curves)
+
+    def combine_data_files(self, archive, logger):
+        """
+        Reads the single measurement files in `data_files` in parallel and combines
+        them into the structure of a MultiMeasurement file. Files with another wafer
+        info than the first file are left out.
+        """
+        paths = []
+        for data_file in self.data_files:
+            with archive.m_context.raw_file(data_file) as file:
+                paths.append(file.name)
+        measurements = [
+            xrd_dict.get('Measurement', {})
+            for xrd_dict in parallel_map(extract_data_and_metadata, paths)
+        ]
+        wafer_info = measurements[0].get('WaferInfo', {})
+        combined = []
+        for data_file, measurement in zip(self.data_files, measurements):
+            if measurement.get('WaferInfo', {}) != wafer_info:
+                logger.warn(
+                    f'Wafer info of "{data_file}" does not match, left out of the map.'
+                )
+                continue
+            combined.append(measurement)
+        return {
+            'MultiMeasurement': {
+                'Info': measurements[0].get('Info', {}),
+                'WaferInfo': wafer_info,
+                'Measurements': {'Measurement': combined},
+            }
+        }
+
+    def set_map_geometry(self, info_dict, logger):
+        """
+        Sets the wafer diameter and the grid size from the wafer info of the data
+        file. The wafer info of single measurement files may lack them, then they
+        are estimated from the positions of the points.
+
+        Called after the results of a map are created, it drops the spatial index
+        and the grid of previous results.
+        """
+        self.m_cache.pop('map_index', None)
+        self.m_cache.pop('map_grid', None)
+        map_data = self.extract_map_data()
+        if info_dict.get('grid_size'):
+            self.grid_size = float(info_dict.get('grid_size'))
+        else:
+            self.grid_size = MapIndex(map_data['x_pos'], map_data['y_pos']).grid_size
+            logger.warn(
+                'No grid size in the data file, estimated from the spacing of the '
+                f'points: {self.grid_size:.3g}.'
+            )
+        if info_dict.get('wafer_diameter'):
+            self.wafer_diameter = float(info_dict.get('wafer_diameter'))
+        else:
+            radius = np.max(np.hypot(map_data['x_pos'], map_data['y_pos']))
+            self.wafer_diameter = 2 * radius + self.grid_size
+            logger.warn(
+                'No wafer diameter in the data file, estimated from the outermost '
+                f'point: {self.wafer_diameter:.3g}.'
+            )
+
+    def create_instruments(self, archive, serials, logger):
+        """
+        Returns one instrument reference per distinct serial number. Instruments which
+        are not found by their lab id are created once as
+        `Freiberger_Omega_Theta_XRD_<serial>.archive.json`.
+        """
+        instruments = [
+            OmegaThetaXRDInstrumentReference(lab_id=serial)
+            for serial in dict.fromkeys(serials)
+        ]
+        resolver.resolve_sections(archive, [*self.samples, *instruments], logger)
+        for instrument in instruments:
+            if instrument.reference is not None:
+                continue
+            instrument.reference = create_archive(
+                OmegaThetaXRDInstrument(lab_id=instrument.lab_id),
+                archive,
+                f'Freiberger_Omega_Theta_XRD_{instrument.lab_id}.archive.json',
+            )
+            if instrument.reference is not None:
+                resolver.add(archive, instrument.lab_id, instrument.reference)
+        return instruments
+
+    def fit_scan_curves(self):
+        fit_scan_curves(self.results, self.peak_profile)
+
+    def validate_tilt(self):
+        # Recompute the tilt vectors from the fitted R and L peak positions and
+        # compare them to the values reported by the instrument
+        tilt_validation = self.tilt_validation or TiltValidation()
+        configuration = config.get_plugin_entry_point(
+            'nomad_ikz_omega_theta_xrd.schema_packages:omegascan'
+        )
+        for name in TILT_GEOMETRY:
+            if getattr(tilt_validation, name) is None:
+                setattr(tilt_validation, name, getattr(configuration, name))
+            if getattr(tilt_validation, name) is None:
+                raise ValueError(f'The {name} of the instrument is not configured.')
+        geometry = {
+            name: getattr(tilt_validation, name).magnitude for name in TILT_GEOMETRY
+        }
+        map_data = self.extract_map_data()
+        peak_r, peak_l = np.array(
+            [
+                [
+                    scan_curve.peak_position.magnitude
+                    for scan_curve in result.Scan_Curves
+                ]
+                for result in self.results
+            ]
+        ).T
+        recomputed = recompute_tilt(
+            peak_r,
+            peak_l,
+            map_data['component_0'],
+            map_data['component_90'],
+            geometry,
+        )
+        # peak positions without a reflection condition give a residual of NaN
+        tolerance = tilt_validation.tolerance.magnitude
+        exceeded = ~(recomputed['residual'] <= tolerance)
+        for index, result in enumerate(self.results):
+            result.recomputed_component_0 = recomputed['component_0'][index]
+            result.recomputed_component_90 = recomputed['component_90'][index]
+            result.recomputed_tilt = recomputed['tilt'][index]
+            result.recomputed_tilt_direction = recomputed['tilt_direction'][index]
+            result.tilt_residual = recomputed['residual'][index]
+            result.tilt_residual_exceeded = bool(exceeded[index])
+        tilt_validation.n_flagged = int(np.sum(exceeded))
+        tilt_validation.max_residual = np.nanmax(recomputed['residual'])
+        tilt_validation.rms_residual = np.sqrt(
+            np.nanmean(recomputed['residual'] ** 2)
+        )
+        return tilt_validation
+
+    def detect_spatial_outliers(self):
+        # Compare the tilt components of every point to its neighbors on the grid
+        spatial_outliers = self.spatial_outliers or SpatialOutliers()
+        map_data = self.extract_map_data()
+        map_index = self.get_map_index()
+        neighbors = map_index.neighbors(
+            spatial_outliers.n_neighbors, max_distance=1.5 * map_index.grid_size
+        )
+        score, flagged = detect_spatial_outliers(
+            map_data['x_pos'],
+            map_data['y_pos'],
+            np.column_stack([map_data['component_0'], map_data['component_90']]),
+            neighbors,
+            spatial_outliers.threshold,
+        )
+        for index, result in enumerate(self.results):
+            result.outlier_score = score[index]
+            result.spatial_outlier = bool(flagged[index])
+        spatial_outliers.n_flagged = int(np.sum(flagged))
+        spatial_outliers.flagged_points = [
+            result.name or '' for result, flag in zip(self.results, flagged) if flag
+        ]
+        spatial_outliers.map_statistics = self.generate_map_statistics(
+            exclude=flagged
+        )
+        return spatial_outliers
+
+    def generate_interpolated_map(self):
+        # Resample tilt and components onto a regular raster inside the wafer.
+        # The raster is only recomputed if the point data or settings changed.
+        interpolated_map = self.interpolated_map or InterpolatedMap()
+        if interpolated_map.resolution is None:
+            interpolated_map.resolution = self.grid_size / 4
+        map_data = self.extract_map_data()
+        columns = [
+            map_data['x_pos'],
+            map_data['y_pos'],
+            map_data['tilt'],
+            map_data['component_0'],
+            map_data['component_90'],
+        ]
+        fingerprint = get_fingerprint(
+            *columns,
+            method=interpolated_map.method,
+            resolution=float(interpolated_map.resolution),
+            wafer_diameter=float(self.wafer_diameter),
+        )
+        if interpolated_map.data_fingerprint == fingerprint:
+            return interpolated_map
+
+        x_axis, y_axis, raster = interpolate_map(
+            (map_data['x_pos'], map_data['y_pos']),
+            np.column_stack(columns[2:]),
+            self.wafer_diameter,
+            resolution=float(interpolated_map.resolution),
+            method=interpolated_map.method,
+        )
+        interpolated_map.x_axis = x_axis
+        interpolated_map.y_axis = y_axis
+        interpolated_map.tilt = raster[0]
+        interpolated_map.component_0 = raster[1]
+        interpolated_map.component_90 = raster[2]
+        interpolated_map.data_fingerprint = fingerprint
+        return interpolated_map
+
+    @cached_figure(
+        version=1,
+        inputs=lambda self: {
+            'x_axis': np.asarray(self.interpolated_map.x_axis),
+            'y_axis': np.asarray(self.interpolated_map.y_axis),
+            'tilt': np.asarray(self.interpolated_map.tilt.magnitude),
+            'component_0': np.asarray(self.interpolated_map.component_0),
+            'component_90': np.asarray(self.interpolated_map.component_90),
+            'method': self.interpolated_map.method,
+            'wafer_diameter': self.wafer_diameter,
+        },
+    )
+    def generate_interpolated_map_plot(self):
+        interpolated_map = self.interpolated_map
+        fig = create_raster_plot(
+            interpolated_map.x_axis,
+            interpolated_map.y_axis,
+            [
+                ('Tilt', interpolated_map.tilt.magnitude),
+                ('Component 0', interpolated_map.component_0),
+                ('Component 90', interpolated_map.component_90),
+            ],
+            f'Interpolated Map ({interpolated_map.method})',
+            self.wafer_diameter,
+        )
+        return PlotlyFigure(label='Interpolated Map', figure=fig.to_plotly_json())
+
+    def get_map_index(self):
+        """
+        Returns the spatial index of the map points. The index is built once and
+        kept in `m_cache` until the results are replaced, see `set_map_geometry`.
+        """
+        if 'map_index' not in self.m_cache:
+            map_data = self.extract_map_data()
+            self.m_cache['map_index'] = MapIndex(
+                map_data['x_pos'], map_data['y_pos'], self.grid_size
+            )
+        return self.m_cache['map_index']
+
+    def get_map_grid(self):
+        """
+        Returns the points on the lattice of the measurement, see `MapGrid`. The grid
+        is built once and kept in `m_cache` until the results are replaced, see
+        `set_map_geometry`.
+        """
+        if 'map_grid' not in self.m_cache:
+            map_data = self.extract_map_data()
+            self.m_cache['map_grid'] = MapGrid(
+                map_data['x_pos'],
+                map_data['y_pos'],
+                self.grid_size,
+                self.wafer_diameter,
+            )
+        return self.m_cache['map_grid']
+
+    def generate_grid_map(self):
+        map_grid = self.get_map_grid()
+        map_data = self.extract_map_data()
+        for index, result in enumerate(self.results):
+            result.grid_row = int(map_grid.row[index])
+            result.grid_column = int(map_grid.column[index])
+        grid_map = GridMap(
+            x_axis=map_grid.x_axis,
+            y_axis=map_grid.y_axis,
+            inside=map_grid.inside,
+            n_missing=int(np.count_nonzero(map_grid.inside & ~map_grid.measured)),
+        )
+        for name in (
+            'tilt',
+            'tilt_direction',
+            'component_0',
+            'component_90',
+            'reference_offset',
+        ):
+            setattr(grid_map, name, map_grid.to_array(map_data[name]))
+        return grid_map
+
+    def generate_curvature_map(self):
+        grid_map = self.grid_map
+        local = local_curvature(
+            grid_map.component_0, grid_map.component_90, self.grid_size
+        )
+        curvature_map = CurvatureMap(**local)
+        map_data = self.extract_map_data()
+        fitted = global_curvature(
+            map_data['x_pos'],
+            map_data['y_pos'],
+            map_data['component_0'],
+            map_data['component_90'],
+        )
+        curvature_map.global_radius = float(inverse(fitted['curvature']))
+        curvature_map.global_radius_x = float(inverse(fitted['curvature_x']))
+        curvature_map.global_radius_y = float(inverse(fitted['curvature_y']))
+        curvature = local['curvature'][np.isfinite(local['curvature'])]
+        if curvature.size:
+            curvature_map.mean_curvature = np.mean(curvature)
+            curvature_map.curvature_std = np.std(curvature)
+            curvature_map.median_radius = float(inverse(np.median(curvature)))
+            curvature_map.min_radius = float(
+                inverse(curvature[np.argmax(abs(curvature))])
+            )
+        return curvature_map
+
+    @cached_figure(
+        version=1,
+        inputs=lambda self: {
+            'x_axis': np.asarray(self.grid_map.x_axis),
+            'y_axis': np.asarray(self.grid_map.y_axis),
+            'curvature': np.asarray(self.curvature_map.curvature),
+            'curvature_x': np.asarray(self.curvature_map.curvature_x),
+            'curvature_y': np.asarray(self.curvature_map.curvature_y),
+            'twist': np.asarray(self.curvature_map.twist),
+            'global_radius': self.curvature_map.global_radius,
+            'wafer_diameter': self.wafer_diameter,
+        },
+    )
+    def generate_curvature_map_plot(self):
+        curvature_map = self.curvature_map
+        fig = create_raster_plot(
+            self.grid_map.x_axis,
+            self.grid_map.y_axis,
+            [
+                ('Mean Curvature', curvature_map.curvature),
+                ('Curvature X', curvature_map.curvature_x),
+                ('Curvature Y', curvature_map.curvature_y),
+                ('Twist', curvature_map.twist),
+            ],
+            f'Curvature Map (global radius {curvature_map.global_radius:.4g})',
+            self.wafer_diameter,
+        )
+        return PlotlyFigure(label='Curvature Map', figure=fig.to_plotly_json())
 
-        data = {
-            'X Pos': x_pos_list,
-            'Y Pos': y_pos_list,
-            'Tilt': tilt_list,
-            'Tilt Direction': tilt_direction_list,
-            'Component 0': component_0_list,
-            'Component 90': component_90_list,
-            'Reference Offset': reference_offset_list,
-            'Reference Axis': reference_axis_list,
+    def get_profile_columns(self):
+        """
+        Returns the names and the stacked values of the map columns profiles are
+        extracted for. FWHM is only included if all points have been fitted.
+        """
+        map_data = self.extract_map_data()
+        names = ['tilt', 'component_0', 'component_90']
+        columns = [map_data[name] for name in names]
+        fwhm = [result.fwhm for result in self.results]
+        if all(value is not None for value in fwhm):
+            names.append('fwhm')
+            columns.append(np.array([value.magnitude for value in fwhm]))
+        return names, np.column_stack(columns)
+
+    def generate_line_profiles(self):
+        map_data = self.extract_map_data()
+        names, values = self.get_profile_columns()
+        line_profiles = self.line_profiles or [
+            LineProfile(name='X', angle=0),
+            LineProfile(name='Y', angle=90),
+            LineProfile(name='Min to max', min_max_direction=True),
+        ]
+        for line_profile in line_profiles:
+            if line_profile.min_max_direction:
+                origin, angle = min_max_direction(
+                    map_data['x_pos'], map_data['y_pos'], map_data['tilt']
+                )
+                line_profile.origin_x, line_profile.origin_y = origin
+                line_profile.angle = angle
+            position, profile = extract_line_profile(
+                (map_data['x_pos'], map_data['y_pos']),
+                values,
+                (
+                    (line_profile.origin_x, line_profile.origin_y),
+                    line_profile.angle.magnitude,
+                ),
+                wafer_diameter=self.wafer_diameter,
+                step=self.grid_size / 4,
+            )
+            line_profile.position = position
+            for index, name in enumerate(names):
+                setattr(line_profile, name, profile[:, index])
+        return line_profiles
+
+    def generate_radial_profile(self):
+        map_data = self.extract_map_data()
+        names, values = self.get_profile_columns()
+        radial_profile = self.radial_profile or RadialProfile()
+        if radial_profile.bin_width is None:
+            radial_profile.bin_width = self.grid_size
+        radius, profile = extract_radial_profile(
+            map_data['x_pos'], map_data['y_pos'], values, radial_profile.bin_width
+        )
+        radial_profile.radius = radius
+        for index, name in enumerate(names):
+            setattr(radial_profile, name, profile[:, index])
+        return radial_profile
+
+    def generate_profile_plots(self):
+        titles = {
+            'tilt': 'Tilt',
+            'component_0': 'Component 0',
+            'component_90': 'Component 90',
+            'fwhm': 'FWHM',
         }
+        names = [name for name in titles if self.radial_profile.m_get(name) is not None]
+
+        def get_values(section, name):
+            values = section.m_get(name)
+            values = getattr(values, 'magnitude', values)
+            # NaN is not valid JSON, positions outside the map are left empty
+            return np.where(np.isnan(values), None, values).tolist()
+
+        def dropdown(n_traces):
+            # one group of traces per quantity, the dropdown switches between them
+            return [
+                dict(
+                    buttons=[
+                        dict(
+                            label=titles[name],
+                            method='update',
+                            args=[
+                                {
+                                    'visible': [
+                                        trace // n_traces == index
+                                        for trace in range(len(names) * n_traces)
+                                    ]
+                                },
+                                {'yaxis.title.text': titles[name]},
+                            ],
+                        )
+                        for index, name in enumerate(names)
+                    ],
+                    x=1.0,
+                    y=1.15,
+                )
+            ]
+
+        fig_line = go.Figure()
+        for index, name in enumerate(names):
+            for line_profile in self.line_profiles:
+                fig_line.add_trace(
+                    go.Scatter(
+                        x=line_profile.position.tolist(),
+                        y=get_values(line_profile, name),
+                        mode='lines',
+                        name=(
+                            f'{line_profile.name} ({line_profile.angle.magnitude:.0f}'
+                            f'° through {line_profile.origin_x:.1f}, '
+                            f'{line_profile.origin_y:.1f})'
+                        ),
+                        visible=index == 0,
+                    )
+                )
+        fig_line.update_layout(
+            template='plotly_white',
+            title='Line Profiles',
+            xaxis_title='Position along the line',
+            yaxis_title=titles[names[0]],
+            updatemenus=dropdown(len(self.line_profiles)),
+            hovermode='closest',
+            dragmode='zoom',
+        )
+
+        fig_radial = go.Figure()
+        for index, name in enumerate(names):
+            fig_radial.add_trace(
+                go.Scatter(
+                    x=self.radial_profile.radius.tolist(),
+                    y=get_values(self.radial_profile, name),
+                    mode='lines+markers',
+                    name=titles[name],
+                    visible=index == 0,
+                )
+            )
+        fig_radial.update_layout(
+            template='plotly_white',
+            title='Radial Profile',
+            xaxis_title='Distance from the center',
+            yaxis_title=titles[names[0]],
+            updatemenus=dropdown(1),
+            hovermode='closest',
+            dragmode='zoom',
+        )
+        return [
+            PlotlyFigure(label='Line Profiles', figure=fig_line.to_plotly_json()),
+            PlotlyFigure(label='Radial Profile', figure=fig_radial.to_plotly_json()),
+        ]
+
+    def generate_processing_diagnostics(self, timer):
+        return ProcessingDiagnostics(
+            total_duration=timer.total,
+            spans=[
+                TimingSpan(name=stage, duration=duration, **counts)
+                for stage, duration, counts in timer.spans
+            ],
+        )
 
-        df = pd.DataFrame(data).apply(pd.to_numeric, errors='ignore')
-        # Find the tilt and direction value of the x y combinations which is at x=0 and y=0 or as close as possible
-        df['distance'] = np.sqrt(df['X Pos']**2 + df['Y Pos']**2)
-        closest_point = df.loc[df['distance'].idxmin()]
-        center_tilt = closest_point['Tilt']
-        center_direction = float(closest_point['Tilt Direction'])
-        tilt_min = df['Tilt'].min()
-        tilt_max = df['Tilt'].max()
-        tilt_diff_min_max = tilt_max - tilt_min
-        avg_tilt = df['Tilt'].mean()
-        rms_tilt = np.sqrt(np.mean(df['Tilt']**2))
+    def generate_map_statistics(self, exclude=None):
+        map_data = self.extract_map_data()
+        include = np.ones(len(self.results), dtype=bool)
+        if exclude is not None:
+            include &= ~np.asarray(exclude, dtype=bool)
+        if not include.any():
+            return None
+        tilt = map_data['tilt'][include]
+        # The tilt and direction of the point which is at x=0 and y=0 or as close
+        # as possible, points which are excluded are skipped
+        center_index, _ = self.get_map_index().nearest(0, 0)
+        if not include[center_index]:
+            candidates, _ = self.get_map_index().k_nearest(0, 0, len(include))
+            center_index = candidates[include[candidates]][0]
+        tilt_min = tilt.min()
+        tilt_max = tilt.max()
         return MapStatistics(
-            center_tilt=center_tilt,
-            center_direction=center_direction,
+            center_tilt=map_data['tilt'][center_index],
+            center_direction=map_data['tilt_direction'][center_index],
             tilt_min=tilt_min,
             tilt_max=tilt_max,
-            tilt_diff_min_max=tilt_diff_min_max,
-            avg_tilt=avg_tilt,
-            rms_tilt=rms_tilt,
-        )        
+            tilt_diff_min_max=tilt_max - tilt_min,
+            avg_tilt=tilt.mean(),
+            rms_tilt=np.sqrt(np.mean(tilt**2)),
+        )
+
+    @cached_figure(
+        version=1,
+        inputs=lambda self: {**self.extract_map_data(), 'grid_size': self.grid_size},
+    )
     def generate_tilt_x_y_cut_plot(self):
         # Plot: x-y cut tilt, if possible along min max direction
-        (
-            x_pos_list,
-            y_pos_list,
-            tilt_list,
-            tilt_direction_list,
-            component_0_list,
-            component_90_list,
-            reference_offset_list,
-            reference_axis_list,
-        ) = self.extract_table_data()
-        data = {
-            'X Pos': x_pos_list,
-            'Y Pos': y_pos_list,
-            'Tilt': tilt_list,
-            'Tilt Direction': tilt_direction_list,
-            'Component 0': component_0_list,
-            'Component 90': component_90_list,
-            'Reference Offset': reference_offset_list,
-            'Reference Axis': reference_axis_list,
-        }
-
-        df = pd.DataFrame(data).apply(pd.to_numeric, errors='ignore')
-        df = df.apply(pd.to_numeric, errors='ignore')
-        # Find the rows where x and y are closest to zero
-        
-        closest_x_zero_value = df['X Pos'].iloc[(df['X Pos'] - 0).abs().argsort()[:1]].values[0]
-        closest_y_zero_value = df['Y Pos'].iloc[(df['Y Pos'] - 0).abs().argsort()[:1]].values[0]
+        map_data = self.extract_map_data()
+        map_index = self.get_map_index()
+        # The column closest to x == 0 and the row closest to y == 0
+        column = map_index.column(0)
+        row = map_index.row(0)
 
         # Create the plot
         fig = go.Figure()
 
         # Add trace for closest x == 0
         fig.add_trace(go.Scatter(
-            x= df.loc[df['X Pos'] == closest_x_zero_value]['Y Pos'],
-            y= df.loc[df['X Pos'] == closest_x_zero_value]['Tilt'],
+            x=map_data['y_pos'][column].tolist(),
+            y=map_data['tilt'][column].tolist(),
             mode='lines+markers',
             name='Tilt over closest X == 0'
         ))
 
         # Add trace for closest y == 0
         fig.add_trace(go.Scatter(
-            x= df.loc[df['Y Pos'] == closest_y_zero_value]['X Pos'],
-            y= df.loc[df['Y Pos'] == closest_y_zero_value]['Tilt'],
+            x=map_data['x_pos'][row].tolist(),
+            y=map_data['tilt'][row].tolist(),
             mode='lines+markers',
             name='Tilt over closest Y == 0'
         ))
@@ -651,9 +3015,9 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
 
         return PlotlyFigure(label='Cut', figure=fig.to_plotly_json())
 
-
-
-
+    @cached_figure(
+        version=1, inputs=lambda self: {'table': self.extract_table_data()}
+    )
     def generate_table_plot(self):
         (
             x_pos_list,
@@ -716,8 +3080,14 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
             logger (BoundLogger): A structlog logger.
         """
         # super().normalize(archive, logger)
+        timer = Timer(logger, 'OmegaThetaXRD.normalize')
 
         if self.data_file is not None:
+            # the points are rebuilt from the data file, the polar plot selection is
+            # kept by the names of the points
+            polar_plots = {
+                result.name for result in self.results if result.show_polar_plot
+            }
             # read_function = extract_data_and_metadata
             # write_function = self.get_write_functions()
             # if read_function is None or write_function is None:
@@ -726,7 +3096,11 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
             #     )
             # else:
             with archive.m_context.raw_file(self.data_file) as file:
-                xrd_dict = extract_data_and_metadata(file.name)
+                if self.data_files:
+                    xrd_dict = self.combine_data_files(archive, logger)
+                else:
+                    xrd_dict = extract_data_and_metadata(file.name)
+                timer.lap('read data file')
                 #    raman_dict = read_function(file.name)  # , logger)
                 # write_function(raman_dict, archive, logger)
                 if (
@@ -801,22 +3175,19 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
                     results.Scan_Curves = [scan_r, scan_l]
                     # results.normalize(archive, logger)
                     self.results = [results]
-
-                    xrdinstrumentref = OmegaThetaXRDInstrumentReference()
-                    xrdinstrumentref.lab_id = info_dict.get('device_serial_no')
-                    xrdinstrumentref.normalize(archive, logger)
-                    if xrdinstrumentref.reference is None:
-                        xrdinstrument = OmegaThetaXRDInstrument(
-                            lab_id=xrdinstrumentref.lab_id
+                    if timer.enabled:
+                        timer.lap(
+                            'create sections',
+                            points=1,
+                            curve_samples=count_curve_samples(self.results),
                         )
-                        #    self.instruments = [ramanspectrometer]
+                    self.fit_scan_curves()
+                    timer.lap('fit scan curves', points=1)
 
-                        xrdinstrumentref.reference = create_archive(
-                            xrdinstrument,
-                            archive,
-                            f'Freiberger_Omega_Theta_XRD_{xrdinstrumentref.lab_id}.archive.json',
-                        )
-                    self.instruments = [xrdinstrumentref]
+                    self.instruments = self.create_instruments(
+                        archive, [info_dict.get('device_serial_no')], logger
+                    )
+                    timer.lap('create instruments')
 
                     self.figures = []
 
@@ -831,6 +3202,13 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
                         )
 
                     self.figures.append(self.results[0].generate_scan_plot())
+                    if timer.enabled:
+                        timer.lap(
+                            'create figures',
+                            figure_bytes=count_figure_bytes(
+                                [*self.figures, *self.results[0].figures]
+                            ),
+                        )
 
                 elif (
                     extract_general_info(xrd_dict.get('MultiMeasurement', {}))['name']
@@ -847,8 +3225,6 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
                     )
                     self.scan_recipe_name = info_dict.get('scan_recipe_name')
                     self.measurement_type = 'mapping'
-                    self.wafer_diameter = float(info_dict.get('wafer_diameter'))
-                    self.grid_size = float(info_dict.get('grid_size'))
                     self.samples = []
                     if '-MI_' or '-XY_' in self.data_file:
                         sampleid = self.data_file.split('_')[0][:-3]
@@ -876,55 +3252,51 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
                         sampleprep += 'N polar sawed'
                     samplespecs.sample_preparation_status = sampleprep
                     self.sample_specifications = samplespecs
+                    self.results = []
+                    serials = []
                     for measurement in (
                         xrd_dict.get('MultiMeasurement', {})
                         .get('Measurements', {})
                         .get('Measurement')
                     ):
                         info_dict = extract_general_info(measurement)
-                        paramter_dict = extract_parameter_list(measurement)
-                        # scan_dict = extract_scan_data(measurement)
-                        results = ParameterList()
-                        results.name = info_dict.get('name')
-                        results.x_pos = float(paramter_dict.get('xpos'))
-                        results.y_pos = float(paramter_dict.get('ypos'))
-                        results.tilt = float(paramter_dict.get('tilt'))
-                        results.tilt_direction = float(
-                            paramter_dict.get('tilt_direction')
-                        )
-                        results.component_0 = float(paramter_dict.get('component_0'))
-                        results.component_90 = float(paramter_dict.get('component_90'))
-                        results.reference_offset = float(
-                            paramter_dict.get('reference_offset')
+                        self.results.append(create_parameter_list(measurement))
+                        serials.append(info_dict.get('device_serial_no'))
+                    self.set_map_geometry(
+                        extract_general_info(xrd_dict.get('MultiMeasurement', {})),
+                        logger,
+                    )
+                    if timer.enabled:
+                        timer.lap(
+                            'create sections',
+                            points=len(self.results),
+                            curve_samples=count_curve_samples(self.results),
                         )
-                        results.reference_axis = paramter_dict.get('reference_axis')
-                        # # scan_r = ScanCurve()
-                        # # scan_r.name = scan_dict.get('scan_r').get('name')
-                        # # scan_r.omega = scan_dict.get('scan_r').get('omega')
-                        # # scan_r.intensity = scan_dict.get('scan_r').get('intensity')
-                        # # scan_l = ScanCurve()
-                        # # scan_l.name = scan_dict.get('scan_l').get('name')
-                        # # scan_l.omega = scan_dict.get('scan_l').get('omega')
-                        # # scan_l.intensity = scan_dict.get('scan_l').get('intensity')
-                        # # results.Scan_Curves = [scan_r, scan_l]
-                        # results.normalize(archive, logger)
-                        self.results.append(results)
-
-                        xrdinstrumentref = OmegaThetaXRDInstrumentReference()
-                        xrdinstrumentref.lab_id = info_dict.get('device_serial_no')
-                        # xrdinstrumentref.normalize(archive, logger)
-                        if xrdinstrumentref.reference is None:
-                            xrdinstrument = OmegaThetaXRDInstrument(
-                                lab_id=xrdinstrumentref.lab_id
-                            )
-                            #    self.instruments = [ramanspectrometer]
 
-                            xrdinstrumentref.reference = create_archive(
-                                xrdinstrument,
-                                archive,
-                                f'Freiberger_Omega_Theta_XRD_{xrdinstrumentref.lab_id}.archive.json',
-                            )
-                        self.instruments = [xrdinstrumentref]
+                    self.instruments = self.create_instruments(archive, serials, logger)
+                    timer.lap('create instruments')
+                    self.fit_scan_curves()
+                    timer.lap('fit scan curves', points=len(self.results))
+                    if self.results and all(
+                        len(result.Scan_Curves) == len(SCAN_CURVE_SIDES)
+                        for result in self.results
+                    ):
+                        try:
+                            self.tilt_validation = self.validate_tilt()
+                        except ValueError as e:
+                            logger.warn('Could not validate the tilt.', exc_info=e)
+                    if self.point_pages:
+                        # the curves are kept in the point pages, which the parser
+                        # passes along to receive the fits
+                        copy_scan_curve_fits(
+                            self.results, self.m_cache.get('point_pages', [])
+                        )
+                        for result in self.results:
+                            result.Scan_Curves = []
+                    timer.lap('validate tilt', points=len(self.results))
+                    if len(self.results) >= MIN_MAP_POINTS:
+                        self.spatial_outliers = self.detect_spatial_outliers()
+                    timer.lap('detect spatial outliers', points=len(self.results))
 
                     if self.results != None:
                         # Extracting data for the plots
@@ -958,920 +3330,156 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
 
                         # def get_colors_pl(values):
                         #     norm = plt.Normalize(min(values), max(values))
-                        #     colorscale = pc.get_colorscale('balance')
-                        #     return [
-                        #         pc.find_intermediate_color(
-                        #             colorscale, intermed=norm(value), colortype='rgb'
-                        #         )
-                        #         for value in values
-                        #     ]
-                        def get_colors_pl(values):
-                            norm = plt.Normalize(min(values), max(values))
-                            colorscale = pc.get_colorscale('Picnic')
-
-                            def get_interpolated_color(value):
-                                scaled_value = norm(value)
-
-                                for i in range(1, len(colorscale)):
-                                    low_pos, low_color = colorscale[i - 1]
-                                    high_pos, high_color = colorscale[i]
-
-                                    # Ensure positions are treated as floats
-                                    low_pos = float(low_pos)
-                                    high_pos = float(high_pos)
-
-                                    if low_pos <= scaled_value <= high_pos:
-                                        return pc.find_intermediate_color(
-                                            lowcolor=low_color,
-                                            highcolor=high_color,
-                                            intermed=(scaled_value - low_pos)
-                                            / (high_pos - low_pos),
-                                            colortype='rgb',
-                                        )
-
-                                # Return the last color if value exceeds the colorscale range
-                                return colorscale[-1][1]
-
-                            return [get_interpolated_color(value) for value in values]
-
-                        # Function to convert RGBA to hex
-                        def rgba_to_hex(rgba):
-                            return f'#{int(rgba[0]*255):02x}{int(rgba[1]*255):02x}{int(rgba[2]*255):02x}'
-
-                        # Function to create a scatter plot with text annotations and color gradient boxes
-                        def create_plot(x_coords, y_coords, values, title):
-                            colors = get_colors_pl(values)
-                            # hex_colors = [rgba_to_hex(color) for color in colors]
-
-                            fig = go.Figure()
-
-                            # Define the circle's center and radius
-                            circle_center_x = 0  # sum(x_coords) / len(
-                            # x_coords
-                            # )  # Center of x_coords
-                            circle_center_y = 0  # sum(y_coords) / len(
-                            # y_coords
-                            # )  # Center of y_coords
-                            circle_radius = self.wafer_diameter / 2
-                            # (
-                            #     1
-                            #     + max(
-                            #         max(x_coords) - min(x_coords),
-                            #         max(y_coords) - min(y_coords),
-                            #     )
-                            #     / 2
-                            # )
-
-                            # Add the circle to the plot
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            for x, y, value, color in zip(
-                                x_coords,
-                                y_coords,
-                                values,
-                                colors,  # hex_colors
-                            ):
-                                if title == 'Tilt Direction':
-                                    text_format = f'{float(value):.1f}'
-                                else:
-                                    text_format = f'{float(value):.3f}'
-
-                                # Adding box around the text with color gradient
-                                grid_size = self.grid_size
-                                fig.add_shape(
-                                    type='rect',
-                                    x0=x - grid_size / 2,
-                                    y0=y - grid_size / 2,
-                                    x1=x + grid_size / 2,
-                                    y1=y + grid_size / 2,
-                                    line=dict(color=color, width=2),
-                                    fillcolor=color,
-                                    opacity=1,
-                                )
-                                # fig.add_trace(
-                                #     go.Scatter(
-                                #         x=[x],
-                                #         y=[y],
-                                #         mode='text',
-                                #         # marker=dict(
-                                #         #    size=0,
-                                #         # ),
-                                #         text=text_format,  # [f'{float(value):.3f}'],
-                                #         textfont=dict(
-                                #             size=12,  # Font size
-                                #             color='black',  # Font color
-                                #             family='Arial',  # Font family
-                                #             weight='bold',  # Font weight for bold text
-                                #         ),
-                                #         textposition='middle center',
-                                #         showlegend=False,
-                                #     )
-                                # )
-                                # Add text annotation on top of the colored box
-                                fig.add_annotation(
-                                    x=x,
-                                    y=y,
-                                    text=text_format,
-                                    showarrow=False,
-                                    font=dict(color='black', size=12),
-                                    xanchor='center',
-                                    yanchor='middle',
-                                )
-
-                            # Add color bar
-                            fig.add_trace(
-                                go.Scatter(
-                                    x=x_coords,
-                                    y=y_coords,
-                                    mode='markers',
-                                    opacity=0,
-                                    marker=dict(
-                                        size=0,  # Hide the markers
-                                        color=values,
-                                        colorscale='Picnic',  # Choose a colorscale
-                                        colorbar=dict(
-                                            title='',
-                                            titleside='right',
-                                        ),
-                                    ),
-                                    showlegend=False,
-                                )
-                            )
-                            fig.update_layout(
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                xaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    # scaleanchor='y',
-                                    # scaleratio=1,
-                                ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',
-                                    scaleratio=1,
-                                ),
-                                hovermode='closest',
-                                dragmode='zoom',
-                            )
-                            return fig
-
-                        def create_stereographic_projection_plot(
-                            x_coords, y_coords, tilt, tilt_direction, title
-                        ):
-                            fig = go.Figure()
-
-                            # Define the circle's center and radius
-                            circle_center_x = sum(x_coords) / len(
-                                x_coords
-                            )  # Center of x_coords
-                            circle_center_y = sum(y_coords) / len(
-                                y_coords
-                            )  # Center of y_coords
-                            circle_radius = (
-                                3
-                                + max(
-                                    max(x_coords) - min(x_coords),
-                                    max(y_coords) - min(y_coords),
-                                )
-                                / 2
-                            )
-
-                            # Add the circle to the plot
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            for x, y, rho, theta in zip(
-                                x_coords,
-                                y_coords,
-                                tilt,
-                                tilt_direction,  # hex_colors
-                            ):
-                                fig.add_shape(
-                                    type='rect',
-                                    x0=x - 1.5,
-                                    y0=y - 1.5,
-                                    x1=x + 1.5,
-                                    y1=y + 1.5,
-                                    line=dict(color='grey', width=2),
-                                    fillcolor='white',
-                                    opacity=0,
-                                )
-                                # Add text annotation on top of the colored box
-                                # fig.add_annotation(
-                                #     x=x,
-                                #     y=y,
-                                #     text=text_format,
-                                #     showarrow=False,
-                                #     font=dict(color='black', size=12),
-                                #     xanchor='center',
-                                #     yanchor='middle',
-                                # )
-
-                                # Loop through each coordinate and plot its stereographic projection
-                                # for x, y, rho, theta in zip(x_coords, y_coords, rhos, thetas):
-                                # Convert polar to Cartesian coordinates for the projection
-                                scaling_factor = 15
-
-                                scaled_rho = rho * scaling_factor
-                                x_projection = x + scaled_rho * np.cos(
-                                    np.radians(theta)
-                                )
-                                y_projection = y + scaled_rho * np.sin(
-                                    np.radians(theta)
-                                )
-                                # fig.add_shape(
-                                #     type='line',
-                                #     x0=x,
-                                #     y0=y,
-                                #     x1=x_projection,
-                                #     y1=y_projection,
-                                #     line=dict(color='RoyalBlue', width=3),
-                                #     xref='x',
-                                #     yref='y',
-                                #     arrowhead=2,
-                                #     arrowsize=1.5,
-                                # )
-
-                                # Add a line from (x, y) to the projected point
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=[x, x_projection],
-                                        y=[y, y_projection],
-                                        mode='lines+markers',
-                                        # marker=dict(size=8),
-                                        marker=dict(
-                                            symbol='arrow',
-                                            size=15,
-                                            angleref='previous',
-                                        ),
-                                        customdata=[
-                                            [x, y, rho, theta]
-                                        ],  # Include custom data for hover
-                                        hovertemplate=(
-                                            'X: %{customdata[0]}<br>'
-                                            + 'Y: %{customdata[1]}<br>'
-                                            + 'Tilt Angle: %{customdata[2]:.3f}<br>'
-                                            + 'Tilt Direction: %{customdata[3]:.1f}°<br>'
-                                            #  + '<extra></extra>'  # Remove the secondary box
-                                        ),
-                                        name=f'Point ({x},{y})',
-                                    )
-                                )
-
-                                # Layout settings
-                                # fig.update_layout(
-                                #     title='Map of Stereographic Projections on a Wafer',
-                                #     xaxis=dict(title='X Coordinate'),
-                                #     yaxis=dict(title='Y Coordinate'),
-                                #     showlegend=True,
-                                #     #width=800,
-                                #     #height=800
-                                # )
-
-                            fig.update_layout(
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                showlegend=False,
-                                # width=800,
-                                # height=800
-                                xaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    # scaleanchor='y',
-                                    # scaleratio=1,
-                                ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',
-                                    scaleratio=1,
-                                ),
-                            )
-                            return fig
-
-                        def create_stereographic_projection_plot_cartesian(
-                            x_coords,
-                            y_coords,
-                            tilt,
-                            tilt_direction,
-                            component_0_values,
-                            component_90_values,
-                            title,
-                        ):
-                            fig = go.Figure()
-
-                            # Define the circle's center and radius
-                            circle_center_x = 0  # sum(x_coords) / len(
-                            # x_coords
-                            # )  # Center of x_coords
-                            circle_center_y = 0  # sum(y_coords) / len(
-                            # y_coords
-                            # )  # Center of y_coords
-                            circle_radius = (
-                                3
-                                + max(
-                                    max(x_coords) - min(x_coords),
-                                    max(y_coords) - min(y_coords),
-                                )
-                                / 2
-                            )
-
-                            # Add the circle to the plot
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            for x, y, rho, theta, comp0, comp90 in zip(
-                                x_coords,
-                                y_coords,
-                                tilt,
-                                tilt_direction,  # hex_colors
-                                component_0_values,
-                                component_90_values,
-                            ):
-                                fig.add_shape(
-                                    type='rect',
-                                    x0=x - 1.5,
-                                    y0=y - 1.5,
-                                    x1=x + 1.5,
-                                    y1=y + 1.5,
-                                    line=dict(color='grey', width=2),
-                                    fillcolor='white',
-                                    opacity=0,
-                                )
-                                # Add text annotation on top of the colored box
-                                # fig.add_annotation(
-                                #     x=x,
-                                #     y=y,
-                                #     text=text_format,
-                                #     showarrow=False,
-                                #     font=dict(color='black', size=12),
-                                #     xanchor='center',
-                                #     yanchor='middle',
-                                # )
-
-                                # Loop through each coordinate and plot its stereographic projection
-                                # for x, y, rho, theta in zip(x_coords, y_coords, rhos, thetas):
-                                # Convert polar to Cartesian coordinates for the projection
-                                scaling_factor = 15
-
-                                # scaled_rho = rho * scaling_factor
-                                x_projection = x + (comp0 * scaling_factor * (-1))
-                                y_projection = y + (comp90 * scaling_factor)
-                                # fig.add_shape(
-                                #     type='line',
-                                #     x0=x,
-                                #     y0=y,
-                                #     x1=x_projection,
-                                #     y1=y_projection,
-                                #     line=dict(color='RoyalBlue', width=3),
-                                #     xref='x',
-                                #     yref='y',
-                                #     arrowhead=2,
-                                #     arrowsize=1.5,
-                                # )
-
-                                # Add a line from (x, y) to the projected point
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=[x, x_projection],
-                                        y=[y, y_projection],
-                                        mode='lines+markers',
-                                        # marker=dict(size=8),
-                                        marker=dict(
-                                            symbol='arrow',
-                                            size=15,
-                                            angleref='previous',
-                                            color='blue',
-                                        ),
-                                        customdata=[
-                                            [
-                                                x,
-                                                y,
-                                                rho,
-                                                theta,
-                                                x_projection,
-                                                y_projection,
-                                            ]
-                                        ],  # Include custom data for hover
-                                        hovertemplate=(
-                                            'X: %{customdata[0]}<br>'
-                                            + 'Y: %{customdata[1]}<br>'
-                                            + 'Tilt Angle: %{customdata[2]:.3f}<br>'
-                                            + 'Tilt Direction: %{customdata[3]:.1f}°<br>'
-                                            + 'x proj: %{customdata[4]:.1f}°<br>'
-                                            + 'y proj: %{customdata[5]:.1f}°<br>'
-                                            #  + '<extra></extra>'  # Remove the secondary box
-                                        ),
-                                        name=f'Point ({x},{y})',
-                                    )
-                                )
-
-                                # Layout settings
-                                # fig.update_layout(
-                                #     title='Map of Stereographic Projections on a Wafer',
-                                #     xaxis=dict(title='X Coordinate'),
-                                #     yaxis=dict(title='Y Coordinate'),
-                                #     showlegend=True,
-                                #     #width=800,
-                                #     #height=800
-                                # )
-
-                            fig.update_layout(
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                showlegend=False,
-                                # width=800,
-                                # height=800
-                                xaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    # scaleanchor='y',
-                                    # scaleratio=1,
-                                ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',
-                                    scaleratio=1,
-                                ),
-                            )
-                            return fig
-
-                        def create_stereographic_projection_plot_cartesian2(
-                            x_coords,
-                            y_coords,
-                            tilt,
-                            tilt_direction,
-                            component_0_values,
-                            component_90_values,
-                            title,
-                        ):
-                            fig = go.Figure()
-
-                            # Define the circle's center and radius
-                            circle_center_x = 0
-                            circle_center_y = 0
-                            circle_radius = (
-                                3
-                                + max(
-                                    max(x_coords) - min(x_coords),
-                                    max(y_coords) - min(y_coords),
-                                )
-                                / 2
-                            )
-
-                            # Add the circle to the plot
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            # Loop through each coordinate and plot its stereographic projection as an arrow
-                            for x, y, rho, theta, comp0, comp90 in zip(
-                                x_coords,
-                                y_coords,
-                                tilt,
-                                tilt_direction,
-                                component_0_values,
-                                component_90_values,
-                            ):
-                                fig.add_shape(
-                                    type='rect',
-                                    x0=x - 1.5,
-                                    y0=y - 1.5,
-                                    x1=x + 1.5,
-                                    y1=y + 1.5,
-                                    line=dict(color='grey', width=2),
-                                    fillcolor='white',
-                                    opacity=0,
-                                )
-
-                                # Scaling factor for the projection
-                                scaling_factor = 15
-
-                                # Calculate projection points based on comp0 and comp90
-                                x_projection = x + (comp0 * scaling_factor * (-1))
-                                y_projection = y + (comp90 * scaling_factor)
-
-                                # Add a line from (x, y) to the projected point
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=[x, x_projection],
-                                        y=[y, y_projection],
-                                        mode='lines',
-                                        line=dict(color='blue', width=2),
-                                        showlegend=False,
-                                    )
-                                )
-
-                                # Add the origin point with hover info
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=[x],
-                                        y=[y],
-                                        mode='markers',
-                                        marker=dict(
-                                            symbol='circle',
-                                            size=10,
-                                            color='blue',
-                                        ),
-                                        customdata=[
-                                            [x, y, rho, theta]
-                                        ],  # Include custom data for hover at origin
-                                        hovertemplate=(
-                                            'X: %{customdata[0]}<br>'
-                                            'Y: %{customdata[1]}<br>'
-                                            'Tilt Angle: %{customdata[2]:.3f}<br>'
-                                            'Tilt Direction: %{customdata[3]:.1f}°<br>'
-                                            '<extra></extra>'
-                                        ),
-                                        showlegend=False,
-                                    )
-                                )
-
-                                # Add the tip point with the same hover info
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=[x_projection],
-                                        y=[y_projection],
-                                        mode='markers',
-                                        marker=dict(
-                                            symbol='arrow',
-                                            size=15,
-                                            color='blue',
-                                        ),
-                                        customdata=[
-                                            [
-                                                x,
-                                                y,
-                                                rho,
-                                                theta,
-                                                x_projection,
-                                                y_projection,
-                                            ]
-                                        ],  # Hover data
-                                        hovertemplate=(
-                                            'X: %{customdata[0]}<br>'
-                                            'Y: %{customdata[1]}<br>'
-                                            'Tilt Angle: %{customdata[2]:.3f}<br>'
-                                            'Tilt Direction: %{customdata[3]:.1f}°<br>'
-                                            'X Projection: %{customdata[4]:.1f}<br>'
-                                            'Y Projection: %{customdata[5]:.1f}<br>'
-                                            '<extra></extra>'
-                                        ),
-                                        showlegend=False,
-                                    )
-                                )
-
-                            fig.update_layout(
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                showlegend=False,
-                                xaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',
-                                    scaleratio=1,
-                                ),
-                            )
-                            return fig
-
-                        def create_stereographic_projection_quiver_plot(
-                            x_coords,
-                            y_coords,
-                            tilt_values,
-                            tilt_direction_values,
-                            component_0_values,
-                            component_90_values,
-                            title,
-                            wafer_diameter=25,  # Default wafer diameter
-                        ):
-                            # Compute the u and v components
-                            u = [
-                                -comp0 for comp0 in component_0_values
-                            ]  # Inverted x-component
-                            v = [
-                                comp90 for comp90 in component_90_values
-                            ]  # y-component
-
-                            # Create hover text
-                            hovertext = [
-                                f'X: {x}<br>Y: {y}<br>Tilt: {tilt:.3f}<br>Direction: {tilt_dir:.1f}°'
-                                for x, y, tilt, tilt_dir in zip(
-                                    x_coords,
-                                    y_coords,
-                                    tilt_values,
-                                    tilt_direction_values,
-                                )
-                            ]
+                        #     colorscale = pc.get_colorscale('balance')
+                        #     return [
+                        #         pc.find_intermediate_color(
+                        #             colorscale, intermed=norm(value), colortype='rgb'
+                        #         )
+                        #         for value in values
+                        #     ]
+                        # Function to convert RGBA to hex
+                        def rgba_to_hex(rgba):
+                            return f'#{int(rgba[0]*255):02x}{int(rgba[1]*255):02x}{int(rgba[2]*255):02x}'
 
-                            # Define slider steps and frames
-                            steps = []
-                            frames = []
-                            scales = np.linspace(
-                                1, 20, 20
-                            )  # Range of scale values for the slider
+                        # The figures are independent of each other. Those which
+                        # are not cached for the same inputs and version of the plot
+                        # functions are rendered in parallel processes.
+                        map_inputs = {
+                            'x_pos': np.asarray(x_coords),
+                            'y_pos': np.asarray(y_coords),
+                            'wafer_diameter': self.wafer_diameter,
+                            'grid_size': self.grid_size,
+                        }
+                        flagged = [
+                            bool(point['spatial_outlier']) for point in self.results
+                        ]
 
-                            for i, scale in enumerate(scales):
-                                # Create quiver plot for each scale
-                                quiver = ff.create_quiver(
+                        def map_plot(values, title):
+                            return (
+                                'map plot',
+                                MAP_PLOT_VERSION,
+                                {
+                                    **map_inputs,
+                                    'values': np.asarray(values),
+                                    'title': title,
+                                    'flagged': np.asarray(flagged),
+                                },
+                                create_map_plot,
+                                (
                                     x_coords,
                                     y_coords,
-                                    u,
-                                    v,
-                                    scale=scale,
-                                    arrow_scale=0.2,
-                                    name='Tilt Direction',
-                                    hoverinfo='text',
-                                    text=hovertext,
-                                )
-                                # Add frame for the current scale
-                                frames.append(dict(data=quiver.data, name=f'frame{i}'))
-
-                                # Add a step to the slider
-                                step = dict(
-                                    method='animate',
-                                    args=[
-                                        [f'frame{i}'],  # The frame name to animate to
-                                        dict(
-                                            frame=dict(duration=0, redraw=True),
-                                            mode='immediate',
-                                        ),
-                                    ],
-                                    label=f'{scale:.1f}',
-                                )
-                                steps.append(step)
-
-                            # Create the initial quiver plot with the first scale
-                            initial_scale = scales[0]
-                            fig = ff.create_quiver(
-                                x_coords,
-                                y_coords,
-                                u,
-                                v,
-                                scale=initial_scale,
-                                arrow_scale=0.2,
-                                name='Tilt Direction',
-                                hoverinfo='text',
-                                text=hovertext,
-                            )
-
-                            # Add the circle representing the wafer
-                            circle_center_x = 0
-                            circle_center_y = 0
-                            circle_radius = wafer_diameter / 2
-
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            # Add frames and slider to the figure
-                            fig.frames = frames
-                            sliders = [
-                                dict(
-                                    steps=steps,
-                                    active=0,
-                                    currentvalue={'prefix': 'Scale: '},
-                                )
-                            ]
-
-                            # Update the layout to include the slider
-                            fig.update_layout(
-                                sliders=sliders,
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                showlegend=False,
-                                xaxis=dict(
-                                    showgrid=True, zeroline=False, fixedrange=False
+                                    values,
+                                    title,
+                                    self.wafer_diameter,
+                                    self.grid_size,
+                                    flagged,
                                 ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',
-                                    scaleratio=1,
-                                    fixedrange=False,
-                                ),
-                                hovermode='closest',
-                                dragmode='zoom',
                             )
 
-                            return fig
-
-                        def create_stereographic_projection_quiver_plot_alt(
+                        quiver_inputs = {
+                            **map_inputs,
+                            'tilt': np.asarray(tilt_values),
+                            'tilt_direction': np.asarray(tilt_direction_values),
+                            'component_0': np.asarray(component_0_values),
+                            'component_90': np.asarray(component_90_values),
+                        }
+                        quiver_args = (
                             x_coords,
                             y_coords,
                             tilt_values,
                             tilt_direction_values,
                             component_0_values,
                             component_90_values,
-                            title,
-                            wafer_diameter,
-                            # scaling_factor=1,
-                        ):
-                            # Use quiver to plot arrows from the positions defined by x_coords and y_coords
-                            # u (x-component) is component_0_values, v (y-component) is component_90_values
-                            u = [
-                                -comp0 for comp0 in component_0_values
-                            ]  # Inverted x-component
-                            v = [
-                                comp90 for comp90 in component_90_values
-                            ]  # y-component
-
-                            hovertext = [
-                                f'X: {x}<br>Y: {y}<br>Tilt: {tilt:.3f}<br>Direction: {tilt_dir:.1f}°'
-                                for x, y, tilt, tilt_dir in zip(
+                            'Stereographic Projection',
+                            self.wafer_diameter,
+                        )
+                        # Creating plots for each parameter
+                        figure_specs = [
+                            map_plot(tilt_values, 'Tilt'),
+                            map_plot(tilt_direction_values, 'Tilt Direction'),
+                            map_plot(component_0_values, 'Component 0'),
+                            map_plot(component_90_values, 'Component 90'),
+                            map_plot(reference_offset_values, 'Reference Offset'),
+                            (
+                                'quiver plot',
+                                QUIVER_PLOT_VERSION,
+                                quiver_inputs,
+                                create_stereographic_projection_quiver_plot,
+                                quiver_args,
+                            ),
+                            (
+                                'quiver plot alt',
+                                QUIVER_PLOT_VERSION,
+                                quiver_inputs,
+                                create_stereographic_projection_quiver_plot_alt,
+                                quiver_args,
+                            ),
+                            (
+                                'stereographic projection plot',
+                                STEREOGRAPHIC_PLOT_VERSION,
+                                quiver_inputs,
+                                create_stereographic_projection_plot,
+                                (
                                     x_coords,
                                     y_coords,
                                     tilt_values,
                                     tilt_direction_values,
-                                )
-                            ]
-
-                            # Create quiver plot
-                            waferdiameter = wafer_diameter
-                            if waferdiameter <= 10:
-                                scaling = 2
-                            elif waferdiameter <= 25:
-                                scaling = 15
-                            else:
-                                scaling = 20  # adjust when tested with larger wafers
-                            fig = ff.create_quiver(
-                                x_coords,
-                                y_coords,
-                                u,
-                                v,
-                                scale=scaling,
-                                arrow_scale=0.2,
-                                name='Tilt Direction',
-                                hoverinfo='text',
-                                text=hovertext,  # Add hover text for each arrow
-                            )
-                            # Define the circle's center and radius
-                            circle_center_x = 0
-                            circle_center_y = 0
-                            circle_radius = self.wafer_diameter / 2
-
-                            # Add the circle to the plot
-                            fig.add_shape(
-                                type='circle',
-                                xref='x',
-                                yref='y',
-                                x0=circle_center_x - circle_radius,
-                                y0=circle_center_y - circle_radius,
-                                x1=circle_center_x + circle_radius,
-                                y1=circle_center_y + circle_radius,
-                                line=dict(color='darkgrey', width=2),
-                                fillcolor='grey',
-                                opacity=0.3,
-                            )
-
-                            # Add layout settings
-                            fig.update_layout(
-                                #template='plotly_white',
-                                title=title,
-                                xaxis_title='X Position',
-                                yaxis_title='Y Position',
-                                plot_bgcolor='white',
-                                showlegend=False,
-                                xaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    fixedrange=False,
+                                    'Stereographic Projection',
                                 ),
-                                yaxis=dict(
-                                    showgrid=True,
-                                    zeroline=False,
-                                    scaleanchor='x',  # Make sure x and y are on the same scale
-                                    scaleratio=1,
-                                    fixedrange=False,
+                            ),
+                            (
+                                'stereographic projection plot cartesian',
+                                STEREOGRAPHIC_PLOT_VERSION,
+                                quiver_inputs,
+                                create_stereographic_projection_plot_cartesian,
+                                (
+                                    x_coords,
+                                    y_coords,
+                                    tilt_values,
+                                    tilt_direction_values,
+                                    component_0_values,
+                                    component_90_values,
+                                    'cartesian',
                                 ),
-                                hovermode='closest',
-                                dragmode='zoom',
-                            )
-
-                            return fig
-
-                        # Creating plots for each parameter
-                        fig_tilt = create_plot(x_coords, y_coords, tilt_values, 'Tilt')
-                        fig_tilt_direction = create_plot(
-                            x_coords, y_coords, tilt_direction_values, 'Tilt Direction'
-                        )
-                        fig_component_0 = create_plot(
-                            x_coords, y_coords, component_0_values, 'Component 0'
-                        )
-                        fig_component_90 = create_plot(
-                            x_coords, y_coords, component_90_values, 'Component 90'
-                        )
-                        fig_reference_offset = create_plot(
-                            x_coords,
-                            y_coords,
-                            reference_offset_values,
-                            'Reference Offset',
-                        )
-                        # fig_ster_proj_cart = (
-                        #     create_stereographic_projection_plot_cartesian(
-                        #         x_coords,
-                        #         y_coords,
-                        #         tilt_values,
-                        #         tilt_direction_values,
-                        #         component_0_values,
-                        #         component_90_values,
-                        #         'cartesian',
-                        #     )
-                        # )
-                        # fig_stereo = create_stereographic_projection_plot(
-                        #     x_coords,
-                        #     y_coords,
-                        #     tilt_values,
-                        #     tilt_direction_values,
-                        #     'Stereographic Projection',
-                        # )
-                        fig_quiver = create_stereographic_projection_quiver_plot(
-                            x_coords,
-                            y_coords,
-                            tilt_values,
-                            tilt_direction_values,
-                            component_0_values,
-                            component_90_values,
-                            'Stereographic Projection',
-                            wafer_diameter=self.wafer_diameter,
-                        )
-                        fig_quiver_alt = (
-                            create_stereographic_projection_quiver_plot_alt(
-                                x_coords,
-                                y_coords,
-                                tilt_values,
-                                tilt_direction_values,
-                                component_0_values,
-                                component_90_values,
-                                'Stereographic Projection',
-                                wafer_diameter=self.wafer_diameter,
-                            )
-                        )
+                            ),
+                        ]
+                        # maps of the fit results and curve quality metrics,
+                        # if all points have been fitted
+                        fit_maps = []
+                        for name, title in FIT_MAP_TITLES.items():
+                            fit_values = [point[name] for point in self.results]
+                            if any(value is None for value in fit_values):
+                                continue
+                            fit_values = [
+                                float(getattr(value, 'magnitude', value))
+                                for value in fit_values
+                            ]
+                            if not np.all(np.isfinite(fit_values)):
+                                continue
+                            fit_maps.append((title, map_plot(fit_values, title)))
+                        (
+                            fig_tilt,
+                            fig_tilt_direction,
+                            fig_component_0,
+                            fig_component_90,
+                            fig_reference_offset,
+                            fig_quiver,
+                            fig_quiver_alt,
+                            fig_stereo,
+                            fig_ster_proj_cart,
+                        ) = figure_cache.get_or_render(figure_specs)
+                        # a map which can not be plotted must not cost the others
+                        fig_fit_maps = []
+                        for title, figure_spec in fit_maps:
+                            try:
+                                (figure,) = figure_cache.get_or_render([figure_spec])
+                            except Exception as e:
+                                logger.warn(
+                                    f'Could not create the {title} map.', exc_info=e
+                                )
+                                continue
+                            fig_fit_maps.append((title, figure))
+                        timer.lap('create map plots', points=len(self.results))
                         # Displaying the plots
                         # fig_tilt.show()
                         # fig_tilt_direction.show()
@@ -1881,68 +3489,109 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
                         self.figures.append(
                             PlotlyFigure(
                                 label='tilt',  # index=1,
-                                figure=fig_tilt.to_plotly_json(),
+                                figure=fig_tilt,
                             )
                         )
                         self.figures.append(
                             PlotlyFigure(
                                 label='tilt direction',
                                 # index=2,
-                                figure=fig_tilt_direction.to_plotly_json(),
+                                figure=fig_tilt_direction,
                             )
                         )
                         self.figures.append(
                             PlotlyFigure(
                                 label='component 0',
                                 # index=3,
-                                figure=fig_component_0.to_plotly_json(),
+                                figure=fig_component_0,
                             )
                         )
                         self.figures.append(
                             PlotlyFigure(
                                 label='component 90',
                                 # index=4,
-                                figure=fig_component_90.to_plotly_json(),
+                                figure=fig_component_90,
                             )
                         )
                         self.figures.append(
                             PlotlyFigure(
                                 label='reference offset',
                                 # index=5,
-                                figure=fig_reference_offset.to_plotly_json(),
+                                figure=fig_reference_offset,
+                            )
+                        )
+                        for title, figure in fig_fit_maps:
+                            self.figures.append(
+                                PlotlyFigure(
+                                    label=title,
+                                    figure=figure,
+                                )
+                            )
+                        self.figures.append(
+                            PlotlyFigure(
+                                label='stereographic projection',
+                                # index=6,
+                                figure=fig_stereo,
+                            )
+                        )
+                        self.figures.append(
+                            PlotlyFigure(
+                                label='cartesian',
+                                # index=7,
+                                figure=fig_ster_proj_cart,
                             )
                         )
-                        # self.figures.append(
-                        #     PlotlyFigure(
-                        #         label='stereographic projection',
-                        #         # index=6,
-                        #         figure=fig_stereo.to_plotly_json(),
-                        #     )
-                        # )
-                        # self.figures.append(
-                        #     PlotlyFigure(
-                        #         label='cartesian',
-                        #         # index=7,
-                        #         figure=fig_ster_proj_cart.to_plotly_json(),
-                        #     )
-                        # )
                         self.figures.append(
                             PlotlyFigure(
                                 label='Stereographic Projection',
                                 # index=8,
-                                figure=fig_quiver.to_plotly_json(),
+                                figure=fig_quiver,
                             )
                         )
                         self.figures.append(
                             PlotlyFigure(
                                 label='Stereographic Projection alt',
                                 # index=8,
-                                figure=fig_quiver_alt.to_plotly_json(),
+                                figure=fig_quiver_alt,
                             )
                         )
+                        if timer.enabled:
+                            timer.lap(
+                                'serialize figures',
+                                figure_bytes=count_figure_bytes(self.figures),
+                            )
+                        n_figures = len(self.figures)
                         self.figures.append(self.generate_tilt_x_y_cut_plot())
                         self.map_statistics = self.generate_map_statistics()
-
+                        try:
+                            self.get_map_grid()
+                        except ValueError as e:
+                            logger.warn(f'No grid map of the points: {e}')
+                        else:
+                            self.grid_map = self.generate_grid_map()
+                            self.curvature_map = self.generate_curvature_map()
+                            self.figures.append(self.generate_curvature_map_plot())
+                        self.interpolated_map = self.generate_interpolated_map()
+                        self.figures.append(self.generate_interpolated_map_plot())
+                        self.line_profiles = self.generate_line_profiles()
+                        self.radial_profile = self.generate_radial_profile()
+                        self.figures.extend(self.generate_profile_plots())
+                        if timer.enabled:
+                            timer.lap(
+                                'derived maps',
+                                points=len(self.results),
+                                figure_bytes=count_figure_bytes(
+                                    self.figures[n_figures:]
+                                ),
+                            )
+            if polar_plots:
+                selected = [
+                    result for result in self.results if result.name in polar_plots
+                ]
+                for result in selected:
+                    result.show_polar_plot = True
+                generate_stereographic_plots(selected)
+                timer.lap('create polar plots', points=len(selected))
 
         if not self.results:
             return
@@ -1960,6 +3609,473 @@ class OmegaThetaXRD(Measurement, PlotSection, EntryData, ArchiveSection):
         #     PlotlyFigure(label='figure 1', index=1, figure=figure1.to_plotly_json())
         # )
         super().normalize(archive, logger)
+        timer.lap('normalize base sections')
+        if timer.mode == 'archive':
+            self.processing_diagnostics = self.generate_processing_diagnostics(timer)
+
+
+class ComparedMap(ArchiveSection):
+    m_def = Section(label='Compared Map')
+
+    name = Quantity(
+        type=str,
+        description='Name of the compared map',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    reference = Quantity(
+        type=OmegaThetaXRD,
+        description='The map entry. The first map is the reference for all others.',
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    automatic_registration = Quantity(
+        type=bool,
+        default=True,
+        description="""
+        Determine flip, rotation and shift from the data. If disabled, the values
+        below are used as given.
+        """,
+        a_eln={'component': 'BoolEditQuantity'},
+    )
+    flipped = Quantity(
+        type=bool,
+        description='The wafer is turned over with respect to the reference.',
+        a_eln={'component': 'BoolEditQuantity'},
+    )
+    rotation = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Counterclockwise rotation onto the reference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    shift_x = Quantity(
+        type=np.float64,
+        description='Shift in x onto the reference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    shift_y = Quantity(
+        type=np.float64,
+        description='Shift in y onto the reference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    registration_rms = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Root mean square tilt difference after the registration.',
+    )
+
+
+class DifferenceMap(ArchiveSection):
+    m_def = Section(label='Difference Map')
+
+    name = Quantity(
+        type=str,
+        description='Name of the difference map',
+    )
+    x_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='X positions of the raster columns.',
+    )
+    y_axis = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Y positions of the raster rows.',
+    )
+    tilt = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        unit='\u00b0',
+        description='Tilt difference to the reference, NaN outside of the overlap.',
+    )
+    component_0 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Component 0 difference to the reference.',
+    )
+    component_90 = Quantity(
+        type=np.float64,
+        shape=['*', '*'],
+        description='Component 90 difference to the reference.',
+    )
+    tilt_mean = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Mean tilt difference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    tilt_rms = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Root mean square tilt difference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    tilt_max_abs = Quantity(
+        type=np.float64,
+        unit='\u00b0',
+        description='Maximum absolute tilt difference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    component_0_rms = Quantity(
+        type=np.float64,
+        description='Root mean square component 0 difference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    component_90_rms = Quantity(
+        type=np.float64,
+        description='Root mean square component 90 difference.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+
+
+class OmegaThetaXRDComparison(PlotSection, EntryData, ArchiveSection):
+    """
+    Compares maps of the same wafer, e.g. before and after lapping, polishing or
+    annealing. All maps are registered onto the first one and resampled onto a
+    common raster, the differences to the first map are stored.
+    """
+
+    m_def = Section()
+    name = Quantity(
+        type=str,
+        description='Name of the comparison',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    resolution = Quantity(
+        type=np.float64,
+        description='Spacing of the common raster. Defaults to the grid size.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    maps = SubSection(
+        section_def=ComparedMap,
+        repeats=True,
+    )
+    difference_maps = SubSection(
+        section_def=DifferenceMap,
+        repeats=True,
+    )
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        """
+        The normalizer for the `OmegaThetaXRDComparison` class.
+
+        Args:
+            archive (EntryArchive): The archive containing the section that is being
+            normalized.
+            logger (BoundLogger): A structlog logger.
+        """
+        super().normalize(archive, logger)
+        maps = [compared_map for compared_map in self.maps if compared_map.reference]
+        if len(maps) <= 1:
+            return
+        if any(
+            compared_map.reference.measurement_type != 'mapping'
+            for compared_map in maps
+        ):
+            logger.warn('Only mapping measurements can be compared.')
+            return
+        reference = maps[0].reference
+        if self.resolution is None:
+            self.resolution = reference.grid_size
+        reference_data = reference.extract_map_data()
+        wafer_diameter = reference.wafer_diameter
+        x_axis, y_axis, reference_raster = interpolate_map(
+            (reference_data['x_pos'], reference_data['y_pos']),
+            np.column_stack(
+                [
+                    reference_data['tilt'],
+                    reference_data['component_0'],
+                    reference_data['component_90'],
+                ]
+            ),
+            wafer_diameter,
+            resolution=self.resolution,
+        )
+        reference_side = get_sample_side(reference)
+
+        self.difference_maps = []
+        self.figures = []
+        for compared_map in maps[1:]:
+            map_data = compared_map.reference.extract_map_data()
+            if compared_map.automatic_registration:
+                side = get_sample_side(compared_map.reference)
+                if reference_side is None or side is None:
+                    flips = (False, True)
+                else:
+                    flips = (reference_side != side,)
+                registration = register_map(reference_data, map_data, flips=flips)
+                compared_map.flipped = registration['flip']
+                compared_map.rotation = registration['rotation']
+                compared_map.shift_x, compared_map.shift_y = registration['shift']
+                compared_map.registration_rms = registration['score']
+            (x, y), (component_0, component_90) = transform_map(
+                (map_data['x_pos'], map_data['y_pos']),
+                (map_data['component_0'], map_data['component_90']),
+                rotation=(
+                    compared_map.rotation.magnitude if compared_map.rotation else 0
+                ),
+                flip=bool(compared_map.flipped),
+                shift=(compared_map.shift_x or 0, compared_map.shift_y or 0),
+            )
+            _, _, raster = interpolate_map(
+                (x, y),
+                np.column_stack([map_data['tilt'], component_0, component_90]),
+                wafer_diameter,
+                resolution=self.resolution,
+            )
+            difference = raster - reference_raster
+            tilt_statistics = difference_statistics(difference[0])
+            difference_map = DifferenceMap(
+                name=f'{compared_map.reference.name} - {reference.name}',
+                x_axis=x_axis,
+                y_axis=y_axis,
+                tilt=difference[0],
+                component_0=difference[1],
+                component_90=difference[2],
+                tilt_mean=tilt_statistics['mean'],
+                tilt_rms=tilt_statistics['rms'],
+                tilt_max_abs=tilt_statistics['max_abs'],
+                component_0_rms=difference_statistics(difference[1])['rms'],
+                component_90_rms=difference_statistics(difference[2])['rms'],
+            )
+            self.difference_maps.append(difference_map)
+            fig = create_raster_plot(
+                x_axis,
+                y_axis,
+                [
+                    ('Tilt', difference[0]),
+                    ('Component 0', difference[1]),
+                    ('Component 90', difference[2]),
+                ],
+                difference_map.name,
+                wafer_diameter,
+            )
+            self.figures.append(
+                PlotlyFigure(label=difference_map.name, figure=fig.to_plotly_json())
+            )
+
+
+class AggregatedMap(ArchiveSection):
+    m_def = Section(label='Aggregated Map')
+    name = Quantity(
+        type=str,
+        description='Name of the aggregated map',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    reference = Quantity(
+        type=OmegaThetaXRD,
+        description='The map entry.',
+        a_eln={'component': 'ReferenceEditQuantity'},
+    )
+    n_points = Quantity(
+        type=int,
+        description='Number of points of the map in the pole figure.',
+    )
+    entry_id = Quantity(
+        type=str,
+        description='Id of the map entry whose points are in the pole figure.',
+    )
+    processing_time = Quantity(
+        type=Datetime,
+        description=(
+            'Last processing of the map entry whose points are in the pole figure.'
+        ),
+    )
+
+
+class OmegaThetaXRDPoleFigure(PlotSection, EntryData, ArchiveSection):
+    """
+    Density of the tilt vectors (component 0, component 90) of all points of many
+    maps, e.g. of a boule or a production lot. Maps added to the list are binned
+    into the existing counts. All maps are binned again if the binning changes or
+    if maps were removed or changed.
+    """
+
+    m_def = Section()
+    name = Quantity(
+        type=str,
+        description='Name of the pole figure',
+        a_eln={'component': 'StringEditQuantity'},
+    )
+    extent = Quantity(
+        type=np.float64,
+        default=0.2,
+        description='Largest absolute tilt component covered by the bins.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    bin_width = Quantity(
+        type=np.float64,
+        default=0.005,
+        description='Width of the bins of the tilt components.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    n_points = Quantity(
+        type=int,
+        description='Number of points of all aggregated maps.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    n_outside = Quantity(
+        type=int,
+        description='Number of points with a tilt component outside of the extent.',
+        a_eln={'component': 'NumberEditQuantity'},
+    )
+    component_0_edges = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Bin edges of component 0.',
+    )
+    component_90_edges = Quantity(
+        type=np.float64,
+        shape=['*'],
+        description='Bin edges of component 90.',
+    )
+    counts = Quantity(
+        type=np.int64,
+        shape=['*', '*'],
+        description='Number of points per bin, indexed [component 90, component 0].',
+    )
+    maps = SubSection(
+        section_def=AggregatedMap,
+        repeats=True,
+    )
+
+    def get_histogram(self, maps):
+        """
+        Returns the histogram of the maps which are already aggregated and still
+        unchanged, or an empty one if the counts can not be reused.
+        """
+        histogram = TiltHistogram(self.extent, self.bin_width)
+        aggregated = [
+            aggregated_map for aggregated_map in maps if aggregated_map.n_points
+        ]
+        reusable = (
+            self.counts is not None
+            and self.component_0_edges is not None
+            and np.array_equal(self.component_0_edges, histogram.edges)
+            and sum(aggregated_map.n_points for aggregated_map in aggregated)
+            == self.n_points
+        )
+        if reusable:
+            return TiltHistogram(
+                self.extent, self.bin_width, self.counts, self.n_outside or 0
+            )
+        for aggregated_map in maps:
+            aggregated_map.n_points = None
+            aggregated_map.entry_id = None
+            aggregated_map.processing_time = None
+        return histogram
+
+    def get_map_identities(self, archive, maps, logger):
+        """
+        Returns the entry id and the last processing time of the given maps. The
+        times are looked up with one search, only the maps which are not found are
+        resolved.
+        """
+        entry_ids = [get_entry_id(aggregated_map.reference) for aggregated_map in maps]
+        metadata = archive.metadata
+        user_id = (
+            metadata.main_author.user_id
+            if metadata is not None and metadata.main_author
+            else None
+        )
+        processing_times = {}
+        if any(entry_ids):
+            try:
+                processing_times = search_processing_times(
+                    [entry_id for entry_id in entry_ids if entry_id], user_id
+                )
+            except Exception as e:
+                logger.warn('Could not search for the maps.', exc_info=e)
+        identities = {}
+        for aggregated_map, entry_id in zip(maps, entry_ids):
+            identity = (entry_id, processing_times.get(entry_id))
+            if identity[1] is None:
+                root = aggregated_map.reference.m_root()
+                map_metadata = getattr(root, 'metadata', None)
+                if map_metadata is not None:
+                    identity = (
+                        map_metadata.entry_id,
+                        map_metadata.last_processing_time,
+                    )
+            identities[id(aggregated_map)] = identity
+        return identities
+
+    def generate_density_plot(self, histogram):
+        centers = histogram.centers
+        fig = go.Figure(
+            go.Heatmap(
+                x=centers,
+                y=centers,
+                z=np.where(histogram.counts > 0, histogram.density(), None).tolist(),
+                colorscale='Viridis',
+                colorbar=dict(title='Density'),
+                hovertemplate=(
+                    'Component 0: %{x:.3f}<br>'
+                    'Component 90: %{y:.3f}<br>'
+                    'Density: %{z:.3g}<extra></extra>'
+                ),
+            )
+        )
+        fig.update_layout(
+            title=f'Tilt Vector Density ({histogram.n_points} points)',
+            xaxis_title='Component 0',
+            yaxis_title='Component 90',
+            template='plotly_white',
+            yaxis=dict(scaleanchor='x', scaleratio=1),
+            hovermode='closest',
+            dragmode='zoom',
+        )
+        return PlotlyFigure(label='Tilt Vector Density', figure=fig.to_plotly_json())
+
+    def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
+        """
+        The normalizer for the `OmegaThetaXRDPoleFigure` class.
+
+        Args:
+            archive (EntryArchive): The archive containing the section that is being
+            normalized.
+            logger (BoundLogger): A structlog logger.
+        """
+        super().normalize(archive, logger)
+        maps = [
+            aggregated_map for aggregated_map in self.maps if aggregated_map.reference
+        ]
+        # the maps are identified by their entry and its processing, so that the
+        # aggregated maps do not have to be loaded
+        identities = self.get_map_identities(archive, maps, logger)
+        for aggregated_map in maps:
+            identity = identities[id(aggregated_map)]
+            stored = (aggregated_map.entry_id, aggregated_map.processing_time)
+            if identity[0] is None or stored != identity:
+                # changed maps can not be taken out of the counts
+                aggregated_map.n_points = None
+        histogram = self.get_histogram(maps)
+        for aggregated_map in maps:
+            if aggregated_map.n_points:
+                continue
+            data = aggregated_map.reference.extract_map_data()
+            histogram.add(data['component_0'], data['component_90'])
+            aggregated_map.n_points = len(data['component_0'])
+            aggregated_map.entry_id, aggregated_map.processing_time = identities[
+                id(aggregated_map)
+            ]
+            if aggregated_map.name is None:
+                aggregated_map.name = aggregated_map.reference.name
+
+        self.component_0_edges = histogram.edges
+        self.component_90_edges = histogram.edges
+        self.counts = histogram.counts
+        self.n_points = histogram.n_points
+        self.n_outside = histogram.outside
+        self.figures = [self.generate_density_plot(histogram)]
+
+
+def get_sample_side(measurement):
+    """
+    Returns the side of the sample facing down or None if it is not known.
+    """
+    if measurement.sample_specifications is None:
+        return None
+    return measurement.sample_specifications.sample_side_facing_down
 
 
 m_package.__init_metainfo__()
@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def parallel_map(function, items, max_workers=None):
+    """
+    Applies `function` to all items in a process pool and returns the results in the
+    order of the items.
+
+    Falls back to a serial loop for a single item, if `max_workers` is 1 or if no
+    pool can be started, e.g. in daemonic worker processes which are not allowed to
+    have children. `function` and the items have to be picklable.
+    """
+    items = list(items)
+    max_workers = max_workers or os.cpu_count() or 1
+    if (
+        len(items) > 1
+        and max_workers > 1
+        and not multiprocessing.current_process().daemon
+    ):
+        max_workers = min(max_workers, len(items))
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(
+                    executor.map(
+                        function,
+                        items,
+                        chunksize=max(1, len(items) // (4 * max_workers)),
+                    )
+                )
+        except (
+            AssertionError,
+            BrokenProcessPool,
+            NotImplementedError,
+            OSError,
+            pickle.PicklingError,
+        ):
+            pass
+    return [function(item) for item in items]
@@ -0,0 +1,260 @@
+import numpy as np
+
+PEAK_PROFILES = ['gaussian', 'lorentzian', 'pseudo_voigt']
+
+# Area of a peak with unit amplitude and unit FWHM
+GAUSSIAN_AREA = np.sqrt(np.pi / (4 * np.log(2)))
+LORENTZIAN_AREA = np.pi / 2
+# The fit of a curve stops when its cost changes by less than TOLERANCE relative to
+# the cost or when the damping exceeds MAX_DAMPING
+TOLERANCE = 1e-10
+MAX_DAMPING = 1e10
+
+
+def stack_curves(curves):
+    """
+    Stack curves of different lengths into two (n_curves, n_samples) arrays.
+    Missing samples of shorter curves are NaN.
+
+    Args:
+        curves: Iterable of (omega, intensity) pairs.
+    """
+    curves = [
+        (np.asarray(omega, dtype=float), np.asarray(intensity, dtype=float))
+        for omega, intensity in curves
+    ]
+    n_samples = max((len(omega) for omega, _ in curves), default=0)
+    omega = np.full((len(curves), n_samples), np.nan)
+    intensity = np.full((len(curves), n_samples), np.nan)
+    for index, (curve_omega, curve_intensity) in enumerate(curves):
+        omega[index, : len(curve_omega)] = curve_omega
+        intensity[index, : len(curve_intensity)] = curve_intensity
+    return omega, intensity
+
+
+def peak_profile(x, center, fwhm, eta):
+    """
+    Pseudo-Voigt profile with unit amplitude. `eta` = 0 is a Gaussian, `eta` = 1 a
+    Lorentzian. All arguments broadcast against each other.
+    """
+    z = (x - center) / fwhm
+    gaussian = np.exp(-4 * np.log(2) * z**2)
+    lorentzian = 1 / (1 + 4 * z**2)
+    return eta * lorentzian + (1 - eta) * gaussian
+
+
+def initial_guesses(omega, intensity):
+    """
+    Estimate amplitude, center, FWHM and background of all curves at once.
+    """
+    valid = ~np.isnan(intensity)
+    background = np.nanpercentile(intensity, 10, axis=1)
+    peak_index = np.nanargmax(np.where(valid, intensity, -np.inf), axis=1)
+    rows = np.arange(len(omega))
+    center = omega[rows, peak_index]
+    amplitude = intensity[rows, peak_index] - background
+    # width of the region above half maximum, approximated by the number of
+    # samples above half maximum times the mean step width
+    above = intensity - background[:, np.newaxis] > amplitude[:, np.newaxis] / 2
+    step = np.nanmean(np.abs(np.diff(omega, axis=1)), axis=1)
+    fwhm = np.maximum(np.sum(above & valid, axis=1), 1) * step
+    return amplitude, center, fwhm, background
+
+
+def levenberg_marquardt(residuals, params, max_iterations=100, clip_eta=False):
+    """
+    Batched Levenberg-Marquardt least-squares solver. The rows of `params` are
+    optimized independently of each other and in place.
+
+    Args:
+        residuals: Function of the parameters of a subset of the curves, shape
+            (k, n_params), and the indices of the curves, shape (k,), which returns
+            their residuals of shape (k, n_samples).
+        params: Initial parameters of shape (n_curves, n_params).
+        max_iterations: Maximum number of iterations.
+        clip_eta: Keep the fifth parameter, the Lorentzian fraction, in [0, 1].
+
+    Returns:
+        The sum of squared residuals and whether the fit converged, both of shape
+        (n_curves,).
+    """
+    n_curves, n_params = params.shape
+    damping = np.full(n_curves, 1e-3)
+    current = residuals(params, np.arange(n_curves))
+    current_cost = np.sum(current**2, axis=1)
+    converged = np.zeros(n_curves, dtype=bool)
+    step = 1e-6
+    for _ in range(max_iterations):
+        # Only curves which are not converged yet take part in the iteration
+        rows = np.flatnonzero(~converged)
+        if len(rows) == 0:
+            break
+        p = params[rows]
+        r = current[rows]
+        # Forward difference Jacobian for all curves and parameters at once
+        jacobian = np.empty((*r.shape, n_params))
+        for k in range(n_params):
+            shifted = p.copy()
+            shifted[:, k] += step
+            jacobian[:, :, k] = (r - residuals(shifted, rows)) / step
+        jtj = np.einsum('bsi,bsj->bij', jacobian, jacobian)
+        jtr = np.einsum('bsi,bs->bi', jacobian, r)
+        diagonal = np.einsum('bii->bi', jtj)
+        lhs = jtj + damping[rows, None, None] * (
+            (diagonal + 1e-12)[:, :, np.newaxis] * np.eye(n_params)
+        )
+        trial = p + np.linalg.solve(lhs, jtr[..., np.newaxis])[..., 0]
+        if clip_eta:
+            trial[:, 4] = np.clip(trial[:, 4], 0, 1)
+        trial_residuals = residuals(trial, rows)
+        trial_cost = np.sum(trial_residuals**2, axis=1)
+        improved = trial_cost < current_cost[rows]
+        relative_change = np.abs(current_cost[rows] - trial_cost) / np.maximum(
+            current_cost[rows], 1e-30
+        )
+
+        accepted = rows[improved]
+        params[accepted] = trial[improved]
+        current[accepted] = trial_residuals[improved]
+        current_cost[accepted] = trial_cost[improved]
+        damping[rows] = np.where(improved, damping[rows] / 3, damping[rows] * 4)
+        converged[accepted[relative_change[improved] < TOLERANCE]] = True
+        converged[rows[damping[rows] > MAX_DAMPING]] = True
+    return current_cost, converged
+
+
+def fit_peaks(omega, intensity, profile='pseudo_voigt', max_iterations=100):
+    """
+    Fit a peak profile with constant background to many curves at once with a
+    batched Levenberg-Marquardt least-squares solver.
+
+    Args:
+        omega, intensity: Arrays of shape (n_curves, n_samples), padded with NaN.
+        profile: One of `PEAK_PROFILES`.
+        max_iterations: Maximum number of Levenberg-Marquardt iterations.
+
+    Returns:
+        A dict with arrays of shape (n_curves,) for `amplitude`, `peak_position`,
+        `fwhm`, `background`, `eta`, `integrated_intensity`, `residual` (rms of the
+        fit residuals) and `converged`.
+    """
+    if profile not in PEAK_PROFILES:
+        raise ValueError(f'Unknown peak profile "{profile}".')
+    omega = np.asarray(omega, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+    valid = ~(np.isnan(omega) | np.isnan(intensity))
+
+    amplitude, center, fwhm, background = initial_guesses(omega, intensity)
+    # Fit in coordinates normalized to the initial guesses for good conditioning
+    x_scale = np.where(fwhm > 0, fwhm, 1.0)[:, np.newaxis]
+    y_scale = np.where(amplitude > 0, amplitude, 1.0)[:, np.newaxis]
+    x = np.where(valid, (omega - center[:, np.newaxis]) / x_scale, 0)
+    y = np.where(valid, (intensity - background[:, np.newaxis]) / y_scale, 0)
+
+    eta_fixed = {'gaussian': 0.0, 'lorentzian': 1.0}.get(profile)
+    n_curves = len(omega)
+    params = np.zeros((n_curves, 4 if eta_fixed is not None else 5))
+    params[:, 0] = 1  # amplitude
+    params[:, 2] = 1  # fwhm
+    if eta_fixed is None:
+        params[:, 4] = 0.5
+
+    def residuals(p, rows):
+        eta = eta_fixed if eta_fixed is not None else p[:, 4:5]
+        model = (
+            p[:, 0:1] * peak_profile(x[rows], p[:, 1:2], np.abs(p[:, 2:3]), eta)
+            + p[:, 3:4]
+        )
+        return np.where(valid[rows], y[rows] - model, 0)
+
+    current_cost, converged = levenberg_marquardt(
+        residuals, params, max_iterations, clip_eta=eta_fixed is None
+    )
+    eta = np.full(n_curves, eta_fixed) if eta_fixed is not None else params[:, 4]
+    fit_amplitude = params[:, 0] * y_scale[:, 0]
+    fit_fwhm = np.abs(params[:, 2]) * x_scale[:, 0]
+    area = eta * LORENTZIAN_AREA + (1 - eta) * GAUSSIAN_AREA
+    n_valid = np.maximum(np.sum(valid, axis=1), 1)
+    return {
+        'amplitude': fit_amplitude,
+        'peak_position': center + params[:, 1] * x_scale[:, 0],
+        'fwhm': fit_fwhm,
+        'background': background + params[:, 3] * y_scale[:, 0],
+        'eta': eta,
+        'integrated_intensity': fit_amplitude * fit_fwhm * area,
+        'residual': np.sqrt(current_cost / n_valid) * y_scale[:, 0],
+        'converged': converged,
+    }
+
+
+def curve_quality(omega, intensity, fit, window=2.0):
+    """
+    Quality metrics of many fitted curves at once.
+
+    Args:
+        omega, intensity: Arrays of shape (n_curves, n_samples), padded with NaN.
+        fit: The result of `fit_peaks` for the curves.
+        window: Half width of the region around the peak in units of the FWHM used
+            for the asymmetry.
+
+    Returns:
+        A dict with arrays of shape (n_curves,) for `noise` (robust standard
+        deviation of the fit residuals), `snr` (peak intensity above background
+        over noise, NaN without noise), `asymmetry` (difference of the intensity
+        above background on the right and left side of the peak over their sum,
+        positive for a tail to larger omega) and `secondary_peak` (largest
+        smoothed excess of the curve over the fitted profile relative to the peak
+        intensity, e.g. from a second grain).
+    """
+    omega = np.asarray(omega, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+    valid = ~(np.isnan(omega) | np.isnan(intensity))
+    amplitude = fit['amplitude']
+    background = fit['background'][:, np.newaxis]
+    model = (
+        amplitude[:, np.newaxis]
+        * peak_profile(
+            omega,
+            fit['peak_position'][:, np.newaxis],
+            fit['fwhm'][:, np.newaxis],
+            fit['eta'][:, np.newaxis],
+        )
+        + background
+    )
+    residual = np.where(valid, intensity - model, np.nan)
+    deviation = np.abs(residual - np.nanmedian(residual, axis=1, keepdims=True))
+    noise = 1.4826 * np.nanmedian(deviation, axis=1)
+
+    # intensity above background integrated with the trapezoidal rule on both sides
+    # of the peak within the window. Segments crossing the peak or the window
+    # limits are split by the fraction of their length on each side.
+    excess = np.where(valid, intensity - background, np.nan)
+    step = np.abs(np.diff(omega))
+    area = np.nan_to_num((excess[:, 1:] + excess[:, :-1]) / 2 * step)
+    start = np.fmin(omega[:, 1:], omega[:, :-1])
+
+    def area_below(position):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.clip((position[:, np.newaxis] - start) / step, 0, 1)
+        return np.sum(area * np.nan_to_num(fraction), axis=1)
+
+    width = window * fit['fwhm']
+    peak_area = area_below(fit['peak_position'])
+    left = peak_area - area_below(fit['peak_position'] - width)
+    right = area_below(fit['peak_position'] + width) - peak_area
+    total = right + left
+
+    # moving average over three samples to suppress single noisy samples
+    smoothed = (residual[:, :-2] + residual[:, 1:-1] + residual[:, 2:]) / 3
+    secondary = (
+        np.nanmax(np.where(np.isnan(smoothed), -np.inf, smoothed), axis=1)
+        if smoothed.shape[1]
+        else np.full(len(omega), np.nan)
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'noise': noise,
+            'snr': np.where(noise > 0, amplitude / noise, np.nan),
+            'asymmetry': np.where(total > 0, (right - left) / total, np.nan),
+            'secondary_peak': np.maximum(secondary, 0) / amplitude,
+        }
@@ -0,0 +1,75 @@
+import numpy as np
+from scipy.interpolate import LinearNDInterpolator
+
+
+def min_max_direction(x, y, values):
+    """
+    Returns the position of the minimum value and the angle (in degrees) of the
+    direction from the minimum to the maximum value.
+    """
+    index_min = int(np.nanargmin(values))
+    index_max = int(np.nanargmax(values))
+    angle = np.degrees(
+        np.arctan2(y[index_max] - y[index_min], x[index_max] - x[index_min])
+    )
+    return (float(x[index_min]), float(y[index_min])), float(angle)
+
+
+def extract_line_profile(positions, values, line, *, wafer_diameter, step):
+    """
+    Extract values along a straight line through the wafer.
+
+    Args:
+        positions: The x and y positions of the map points, shape (n,) each.
+        values: Values at the map points, shape (n,) or (n, m).
+        line: A position (x, y) on the line, to which the positions along the line
+            are relative, and the direction of the line in degrees, counterclockwise
+            from the x axis, as returned by `min_max_direction`.
+        wafer_diameter: The line is clipped to the wafer circle.
+        step: Distance between the sampled positions.
+
+    Returns:
+        The positions along the line, shape (k,), and the interpolated values of
+        shape (k,) or (k, m). Positions outside of the measured area are NaN.
+    """
+    origin, angle = line
+    direction = np.array([np.cos(np.radians(angle)), np.sin(np.radians(angle))])
+    origin = np.asarray(origin, dtype=float)
+    # Intersections of the line origin + s * direction with the wafer circle
+    radius = wafer_diameter / 2
+    b = origin @ direction
+    c = origin @ origin - radius**2
+    discriminant = b**2 - c
+    if discriminant < 0:
+        return np.array([]), np.empty((0, *np.shape(values)[1:]))
+    s_min = -b - np.sqrt(discriminant)
+    s_max = -b + np.sqrt(discriminant)
+    s = np.arange(np.ceil(s_min / step), np.floor(s_max / step) + 1) * step
+
+    points = np.column_stack(positions)
+    interpolator = LinearNDInterpolator(points, np.asarray(values, dtype=float))
+    return s, interpolator(origin + s[:, np.newaxis] * direction)
+
+
+def extract_radial_profile(x, y, values, bin_width, center=(0, 0)):
+    """
+    Azimuthally average values in rings of `bin_width` around `center`.
+
+    Returns:
+        The mean radius of the points in each ring, shape (k,), and the mean values,
+        shape (k,) or (k, m). Empty rings are left out.
+    """
+    values = np.asarray(values, dtype=float)
+    radius = np.hypot(np.asarray(x) - center[0], np.asarray(y) - center[1])
+    ring = np.floor(radius / bin_width).astype(int)
+    counts = np.bincount(ring)
+    occupied = counts > 0
+    mean_radius = np.bincount(ring, weights=radius)[occupied] / counts[occupied]
+    columns = values.reshape(len(values), -1)
+    means = np.column_stack(
+        [
+            np.bincount(ring, weights=column)[occupied] / counts[occupied]
+            for column in columns.T
+        ]
+    )
+    return mean_radius, means.reshape(-1, *values.shape[1:])
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+def polar_to_cartesian(rho, theta):
+    """
+    Returns the Cartesian components of vectors with length `rho` and direction
+    `theta` (degrees, counterclockwise from the x axis). Works on whole arrays.
+    """
+    theta = np.radians(np.asarray(theta, dtype=float))
+    rho = np.asarray(rho, dtype=float)
+    return rho * np.cos(theta), rho * np.sin(theta)
+
+
+def stereographic_projection(tilt, tilt_direction):
+    """
+    Projects the lattice plane normals of all points stereographically onto the
+    wafer plane. A normal tilted by `tilt` (degrees) from the surface normal
+    towards `tilt_direction` (degrees) becomes a pole at distance tan(tilt / 2)
+    from the center, the primitive circle (tilt of 90 degrees) has radius 1.
+
+    Returns:
+        The x and y coordinates of the poles.
+    """
+    rho = np.tan(np.radians(np.asarray(tilt, dtype=float)) / 2)
+    return polar_to_cartesian(rho, tilt_direction)
+
+
+def line_segments(x_start, y_start, x_end, y_end):
+    """
+    Joins line segments into the x and y arrays of one plotly line trace. The
+    segments are separated by NaN, which plotly does not connect.
+    """
+    n_segments = np.size(x_start)
+    x = np.full((n_segments, 3), np.nan)
+    y = np.full((n_segments, 3), np.nan)
+    x[:, 0], x[:, 1] = x_start, x_end
+    y[:, 0], y[:, 1] = y_start, y_end
+    return x.ravel(), y.ravel()
+
+
+def arrow_angles(dx, dy):
+    """
+    Returns the plotly marker angles (degrees, clockwise from up) of arrows
+    pointing in the direction (dx, dy).
+    """
+    return 90 - np.degrees(np.arctan2(dy, dx))
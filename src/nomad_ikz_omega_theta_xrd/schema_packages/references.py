@@ -0,0 +1,177 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from cachetools import TTLCache
+from nomad.metainfo import MProxy
+
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import get_reference
+
+if TYPE_CHECKING:
+    from nomad.datamodel.datamodel import EntryArchive
+    from structlog.stdlib import BoundLogger
+
+# Resolved references per (upload id, user id, lab id). Entries of an upload are
+# processed one after the other in the same worker, so the entries of an upload
+# measuring the same wafers and instrument share the lookups.
+REFERENCE_CACHE_SIZE = 4096
+REFERENCE_CACHE_TTL = 600
+# Cache value of lab ids without an entry
+NOT_FOUND = ''
+
+
+class LabIdResolver:
+    """
+    Resolves lab ids to references of the entries with that lab id. All lab ids which
+    are not cached yet are looked up with one search, the results are kept for `ttl`
+    seconds. Lab ids without an entry are cached as well, so that the files of a
+    wafer without a sample entry search only once. Entries created during
+    processing replace them with `add`.
+    """
+
+    def __init__(self, maxsize=REFERENCE_CACHE_SIZE, ttl=REFERENCE_CACHE_TTL):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _scope(archive: 'EntryArchive'):
+        metadata = archive.metadata
+        if metadata is None:
+            return None, None
+        user_id = metadata.main_author.user_id if metadata.main_author else None
+        return metadata.upload_id, user_id
+
+    def add(self, archive: 'EntryArchive', lab_id: str, reference: str) -> None:
+        """
+        Adds the reference of an entry which was created during processing.
+        """
+        self.cache[(*self._scope(archive), lab_id)] = reference
+
+    @staticmethod
+    def search(lab_ids, user_id):
+        """
+        Returns the entries with any of the lab ids visible to the user, with their
+        entry id, upload id and lab ids.
+        """
+        # the search is only available on the server
+        from nomad.app.v1.models import MetadataRequired  # noqa: PLC0415
+        from nomad.search import search_iterator  # noqa: PLC0415
+
+        return search_iterator(
+            owner='all',
+            query={'results.eln.lab_ids:any': lab_ids},
+            required=MetadataRequired(
+                include=['entry_id', 'upload_id', 'results.eln.lab_ids']
+            ),
+            user_id=user_id,
+        )
+
+    def resolve(self, archive: 'EntryArchive', lab_ids, logger: 'BoundLogger'):
+        """
+        Returns a dict from the given lab ids to the reference of the first entry
+        (ordered by entry id) with that lab id or None.
+        """
+        scope = self._scope(archive)
+        lab_ids = list(dict.fromkeys(lab_id for lab_id in lab_ids if lab_id))
+        references = {lab_id: self.cache.get((*scope, lab_id)) for lab_id in lab_ids}
+        missing = [lab_id for lab_id, ref in references.items() if ref is None]
+        for lab_id in lab_ids:
+            if references[lab_id] == NOT_FOUND:
+                references[lab_id] = None
+        if not missing:
+            return references
+
+        try:
+            hits = {}
+            for entry in self.search(missing, scope[1]):
+                entry_lab_ids = entry.get('results', {}).get('eln', {}).get('lab_ids')
+                for lab_id in set(entry_lab_ids or []).intersection(missing):
+                    hits.setdefault(lab_id, []).append(entry)
+        except Exception as e:
+            logger.warn('Could not search for lab ids.', lab_ids=missing, exc_info=e)
+            return references
+
+        for lab_id in missing:
+            entries = hits.get(lab_id)
+            if not entries:
+                logger.warn(f'Found no entries with lab_id: "{lab_id}".')
+                self.cache[(*scope, lab_id)] = NOT_FOUND
+                continue
+            if len(entries) > 1:
+                logger.warn(
+                    f'Found {len(entries)} entries with lab_id: "{lab_id}". '
+                    'Will use the first one found.'
+                )
+            entry = entries[0]
+            references[lab_id] = get_reference(entry['upload_id'], entry['entry_id'])
+            self.cache[(*scope, lab_id)] = references[lab_id]
+        return references
+
+    def resolve_sections(self, archive: 'EntryArchive', sections, logger):
+        """
+        Fills `reference` of the given `EntityReference` sections from their
+        `lab_id` with one lookup.
+        """
+        unresolved = [
+            section
+            for section in sections
+            if section.reference is None and section.lab_id is not None
+        ]
+        references = self.resolve(
+            archive, [section.lab_id for section in unresolved], logger
+        )
+        for section in unresolved:
+            if references.get(section.lab_id) is not None:
+                section.reference = references[section.lab_id]
+            if section.name is None:
+                section.name = section.lab_id
+
+
+resolver = LabIdResolver()
+
+
+def get_entry_id(reference):
+    """
+    Returns the id of the entry a reference points to, without resolving it if it
+    names the entry by its id, or None if it is not known.
+    """
+    if isinstance(reference, MProxy):
+        path = reference.m_proxy_value.split('#')[0]
+        if '/archive/' not in path or '/archive/mainfile/' in path:
+            return None
+        return path.rsplit('/', 1)[-1]
+    metadata = getattr(reference.m_root(), 'metadata', None)
+    return metadata.entry_id if metadata is not None else None
+
+
+def search_processing_times(entry_ids, user_id):
+    """
+    Returns a dict from the ids of the entries visible to the user to the date and
+    time of their last processing.
+    """
+    # the search is only available on the server
+    from nomad.app.v1.models import MetadataRequired  # noqa: PLC0415
+    from nomad.search import search_iterator  # noqa: PLC0415
+
+    return {
+        entry['entry_id']: datetime.fromisoformat(entry['last_processing_time'])
+        for entry in search_iterator(
+            owner='all',
+            query={'entry_id:any': entry_ids},
+            required=MetadataRequired(include=['entry_id', 'last_processing_time']),
+            user_id=user_id,
+        )
+        if entry.get('last_processing_time')
+    }
+
+
+def normalize_reference(section, archive: 'EntryArchive', logger: 'BoundLogger'):
+    """
+    Fills `reference` of an `EntityReference` section from its `lab_id` with the
+    cached `resolver` or vice versa. Replaces the search of
+    `EntityReference.normalize`, which runs for every section again.
+    """
+    if section.reference is None and section.lab_id is not None:
+        resolver.resolve_sections(archive, [section], logger)
+    elif section.lab_id is None and section.reference is not None:
+        section.lab_id = section.reference.lab_id
+    if section.name is None and section.lab_id is not None:
+        section.name = section.lab_id
@@ -0,0 +1,107 @@
+import numpy as np
+from scipy.interpolate import LinearNDInterpolator
+
+
+def transform_map(positions, components, rotation=0, flip=False, shift=(0, 0)):
+    """
+    Transform the positions (x, y) and tilt components (component 0, component 90)
+    of a map into the frame of another measurement of the same wafer.
+
+    The wafer is first flipped (turned over around the y axis, i.e. the other side
+    faces down), then rotated counterclockwise by `rotation` degrees around the
+    center and then shifted by `shift`. All arguments may carry leading dimensions to
+    transform several candidates at once, e.g. `rotation` of shape (k, 1) with
+    positions of shape (n,) gives results of shape (k, n).
+
+    Turning the wafer over mirrors the positions at the y axis. The lattice plane
+    normal is turned with it, which (up to its sign) mirrors the tilt vector at the
+    x axis.
+
+    Returns:
+        The transformed positions and tilt components as tuples of two arrays.
+    """
+    x, y = (np.asarray(values, dtype=float) for values in positions)
+    component_0, component_90 = (
+        np.asarray(values, dtype=float) for values in components
+    )
+    sign = np.where(flip, -1.0, 1.0)
+    x = sign * x
+    component_90 = sign * component_90
+    angle = np.radians(rotation)
+    cos, sin = np.cos(angle), np.sin(angle)
+    return (
+        (cos * x - sin * y + shift[0], sin * x + cos * y + shift[1]),
+        (
+            cos * component_0 - sin * component_90,
+            sin * component_0 + cos * component_90,
+        ),
+    )
+
+
+def register_map(reference, moving, flips=(False, True), angle_step=1.0):
+    """
+    Find the flip, rotation and shift which bring the `moving` map onto the
+    `reference` map.
+
+    Both maps are dicts with the arrays `x_pos`, `y_pos` and `tilt`. The tilt
+    magnitude does not change under rotation and flip, its mean squared difference
+    is evaluated for all candidate rotations and flips in one vectorized step, then
+    refined around the best candidate. The shift aligns the centers of the
+    measured areas.
+
+    Returns:
+        A dict with `rotation` (degrees), `flip`, `shift` and the `score`
+        (root mean square tilt difference of the best candidate).
+    """
+    reference_points = np.column_stack([reference['x_pos'], reference['y_pos']])
+    reference_tilt = LinearNDInterpolator(reference_points, reference['tilt'])
+    reference_center = reference_points.mean(axis=0)
+
+    def evaluate(rotations, flip):
+        # shift so that the transformed center of the moving map ends up on the
+        # center of the reference map
+        (x, y), _ = transform_map(
+            (moving['x_pos'], moving['y_pos']), (0, 0), rotations[:, np.newaxis], flip
+        )
+        x = x - x.mean(axis=1, keepdims=True) + reference_center[0]
+        y = y - y.mean(axis=1, keepdims=True) + reference_center[1]
+        difference = reference_tilt(x, y) - moving['tilt']
+        overlap = np.sum(~np.isnan(difference), axis=1)
+        score = np.sqrt(np.nansum(difference**2, axis=1) / np.maximum(overlap, 1))
+        # candidates which overlap with less than half of the points are rejected
+        return np.where(overlap >= len(moving['tilt']) / 2, score, np.inf)
+
+    best = None
+    for flip in flips:
+        rotations = np.arange(-180, 180, angle_step)
+        score = evaluate(rotations, flip)
+        rotation = rotations[np.argmin(score)]
+        fine = rotation + np.linspace(-angle_step, angle_step, 21)
+        score = evaluate(fine, flip)
+        candidate = (score.min(), fine[np.argmin(score)], flip)
+        if best is None or candidate[0] < best[0]:
+            best = candidate
+
+    score, rotation, flip = best
+    (x, y), _ = transform_map(
+        (moving['x_pos'], moving['y_pos']), (0, 0), rotation, flip
+    )
+    shift = (reference_center[0] - x.mean(), reference_center[1] - y.mean())
+    return {
+        'rotation': float((rotation + 180) % 360 - 180),
+        'flip': bool(flip),
+        'shift': (float(shift[0]), float(shift[1])),
+        'score': float(score),
+    }
+
+
+def difference_statistics(difference):
+    """
+    Returns mean, root mean square and maximum absolute value of a difference
+    raster, ignoring NaN.
+    """
+    return {
+        'mean': float(np.nanmean(difference)),
+        'rms': float(np.sqrt(np.nanmean(difference**2))),
+        'max_abs': float(np.nanmax(np.abs(difference))),
+    }
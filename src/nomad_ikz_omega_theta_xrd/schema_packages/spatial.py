@@ -0,0 +1,209 @@
+import bisect
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class MapIndex:
+    """
+    Spatial index of the points of a map. Nearest point, k nearest points and radius
+    queries use a KD-tree, row and column queries a hash of the points by their
+    rounded y and x positions.
+
+    Args:
+        x, y: Positions of the map points.
+        grid_size: Spacing of the measurement grid. Positions closer than half of it
+            belong to the same row or column. Estimated from the positions if not
+            given.
+    """
+
+    def __init__(self, x, y, grid_size=None):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.tree = cKDTree(np.column_stack([self.x, self.y]))
+        if not grid_size:
+            grid_size = self._median_spacing()
+        self.grid_size = grid_size
+        self._rows, self._row_keys = self._hash(self.y, self.x)
+        self._columns, self._column_keys = self._hash(self.x, self.y)
+
+    def _hash(self, key_values, sort_values):
+        # Points are grouped by their position in units of the grid size, each group
+        # is sorted along the other axis
+        keys = np.round(key_values / self.grid_size).astype(int)
+        order = np.lexsort((sort_values, keys))
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        groups = dict(zip(unique_keys.tolist(), np.split(order, starts[1:])))
+        return groups, sorted(groups)
+
+    def _median_spacing(self):
+        if len(self.x) <= 1:
+            return 1.0
+        distance, _ = self.tree.query(np.column_stack([self.x, self.y]), k=2)
+        return float(np.median(distance[:, 1]))
+
+    def __len__(self):
+        return len(self.x)
+
+    def nearest(self, x, y):
+        """
+        Returns the index of the point closest to the position and its distance.
+        """
+        distance, index = self.tree.query([x, y])
+        return int(index), float(distance)
+
+    def k_nearest(self, x, y, k):
+        """
+        Returns the indices and distances of the `k` points closest to the position,
+        sorted by distance.
+        """
+        k = min(k, len(self))
+        distance, index = self.tree.query([x, y], k=k)
+        return np.atleast_1d(index), np.atleast_1d(distance)
+
+    def within_radius(self, x, y, radius):
+        """
+        Returns the indices of all points within `radius` of the position.
+        """
+        return np.array(sorted(self.tree.query_ball_point([x, y], radius)), dtype=int)
+
+    def neighbors(self, k, max_distance=np.inf):
+        """
+        Returns the indices of the `k` nearest neighbors of every point (excluding the
+        point itself) as an array of shape (n, k). Missing neighbors, e.g. further than
+        `max_distance`, are set to -1.
+        """
+        k = min(k, len(self) - 1)
+        if k < 1:
+            return np.empty((len(self), 0), dtype=int)
+        points = np.column_stack([self.x, self.y])
+        distance, index = self.tree.query(
+            points, k=k + 1, distance_upper_bound=max_distance
+        )
+        index = np.where(np.isinf(distance), -1, index)[:, 1:]
+        return index
+
+    def _closest_key(self, keys, value):
+        key = value / self.grid_size
+        position = bisect.bisect_left(keys, key)
+        candidates = keys[max(position - 1, 0) : position + 1]
+        return min(candidates, key=lambda candidate: abs(candidate - key))
+
+    def row(self, y):
+        """
+        Returns the indices of the points in the row closest to `y`, sorted by x.
+        """
+        return self._rows[self._closest_key(self._row_keys, y)]
+
+    def column(self, x):
+        """
+        Returns the indices of the points in the column closest to `x`, sorted by y.
+        """
+        return self._columns[self._closest_key(self._column_keys, x)]
+
+
+def lattice_offset(positions, grid_size):
+    """
+    Returns the offset of the lattice the positions are on from zero, between minus
+    and plus half of the grid size. Computed as the circular mean of the positions
+    modulo the grid size, so that positions slightly below and above a lattice line
+    average to it.
+    """
+    phase = np.angle(np.mean(np.exp(2j * np.pi * np.asarray(positions) / grid_size)))
+    # rounded, so that a lattice through zero has an offset of exactly zero
+    return round(float(phase * grid_size / (2 * np.pi)), 12)
+
+
+class MapGrid:
+    """
+    The points of a map on the regular lattice of the measurement, as cells of a
+    dense 2D array with rows along y and columns along x. The array covers the whole
+    wafer, which is centered at x=0 and y=0, `inside` masks the cells with their
+    center on the wafer.
+
+    Args:
+        x, y: Positions of the map points.
+        grid_size: Spacing of the measurement grid.
+        wafer_diameter: Diameter of the wafer.
+        tolerance: Largest distance of a point from its lattice position, in units
+            of the grid size.
+
+    Raises:
+        ValueError: If the points are not on a lattice with the grid size, share a
+            cell or are outside of the wafer.
+    """
+
+    def __init__(self, x, y, grid_size, wafer_diameter, tolerance=0.25):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if not grid_size or grid_size <= 0:
+            raise ValueError(f'Invalid grid size {grid_size}.')
+        if not wafer_diameter or wafer_diameter <= 0:
+            raise ValueError(f'Invalid wafer diameter {wafer_diameter}.')
+        offset_x = lattice_offset(x, grid_size)
+        offset_y = lattice_offset(y, grid_size)
+        column = np.round((x - offset_x) / grid_size).astype(int)
+        row = np.round((y - offset_y) / grid_size).astype(int)
+        deviation = np.hypot(
+            x - offset_x - column * grid_size, y - offset_y - row * grid_size
+        )
+        n_off_lattice = np.count_nonzero(deviation > tolerance * grid_size)
+        if n_off_lattice:
+            raise ValueError(
+                f'{n_off_lattice} points are not on a lattice with the grid size '
+                f'{grid_size}.'
+            )
+        radius = wafer_diameter / 2
+        n_outside = np.count_nonzero(np.hypot(x, y) > radius + tolerance * grid_size)
+        if n_outside:
+            raise ValueError(
+                f'{n_outside} points are outside of the wafer with the diameter '
+                f'{wafer_diameter}.'
+            )
+
+        first_column = min(int(np.ceil((-radius - offset_x) / grid_size)), column.min())
+        last_column = max(int(np.floor((radius - offset_x) / grid_size)), column.max())
+        first_row = min(int(np.ceil((-radius - offset_y) / grid_size)), row.min())
+        last_row = max(int(np.floor((radius - offset_y) / grid_size)), row.max())
+        self.grid_size = grid_size
+        self.row = row - first_row
+        self.column = column - first_column
+        self.shape = (last_row - first_row + 1, last_column - first_column + 1)
+        cells = np.ravel_multi_index((self.row, self.column), self.shape)
+        n_shared = len(cells) - len(np.unique(cells))
+        if n_shared:
+            raise ValueError(f'{n_shared} points are in the cell of another point.')
+        self.x_axis = offset_x + np.arange(first_column, last_column + 1) * grid_size
+        self.y_axis = offset_y + np.arange(first_row, last_row + 1) * grid_size
+        self.inside = (
+            np.hypot(self.x_axis[np.newaxis, :], self.y_axis[:, np.newaxis]) <= radius
+        )
+
+    def __len__(self):
+        return len(self.row)
+
+    @property
+    def measured(self):
+        """
+        Mask of the cells with a point.
+        """
+        measured = np.zeros(self.shape, dtype=bool)
+        measured[self.row, self.column] = True
+        return measured
+
+    def to_array(self, values):
+        """
+        Returns the values of the points, shape (n,) or (n, columns), as an array of
+        shape (rows, columns) or (rows, columns, columns of the values). Cells without
+        a point are NaN.
+        """
+        values = np.asarray(values, dtype=float)
+        array = np.full(self.shape + values.shape[1:], np.nan)
+        array[self.row, self.column] = values
+        return array
+
+    def from_array(self, array):
+        """
+        Returns the values of the cells of the points from an array of the grid.
+        """
+        return np.asarray(array)[self.row, self.column]
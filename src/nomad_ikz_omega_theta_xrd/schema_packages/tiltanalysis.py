@@ -0,0 +1,170 @@
+import numpy as np
+
+# Neighbors needed for a local gradient, three of them fit a plane exactly
+MIN_GRADIENT_NEIGHBORS = 4
+
+
+def tilt_from_components(component_0, component_90):
+    """
+    Returns tilt magnitude and tilt direction (in degrees, 0 to 360) of the tilt
+    vectors given by their components along 0° and 90°.
+    """
+    component_0 = np.asarray(component_0, dtype=float)
+    component_90 = np.asarray(component_90, dtype=float)
+    tilt = np.hypot(component_0, component_90)
+    tilt_direction = np.degrees(np.arctan2(component_90, component_0)) % 360
+    return tilt, tilt_direction
+
+
+def plane_orientation(peak_r, peak_l, bragg_angle, incidence_angle):
+    """
+    Returns the inclination to the rotation axis and the azimuth (in degrees) of the
+    normal of the reflecting lattice plane from the rotation angles of its R and L
+    reflections.
+
+    The sample rotates about its surface normal, the beam hits it at
+    `incidence_angle` to the surface. A plane normal at the inclination `psi` and
+    the azimuth `phi` reflects at the rotation angles `phi +- phi_0` with
+    `cos(incidence) sin(psi) cos(phi_0) - sin(incidence) cos(psi) = sin(bragg)`.
+    Peak positions without a solution give NaN.
+    """
+    peak_r = np.asarray(peak_r, dtype=float)
+    peak_l = np.asarray(peak_l, dtype=float)
+    half_separation = np.radians(peak_r - peak_l) / 2
+    incidence = np.radians(incidence_angle)
+    a = np.cos(incidence) * np.cos(half_separation)
+    b = np.sin(incidence)
+    with np.errstate(invalid='ignore'):
+        inclination = np.arctan2(b, a) + np.arcsin(
+            np.sin(np.radians(bragg_angle)) / np.hypot(a, b)
+        )
+    return np.degrees(inclination), (peak_r + peak_l) / 2
+
+
+def recompute_tilt(peak_r, peak_l, component_0, component_90, geometry):
+    """
+    Recompute the tilt vector of every point from the R and L peak positions and
+    compare it to the values reported by the instrument.
+
+    The tilt moves the normal of the reflecting plane away from its nominal
+    inclination and azimuth, see `plane_orientation`. For small tilts the change of
+    the inclination is the tilt component along the nominal azimuth (0°) and the
+    change of the azimuth times the tangent of the nominal inclination the component
+    perpendicular to it (90°).
+
+    Args:
+        peak_r, peak_l: Fitted peak positions of the R and L curves, shape (n,).
+        component_0, component_90: Components reported by the instrument, shape (n,).
+        geometry: Dict with the `bragg_angle` of the reflection, the
+            `incidence_angle` of the beam to the surface, the nominal
+            `plane_inclination` of the normal of the reflecting plane and the
+            `azimuth_offset`, the rotation angle at which the normal points along
+            0°, all in degrees.
+
+    Returns:
+        A dict with the arrays `component_0`, `component_90`, `tilt`,
+        `tilt_direction` and `residual` (length of the difference between the
+        recomputed and the reported tilt vector).
+    """
+    inclination, azimuth = plane_orientation(
+        peak_r, peak_l, geometry['bragg_angle'], geometry['incidence_angle']
+    )
+    azimuth = (azimuth - geometry['azimuth_offset'] + 180) % 360 - 180
+    recomputed_0 = inclination - geometry['plane_inclination']
+    recomputed_90 = azimuth * np.tan(np.radians(geometry['plane_inclination']))
+    tilt, tilt_direction = tilt_from_components(recomputed_0, recomputed_90)
+    residual = np.hypot(
+        recomputed_0 - np.asarray(component_0, dtype=float),
+        recomputed_90 - np.asarray(component_90, dtype=float),
+    )
+    return {
+        'component_0': recomputed_0,
+        'component_90': recomputed_90,
+        'tilt': tilt,
+        'tilt_direction': tilt_direction,
+        'residual': residual,
+    }
+
+
+def score_neighbor_differences(x, y, values, neighbors):
+    # differences to the neighbors of shape (n, k, columns), missing neighbors are
+    # left out of the gradient fit and the median
+    valid = neighbors >= 0
+    dx = np.where(valid, x[neighbors] - x[:, np.newaxis], 0)
+    dy = np.where(valid, y[neighbors] - y[:, np.newaxis], 0)
+    difference = np.where(
+        valid[:, :, np.newaxis], values[neighbors] - values[:, np.newaxis, :], 0
+    )
+    # least squares plane through the neighbors of every point. Points with too few
+    # neighbors to determine it, e.g. at the corners of the map, get the mean
+    # gradient of their neighbors.
+    design = np.stack([valid.astype(float), dx, dy], axis=2)
+    gradient = (np.linalg.pinv(design) @ difference)[:, 1:, :]
+    fitted = valid.sum(axis=1) >= MIN_GRADIENT_NEIGHBORS
+    borrowed = np.where(
+        (valid & fitted[neighbors])[:, :, np.newaxis, np.newaxis],
+        gradient[neighbors],
+        np.nan,
+    )[~fitted]
+    gradient[~fitted] = 0
+    has_fitted = np.any(np.isfinite(borrowed[:, :, 0, 0]), axis=1)
+    gradient[np.flatnonzero(~fitted)[has_fitted]] = np.nanmean(
+        borrowed[has_fitted], axis=1
+    )
+    difference -= dx[:, :, np.newaxis] * gradient[:, :1]
+    difference -= dy[:, :, np.newaxis] * gradient[:, 1:]
+    difference[~valid] = np.nan
+    has_neighbors = valid.any(axis=1)
+    local = np.full(values.shape, np.nan)
+    local[has_neighbors] = -np.nanmedian(difference[has_neighbors], axis=1)
+    deviation = np.abs(local - np.nanmedian(local, axis=0))
+    # the mean absolute deviation is used if most points do not scatter at all
+    scale = np.where(
+        np.nanmedian(deviation, axis=0) > 0,
+        1.4826 * np.nanmedian(deviation, axis=0),
+        1.2533 * np.nanmean(deviation, axis=0),
+    )
+    scale = np.where(scale > 0, scale, np.finfo(float).tiny)
+    score = np.full(len(values), np.nan)
+    score[has_neighbors] = np.max(deviation[has_neighbors] / scale, axis=1)
+    return score
+
+
+def detect_spatial_outliers(x, y, values, neighbors, threshold=5.0):
+    """
+    Flag points which differ from their neighbors much more than the points of the
+    map typically do.
+
+    The local gradient at every point is fitted by least squares to its neighbors
+    and removed from the differences to the neighbors, so that smooth variations
+    over the wafer, also at its edge, are not flagged. The median of these
+    differences is scaled by the median absolute deviation (MAD) of the medians over
+    the whole map. With several columns, e.g. both tilt components, the largest
+    score of a point counts. The points flagged in a first pass are left out of the
+    neighbors in a second one, so that they do not affect the score of their
+    neighbors.
+
+    Args:
+        x, y: Positions of the points, shape (n,).
+        values: Values of the points, shape (n,) or (n, columns).
+        neighbors: Indices of the neighbors of every point, shape (n, k), missing
+            neighbors are -1, see `MapIndex.neighbors`.
+        threshold: Points with a larger score are flagged.
+
+    Returns:
+        The score (difference in units of the scaled MAD) and the flags of the points.
+        Points without neighbors have a score of NaN and are not flagged.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    neighbors = np.asarray(neighbors, dtype=int).reshape(len(x), -1)
+    values = np.asarray(values, dtype=float).reshape(len(x), -1)
+    score = score_neighbor_differences(x, y, values, neighbors)
+    flagged = np.nan_to_num(score, nan=0.0) > threshold
+    if flagged.any():
+        neighbors = np.where(flagged[neighbors] & (neighbors >= 0), -1, neighbors)
+        rescored = score_neighbor_differences(x, y, values, neighbors)
+        # points whose neighbors were all flagged keep their first score
+        score = np.where(np.isnan(rescored), score, rescored)
+        flagged = np.nan_to_num(score, nan=0.0) > threshold
+    return score, flagged
@@ -0,0 +1,73 @@
+import time
+
+from nomad.config import config
+
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import get_json_encoder
+
+
+class Timer:
+    """
+    Measures the stages of processing an entry. Every call of `lap` ends a stage,
+    which started with the previous call or the creation of the timer. The duration
+    and the given counts of each stage are logged and kept in `spans`.
+
+    Args:
+        logger: A structlog logger.
+        name: Prefix of the log events, e.g. the normalized section.
+        mode: "off", "log" or "archive". Defaults to the `timing` setting of the
+            schema package. Does nothing if "off".
+    """
+
+    def __init__(self, logger, name, mode=None):
+        if mode is None:
+            mode = config.get_plugin_entry_point(
+                'nomad_ikz_omega_theta_xrd.schema_packages:omegascan'
+            ).timing
+        self.mode = mode
+        self.enabled = mode != 'off'
+        self.logger = logger
+        self.name = name
+        self.spans = []
+        if self.enabled:
+            self.start = self.last = time.perf_counter()
+
+    def lap(self, stage, **counts):
+        """
+        Ends the current stage. `counts` are e.g. the number of processed points.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        duration = now - self.last
+        self.last = now
+        self.spans.append((stage, duration, counts))
+        self.logger.info(
+            f'{self.name} timing', stage=stage, duration=duration, **counts
+        )
+
+    @property
+    def total(self):
+        """
+        Time since the creation of the timer, 0 if disabled.
+        """
+        return self.last - self.start if self.enabled else 0.0
+
+
+def count_curve_samples(results):
+    """
+    Returns the number of intensity values in the scan curves of the results.
+    """
+    return sum(
+        len(curve.intensity)
+        for result in results or []
+        for curve in result.Scan_Curves or []
+        if curve.intensity is not None
+    )
+
+
+def count_figure_bytes(figures):
+    """
+    Returns the size of the figures as JSON.
+    """
+    dumps = get_json_encoder()
+    return sum(len(dumps(figure.figure)) for figure in figures or [] if figure.figure)
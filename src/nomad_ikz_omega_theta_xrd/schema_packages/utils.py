@@ -1,25 +1,176 @@
+import hashlib
+import json
+import os
+import uuid
+from contextlib import suppress
+
+import numpy as np
+from nomad.datamodel.context import ClientContext
+from nomad.metainfo import SubSection
+from nomad.utils import hash
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 def get_reference(upload_id, entry_id):
     return f'../uploads/{upload_id}/archive/{entry_id}#/data'
 
 
 def get_entry_id_from_file_name(file_name, archive):
-    from nomad.utils import hash
-
     return hash(archive.metadata.upload_id, file_name)
 
 
-def create_archive(entity, archive, file_name) -> str:
-    import json
+def get_entry_id_from_mainfile_key(mainfile, mainfile_key, archive):
+    return hash(archive.metadata.upload_id, mainfile, mainfile_key)
+
+
+def get_json_encoder():
+    """
+    Returns a function encoding a value as JSON bytes. Uses orjson if available,
+    which writes NumPy arrays directly without converting them to lists.
+    """
+
+    def default(value):
+        if isinstance(value, (np.ndarray, np.generic)):
+            return value.tolist()
+        raise TypeError(f'Type is not JSON serializable: {type(value).__name__}')
+
+    def json_dumps(value):
+        return json.dumps(value, default=default).encode()
+
+    if orjson is None:
+        return json_dumps
+
+    def dumps(value):
+        # orjson writes NaN as null, which can not be read back into float arrays
+        if (
+            isinstance(value, np.ndarray)
+            and value.dtype.kind == 'f'
+            and not np.isfinite(value).all()
+        ):
+            return json_dumps(value)
+        return orjson.dumps(value, default=default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return dumps
 
-    from nomad.datamodel.context import ClientContext
 
+def iter_section_json(section, dumps, with_root_def=False):
+    """
+    Serializes a section to JSON incrementally, one section at a time, instead of
+    building the dict of the whole tree with `m_to_dict`. Array quantities are passed
+    to the encoder as NumPy arrays.
+    """
+
+    def is_array(definition, section):
+        return isinstance(definition, SubSection) or isinstance(
+            section.__dict__.get(definition.name), np.ndarray
+        )
+
+    separator = b'{'
+    for key, value in section.m_to_dict(
+        with_root_def=with_root_def, exclude=is_array
+    ).items():
+        yield separator + dumps(key) + b':' + dumps(value)
+        separator = b','
+
+    for name, quantity in section.m_def.all_quantities.items():
+        value = section.__dict__.get(name)
+        if isinstance(value, np.ndarray) and not quantity.virtual:
+            yield separator + dumps(name) + b':' + dumps(value)
+            separator = b','
+
+    for name, sub_section_def in section.m_def.all_sub_sections.items():
+        if sub_section_def.repeats:
+            sub_sections = section.m_get_sub_sections(sub_section_def)
+            if not sub_sections:
+                continue
+            yield separator + dumps(name) + b':['
+            for index, sub_section in enumerate(sub_sections):
+                if index > 0:
+                    yield b','
+                if sub_section is None:
+                    yield b'null'
+                else:
+                    yield from iter_section_json(sub_section, dumps)
+            yield b']'
+        else:
+            sub_section = section.m_get_sub_section(sub_section_def, -1)
+            if sub_section is None:
+                continue
+            yield separator + dumps(name) + b':'
+            yield from iter_section_json(sub_section, dumps)
+        separator = b','
+
+    yield b'{}' if separator == b'{' else b'}'
+
+
+def create_archive(entity, archive, file_name, overwrite=False) -> str:
+    """
+    Writes `entity` as the data of the archive file `file_name` and triggers its
+    processing. An existing file is only replaced with `overwrite`, and only if the
+    content changed.
+
+    The content is written to a temporary file in the same directory, which is then
+    moved into place, so that a failed write never leaves a truncated file.
+    """
     if isinstance(archive.m_context, ClientContext):
         return None
-    if not archive.m_context.raw_path_exists(file_name):
-        entity_entry = entity.m_to_dict(with_root_def=True)
-        with archive.m_context.raw_file(file_name, 'w') as outfile:
-            json.dump({'data': entity_entry}, outfile)
-        archive.m_context.process_updated_raw_file(file_name)
-    return get_reference(
+    reference = get_reference(
         archive.metadata.upload_id, get_entry_id_from_file_name(file_name, archive)
     )
+    exists = archive.m_context.raw_path_exists(file_name)
+    if exists and not overwrite:
+        return reference
+
+    path = os.path.join(archive.m_context.raw_path(), file_name)
+    directory, name = os.path.split(path)
+    temporary_path = os.path.join(directory, f'.{name}.{uuid.uuid4().hex}.tmp')
+    dumps = get_json_encoder()
+    content_hash = hashlib.sha256()
+    try:
+        with open(temporary_path, 'xb') as content:
+            for chunk in [
+                b'{"data":',
+                *iter_section_json(entity, dumps, with_root_def=True),
+                b'}',
+            ]:
+                content_hash.update(chunk)
+                content.write(chunk)
+
+        if exists:
+            existing_hash = hashlib.sha256()
+            with archive.m_context.raw_file(file_name, 'rb') as existing:
+                for chunk in iter(lambda: existing.read(1024 * 1024), b''):
+                    existing_hash.update(chunk)
+            if existing_hash.digest() == content_hash.digest():
+                return reference
+            os.replace(temporary_path, path)
+        else:
+            # exclusive creation, entries processed in parallel may try to create
+            # the same file (e.g. the archive of a shared instrument)
+            os.link(temporary_path, path)
+    except FileExistsError:
+        return reference
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(temporary_path)
+    archive.m_context.process_updated_raw_file(file_name, allow_modify=exists)
+    return reference
+
+
+def get_fingerprint(*arrays, **parameters) -> str:
+    """
+    Returns a hash over the given arrays and parameters. Used to detect if derived
+    data (e.g. an interpolated map) is still up to date with the point data.
+    """
+    fingerprint = hashlib.sha256()
+    for array in arrays:
+        values = np.ascontiguousarray(array, dtype=np.float64)
+        fingerprint.update(str(values.shape).encode())
+        fingerprint.update(values.tobytes())
+    for key in sorted(parameters):
+        fingerprint.update(f'{key}={parameters[key]!r};'.encode())
+    return fingerprint.hexdigest()
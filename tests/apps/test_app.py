@@ -1,6 +1,16 @@
+from nomad_ikz_omega_theta_xrd.apps import omegathetaxrdapp
+
+
 def test_importing_app():
     # this will raise an exception if pydantic model validation fails for th app
     from nomad_ikz_omega_theta_xrd.apps import myapp
 
     assert myapp.app.label == 'MyApp'
 
+
+def test_importing_omega_theta_xrd_app():
+    assert omegathetaxrdapp.app.label == 'Omega Theta XRD'
+    assert any(
+        column.search_quantity.startswith('data.map_statistics.rms_tilt#')
+        for column in omegathetaxrdapp.app.columns
+    )
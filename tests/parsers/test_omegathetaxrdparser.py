@@ -0,0 +1,204 @@
+import logging
+
+import numpy as np
+from nomad.client import normalize_all
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.context import ClientContext
+from nomad.utils import hash
+
+from nomad_ikz_omega_theta_xrd.parsers.omegathetaxrdparser import (
+    OmegaThetaXRDParser,
+    RawFileOmegaThetaXRDData,
+    configuration,
+    get_single_measurement_group,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages import omegascan
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import OmegaThetaXRD
+from nomad_ikz_omega_theta_xrd.schema_packages.peakfitting import fit_peaks
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import get_reference
+
+
+def test_parse_direct(monkeypatch):
+    monkeypatch.setattr(configuration, 'mode', 'direct')
+    archive = EntryArchive(metadata=EntryMetadata())
+    OmegaThetaXRDParser().parse(
+        'upload/W1-AP-NU-MI_single.xrd', archive, logging.getLogger()
+    )
+
+    assert isinstance(archive.data, OmegaThetaXRD)
+    assert archive.data.data_file == 'W1-AP-NU-MI_single.xrd'
+
+
+def test_single_measurement_group(tmp_path):
+    for file_name in [
+        'W1-AP-NU-MI_001.xrd',
+        'W1-AP-NU-MI_000.xrd',
+        'W2-AP-NU-MI_000.xrd',
+        'W1-AP-NU-XY_map.xrd',
+        'W1_A-AP-NU-MI_000.xrd',
+        'W1_B-AP-NU-MI_000.xrd',
+        'W1_B-AP-NU-MI_001.xrd',
+    ]:
+        (tmp_path / file_name).touch()
+
+    assert get_single_measurement_group(str(tmp_path / 'W1-AP-NU-MI_001.xrd')) == [
+        'W1-AP-NU-MI_000.xrd',
+        'W1-AP-NU-MI_001.xrd',
+    ]
+    assert get_single_measurement_group(str(tmp_path / 'W2-AP-NU-MI_000.xrd')) is None
+    assert get_single_measurement_group(str(tmp_path / 'W1-AP-NU-XY_map.xrd')) is None
+    # sample names may contain underscores
+    assert get_single_measurement_group(str(tmp_path / 'W1_A-AP-NU-MI_000.xrd')) is None
+    assert get_single_measurement_group(str(tmp_path / 'W1_B-AP-NU-MI_000.xrd')) == [
+        'W1_B-AP-NU-MI_000.xrd',
+        'W1_B-AP-NU-MI_001.xrd',
+    ]
+
+
+def test_point_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(configuration, 'mode', 'direct')
+    monkeypatch.setattr(configuration, 'points_per_page', 2)
+    mainfile = tmp_path / 'W1-AP-NU-XY_map.xrd'
+    mainfile.write_text(
+        '<Root><MultiMeasurement><Measurements>'
+        + '<Measurement></Measurement>' * 5
+        + '</Measurements></MultiMeasurement></Root>'
+    )
+
+    keys = OmegaThetaXRDParser().is_mainfile(str(mainfile), 'text/xml', b'', '')
+    assert keys == ['points_0', 'points_1', 'points_2']
+
+
+def test_combine_single_measurements(monkeypatch, tmp_path):
+    monkeypatch.setattr(configuration, 'mode', 'direct')
+    monkeypatch.setattr(configuration, 'combine_single_measurements', True)
+    group = ['W1-AP-NU-MI_000.xrd', 'W1-AP-NU-MI_001.xrd']
+    archives = []
+    for data_file in group:
+        (tmp_path / data_file).touch()
+    for data_file in group:
+        archive = EntryArchive(
+            metadata=EntryMetadata(upload_id='test_upload', mainfile=data_file)
+        )
+        OmegaThetaXRDParser().parse(
+            str(tmp_path / data_file), archive, logging.getLogger()
+        )
+        archives.append(archive)
+
+    combined, single = archives
+    assert isinstance(combined.data, OmegaThetaXRD)
+    assert combined.data.name == 'W1-AP-NU-MI'
+    assert combined.data.data_file == group[0]
+    assert combined.data.data_files == group
+    assert isinstance(single.data, RawFileOmegaThetaXRDData)
+    assert single.data.m_to_dict()['measurement'] == get_reference(
+        'test_upload', hash('test_upload', group[0])
+    )
+
+
+INFO = 'TimeStamp="01/02/2024 10:11:12" RecipeName="recipe" DeviceSerialNo="1"'
+
+
+def create_measurement(index, x, y, wafer_info=''):
+    omega = np.linspace(-0.5, 0.5, 101)
+
+    def scan_curve(name, center):
+        intensity = 20 + 1000 * np.exp(-0.5 * ((omega - center) / 0.01) ** 2)
+        values = ''.join(f'{17 + x:.5f} {y:.2f};' for x, y in zip(omega, intensity))
+        return f'<ScanCurve Name="{name}">{values}</ScanCurve>'
+
+    # the reader takes the parameters by their position in the list
+    values = [0, 0, 0, x, y, 0, 0, 0, 0.01, 45, 0, 0, 0.007, 0.007, 0.1, '[1-100]']
+    parameters = ''.join(
+        f'<Parameter Name="P{index}" Value="{value}"/>'
+        for index, value in enumerate(values)
+    )
+    return (
+        f'<Measurement><Info Name="W1_{index}" {INFO}/>{wafer_info}'
+        f'<Result><ParameterList>{parameters}</ParameterList></Result>'
+        f'<Scans><Scan><ScanCurves>{scan_curve("R", 0.01 * index)}'
+        f'{scan_curve("L", -0.01 * index)}</ScanCurves></Scan></Scans>'
+        '</Measurement>'
+    )
+
+
+def write_map(path, positions):
+    measurements = ''.join(
+        create_measurement(index, x, y) for index, (x, y) in enumerate(positions)
+    )
+    path.write_text(
+        f'<Root><MultiMeasurement><Info Name="W1_map" {INFO}/>'
+        '<WaferInfo Diameter="10" GridSize="1"/>'
+        f'<Measurements>{measurements}</Measurements></MultiMeasurement></Root>'
+    )
+
+
+def test_parse_and_normalize_point_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(configuration, 'mode', 'direct')
+    monkeypatch.setattr(configuration, 'points_per_page', 2)
+    positions = [(x, y) for x in range(-1, 2) for y in range(-1, 1)]
+    write_map(tmp_path / 'W1-AP-NU-XY_map.xrd', positions)
+    fitted_curves = []
+
+    def counting_fit_peaks(omega, intensity, **kwargs):
+        fitted_curves.append(len(omega))
+        return fit_peaks(omega, intensity, **kwargs)
+
+    monkeypatch.setattr(omegascan, 'fit_peaks', counting_fit_peaks)
+    parser = OmegaThetaXRDParser()
+    mainfile = str(tmp_path / 'W1-AP-NU-XY_map.xrd')
+    keys = parser.is_mainfile(mainfile, 'text/xml', b'', '')
+    context = ClientContext(local_dir=str(tmp_path))
+    archive, *pages = [
+        EntryArchive(
+            metadata=EntryMetadata(upload_id='test_upload', mainfile=mainfile),
+            m_context=context,
+        )
+        for _ in [None, *keys]
+    ]
+    parser.parse(mainfile, archive, logging.getLogger(), dict(zip(keys, pages)))
+    for entry_archive in [archive, *pages]:
+        normalize_all(entry_archive)
+
+    assert fitted_curves == [len(positions) * 2]
+    results = archive.data.results
+    assert [len(result.Scan_Curves) for result in results] == [0] * len(positions)
+    page_results = [result for page in pages for result in page.data.results]
+    assert [result.name for result in page_results] == [
+        result.name for result in results
+    ]
+    for result, page_result in zip(results, page_results):
+        assert page_result.fwhm == result.fwhm
+        assert all(
+            scan_curve.peak_position is not None
+            for scan_curve in page_result.Scan_Curves
+        )
+
+
+def test_normalize_combined_single_measurements(monkeypatch, tmp_path):
+    monkeypatch.setattr(configuration, 'mode', 'direct')
+    monkeypatch.setattr(configuration, 'combine_single_measurements', True)
+    grid_size = 2.5
+    wafer_diameter = 10
+    positions = [(x, y) for x in (-grid_size, 0, grid_size) for y in (0, grid_size)]
+    group = [f'W1_A-AP-NU-MI_{index:03d}.xrd' for index in range(len(positions))]
+    for index, (data_file, (x, y)) in enumerate(zip(group, positions)):
+        # single measurement files without a grid size
+        measurement = create_measurement(
+            index, x, y, f'<WaferInfo Diameter="{wafer_diameter}"/>'
+        )
+        (tmp_path / data_file).write_text(f'<Root>{measurement}</Root>')
+    archive = EntryArchive(
+        metadata=EntryMetadata(upload_id='test_upload', mainfile=group[0]),
+        m_context=ClientContext(local_dir=str(tmp_path)),
+    )
+    OmegaThetaXRDParser().parse(str(tmp_path / group[0]), archive, logging.getLogger())
+    normalize_all(archive)
+
+    measurement = archive.data
+    assert measurement.data_files == group
+    assert measurement.measurement_type == 'mapping'
+    assert len(measurement.results) == len(positions)
+    assert measurement.grid_size == grid_size
+    assert measurement.wafer_diameter == wafer_diameter
+    assert measurement.map_statistics is not None
@@ -0,0 +1,34 @@
+import numpy as np
+
+from nomad_ikz_omega_theta_xrd.schema_packages.curvature import (
+    global_curvature,
+    grid_gradient,
+    local_curvature,
+)
+
+
+def test_grid_gradient():
+    array = np.array([[0.0, 1.0, 2.0, 3.0], [0.0, 2.0, np.nan, 6.0]])
+    d_dy, d_dx = grid_gradient(array, 0.5)
+    assert np.allclose(d_dx[0], 2)
+    # one-sided next to the missing cell, NaN without measured neighbors
+    assert np.allclose(d_dx[1, :2], 4)
+    assert np.isnan(d_dx[1, 3]) and np.isnan(d_dx[1, 2])
+    assert np.allclose(d_dy[0], [0, 2, np.nan, 6], equal_nan=True)
+
+
+def test_spherical_bow():
+    radius = 1000.0
+    axis = np.arange(-10, 10.1, 2.5)
+    x, y = np.meshgrid(axis, axis)
+    component_0 = np.degrees(x / radius)
+    component_90 = np.degrees(y / radius) + 0.1
+    component_0[4, 4] = np.nan
+    local = local_curvature(component_0, component_90, 2.5)
+    measured = np.isfinite(component_0)
+    assert np.allclose(local['radius'][measured], radius)
+    assert np.allclose(local['twist'][measured], 0)
+    fitted = global_curvature(
+        x[measured], y[measured], component_0[measured], component_90[measured]
+    )
+    assert np.allclose(list(fitted.values()), 1 / radius)
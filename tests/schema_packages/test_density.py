@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.utils import get_logger
+
+from nomad_ikz_omega_theta_xrd.schema_packages.density import TiltHistogram
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    AggregatedMap,
+    OmegaThetaXRD,
+    OmegaThetaXRDPoleFigure,
+    ParameterList,
+)
+
+N_VECTORS = 1000
+PROCESSING_TIME = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+def test_tilt_histogram_incremental():
+    rng = np.random.default_rng(0)
+    component_0, component_90 = rng.normal(0, 0.05, (2, N_VECTORS))
+    histogram = TiltHistogram(0.1, 0.01)
+    histogram.add(component_0[:400], component_90[:400])
+    histogram.add(component_0[400:], component_90[400:])
+
+    expected, _, _ = np.histogram2d(
+        component_90, component_0, bins=[histogram.edges, histogram.edges]
+    )
+    assert np.array_equal(histogram.counts, expected)
+    assert histogram.n_points == N_VECTORS
+    assert histogram.outside == N_VECTORS - expected.sum()
+
+
+def create_measurement(name, components):
+    measurement = OmegaThetaXRD(
+        name=name,
+        results=[
+            ParameterList(
+                x_pos=0.0,
+                y_pos=0.0,
+                tilt=0.0,
+                tilt_direction=0.0,
+                component_0=component_0,
+                component_90=component_90,
+                reference_offset=0.0,
+            )
+            for component_0, component_90 in components
+        ],
+    )
+    EntryArchive(
+        metadata=EntryMetadata(entry_id=name, last_processing_time=PROCESSING_TIME),
+        data=measurement,
+    )
+    return measurement
+
+
+def test_pole_figure_adds_new_maps(monkeypatch):
+    archive = EntryArchive(metadata=EntryMetadata())
+    logger = get_logger(__name__)
+    first = create_measurement('first', [(0.01, 0.02), (0.5, 0.0)])
+    second = create_measurement('second', [(-0.03, 0.04)])
+    loaded = []
+    extract_map_data = OmegaThetaXRD.extract_map_data
+
+    def recording_extract_map_data(measurement):
+        loaded.append(measurement.name)
+        return extract_map_data(measurement)
+
+    monkeypatch.setattr(OmegaThetaXRD, 'extract_map_data', recording_extract_map_data)
+    pole_figure = OmegaThetaXRDPoleFigure(maps=[AggregatedMap(reference=first)])
+    pole_figure.normalize(archive, logger)
+    assert pole_figure.n_points == len(first.results)
+    assert pole_figure.n_outside == 1
+    assert pole_figure.maps[0].entry_id == 'first'
+
+    # only kept if the first map is not binned again
+    extra = 5
+    pole_figure.counts[0, 0] += extra
+    pole_figure.maps.append(AggregatedMap(reference=second))
+    pole_figure.normalize(archive, logger)
+    assert pole_figure.n_points == len(first.results) + extra + len(second.results)
+    assert pole_figure.maps[1].name == 'second'
+    assert loaded == ['first', 'second']
+
+    first.results[0].component_0 = 0.02
+    first.m_root().metadata.last_processing_time = PROCESSING_TIME + timedelta(1)
+    pole_figure.normalize(archive, logger)
+    assert pole_figure.n_points == len(first.results) + len(second.results)
+    assert pole_figure.counts.sum() == pole_figure.n_points - pole_figure.n_outside
+    assert len(pole_figure.figures) == 1
+    z = pole_figure.figures[0].figure['data'][0]['z']
+    assert None in z[0]
+    assert all(value is None or np.isfinite(value) for row in z for value in row)
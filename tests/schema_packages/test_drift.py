@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.utils import get_logger
+
+from nomad_ikz_omega_theta_xrd.schema_packages.drift import ControlChart
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    DriftRecord,
+    OmegaThetaXRD,
+    OmegaThetaXRDInstrument,
+    ParameterList,
+)
+
+N_VALUES = 50
+
+
+def test_control_chart():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1.0, 0.1, N_VALUES)
+    chart = ControlChart(n_sigma=4)
+    alarms = [chart.add(value) for value in values]
+
+    assert not any(alarms)
+    assert np.isclose(chart.mean, values.mean())
+    assert np.isclose(chart.std, values.std(ddof=1))
+    assert 'value' in chart.add(2.0)
+    assert chart.count == N_VALUES
+    # a slow drift within the band is found by the moving average
+    drift = [chart.add(chart.mean + 2 * chart.std) for _ in range(10)]
+    assert 'value' not in sum(drift, [])
+    assert ['ewma'] in drift
+
+
+def create_reference_measurement(day, tilt):
+    start = datetime(2026, 1, 1) + timedelta(days=day)
+    return OmegaThetaXRD(
+        name=f'reference_{day}',
+        datetime=start,
+        results=[
+            ParameterList(
+                x_pos=float(index),
+                y_pos=0.0,
+                tilt=tilt,
+                tilt_direction=0.0,
+                component_0=0.0,
+                component_90=0.0,
+                reference_offset=0.01 * index,
+                time_stamp=start + timedelta(minutes=2 * index),
+            )
+            for index in range(3)
+        ],
+    )
+
+
+def test_instrument_tracks_new_reference_measurements():
+    archive = EntryArchive(metadata=EntryMetadata(entry_name='instrument.archive.json'))
+    logger = get_logger(__name__)
+    tilts = [0.030, 0.031, 0.029, 0.030, 0.031, 0.029, 0.05]
+    measurements = [
+        create_reference_measurement(day, tilt) for day, tilt in enumerate(tilts)
+    ]
+    instrument = OmegaThetaXRDInstrument(
+        reference_measurements=[
+            DriftRecord(reference=measurement) for measurement in measurements[:-1]
+        ]
+    )
+    instrument.normalize(archive, logger)
+    trackers = {tracker.name: tracker for tracker in instrument.drift_trackers}
+    assert trackers['center_tilt'].count == len(measurements) - 1
+    assert np.isclose(instrument.reference_measurements[0].throughput, 30)
+
+    # tracked measurements are not read again
+    measurements[0].results[0].tilt = 1.0
+    instrument.reference_measurements.append(DriftRecord(reference=measurements[-1]))
+    instrument.normalize(archive, logger)
+    assert instrument.n_tracked == len(measurements)
+    assert np.isclose(trackers['center_tilt'].mean, np.mean(tilts[:-1]))
+    assert 'center_tilt' in instrument.reference_measurements[-1].alarms
+    assert len(instrument.figures) == 1
+
+    # the trackers are rebuilt if a tracked measurement is removed
+    instrument.reference_measurements = instrument.reference_measurements[1:]
+    instrument.normalize(archive, logger)
+    assert instrument.n_tracked == len(measurements) - 1
+    # the outlier of the last measurement is not added to the chart
+    assert trackers['center_tilt'].count == len(measurements) - 2
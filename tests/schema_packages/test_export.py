@@ -0,0 +1,67 @@
+import h5py
+import numpy as np
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.export import export_maps
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    MapStatistics,
+    OmegaThetaXRD,
+    ParameterList,
+    ScanCurve,
+)
+
+
+def create_measurement(name, n_points):
+    return OmegaThetaXRD(
+        name=name,
+        wafer_diameter=50.0,
+        map_statistics=MapStatistics(rms_tilt=0.02),
+        results=[
+            ParameterList(
+                name=f'{name}_{index}',
+                x_pos=index,
+                y_pos=-index,
+                tilt=0.01 * index,
+                tilt_direction=10.0 * index,
+                component_0=0.1,
+                component_90=0.2,
+                reference_offset=0.0,
+                Scan_Curves=[
+                    ScanCurve(omega=np.arange(3 + index), intensity=np.ones(3 + index)),
+                    ScanCurve(omega=np.arange(3), intensity=np.ones(3)),
+                ],
+            )
+            for index in range(n_points)
+        ],
+    )
+
+
+def test_export_hdf5(tmp_path):
+    path = tmp_path / 'maps.h5'
+    n_maps = 2
+    measurements = (create_measurement(f'W{index}', 3) for index in range(n_maps))
+    assert export_maps(measurements, path, format='hdf5', curves=True) == n_maps
+
+    with h5py.File(path) as file:
+        assert list(file) == ['000000', '000001']
+        assert file['000001'].attrs['entry_name'] == 'W1'
+        assert file['000001'].attrs['rms_tilt'] == pytest.approx(0.02)
+        assert np.allclose(file['000001/tilt'][:], [0, 0.01, 0.02])
+        assert file['000001/omega_r'].shape == (3, 5)
+        assert np.isnan(file['000001/omega_r'][0, 3:]).all()
+
+
+def test_export_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'maps.parquet'
+    measurements = [create_measurement('W0', 2), create_measurement('W1', 3)]
+    assert export_maps(measurements, path, curves=True) == len(measurements)
+
+    table = pq.read_table(path)
+    n_points = sum(len(measurement.results) for measurement in measurements)
+    assert table.num_rows == n_points
+    assert table['entry_name'].to_pylist() == ['W0'] * 2 + ['W1'] * 3
+    assert table['rms_tilt'].to_pylist() == pytest.approx([0.02] * n_points)
+    assert table['center_tilt'].null_count == n_points
+    curve_l = measurements[0].results[0].Scan_Curves[1]
+    assert len(table['intensity_l'][0]) == len(curve_l.intensity)
@@ -0,0 +1,60 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from nomad_ikz_omega_theta_xrd.schema_packages.figurecache import FigureCache
+
+
+def test_figure_cache(tmp_path):
+    calls = []
+
+    def create():
+        calls.append(1)
+        return {'data': [{'x': np.arange(3), 'y': [1.0, 2.0, 3.0]}]}
+
+    cache = FigureCache(maxsize=8, directory=str(tmp_path))
+    inputs = {'values': np.arange(3.0), 'title': 'Tilt'}
+    figure = cache.get_or_create('plot', 1, inputs, create)
+    assert cache.get_or_create('plot', 1, inputs, create) == {
+        'data': [{'x': [0, 1, 2], 'y': [1.0, 2.0, 3.0]}]
+    }
+    assert len(calls) == 1
+
+    # another worker finds the figure in the directory
+    other = FigureCache(maxsize=8, directory=str(tmp_path))
+    assert (
+        other.get_or_create('plot', 1, inputs, create)['data'][0]['y']
+        == (figure['data'][0]['y'])
+    )
+    assert len(calls) == 1
+
+    # changed inputs and versions create the figure again
+    changed = [(1, {**inputs, 'values': np.arange(1.0, 4.0)}), (2, inputs)]
+    for version, changed_inputs in changed:
+        cache.get_or_create('plot', version, changed_inputs, create)
+    assert len(calls) == 1 + len(changed)
+
+
+def test_figure_cache_disabled():
+    calls = []
+    cache = FigureCache(maxsize=0, directory='')
+    n_requests = 2
+    for _ in range(n_requests):
+        cache.get_or_create('plot', 1, {}, lambda: calls.append(1) or {})
+    assert len(calls) == n_requests
+
+
+def test_get_or_render():
+    cache = FigureCache(maxsize=8, directory='', max_workers=2)
+    figures = [
+        ('plot', 1, {'index': index}, go.Figure, ({'data': [{'x': [index]}]},))
+        for index in range(4)
+    ]
+    cache.get_or_create('plot', 1, {'index': 2}, lambda: {'cached': True})
+
+    rendered = cache.get_or_render(figures)
+    assert rendered[2] == {'cached': True}
+    assert [list(rendered[index]['data'][0]['x']) for index in (0, 1, 3)] == [
+        [0],
+        [1],
+        [3],
+    ]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.interpolation import interpolate_map
+
+WAFER_DIAMETER = 20
+
+
+@pytest.mark.parametrize('method', ['linear', 'cubic', 'thin_plate_spline'])
+def test_interpolate_plane(method):
+    axis = np.arange(-10, 10.1, 2.5)
+    x, y = (grid.ravel() for grid in np.meshgrid(axis, axis))
+    values = np.column_stack([0.1 + 0.01 * x, 0.02 * y])
+
+    x_axis, y_axis, raster = interpolate_map(
+        (x, y), values, WAFER_DIAMETER, resolution=1, method=method
+    )
+
+    assert raster.shape == (2, len(y_axis), len(x_axis))
+    grid_x, grid_y = np.meshgrid(x_axis, y_axis)
+    inside = ~np.isnan(raster[0])
+    assert np.all(np.hypot(grid_x[inside], grid_y[inside]) <= WAFER_DIAMETER / 2)
+    assert np.allclose(raster[0][inside], 0.1 + 0.01 * grid_x[inside], atol=1e-6)
+    assert np.allclose(raster[1][inside], 0.02 * grid_y[inside], atol=1e-6)
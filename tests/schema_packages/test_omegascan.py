@@ -0,0 +1,99 @@
+import re
+
+import numpy as np
+
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    OmegaThetaXRD,
+    ParameterList,
+    create_map_plot,
+    generate_stereographic_plots,
+    get_colors_pl,
+    is_rebuilt_by_map,
+)
+
+
+def test_generate_stereographic_plots():
+    results = [
+        ParameterList(tilt=tilt, tilt_direction=direction, reference_axis='[1-100]')
+        for tilt, direction in [(0.03, 45), (0.12, 200), (0.07, 310)]
+    ]
+    expected = [result.generate_stereographic_plot().figure for result in results]
+    generate_stereographic_plots(results)
+
+    for result, figure in zip(results, expected):
+        assert len(result.figures) == 1
+        assert result.figures[0].figure['data'] == figure['data']
+        assert result.figures[0].figure['layout'] == figure['layout']
+
+
+def test_is_rebuilt_by_map():
+    result = ParameterList()
+    measurement = OmegaThetaXRD(results=[result])
+    assert not is_rebuilt_by_map(result)
+    measurement.data_file = 'map.xrd'
+    assert is_rebuilt_by_map(result)
+
+
+def test_map_statistics_without_spatial_outliers():
+    positions = [(x, y) for x in range(-3, 4) for y in range(-3, 4)]
+    measurement = OmegaThetaXRD(
+        grid_size=1.0,
+        results=[
+            ParameterList(
+                name=f'{x}_{y}',
+                x_pos=x,
+                y_pos=y,
+                tilt=0.01 * (1 + (x == 0 and y == 0)),
+                tilt_direction=0.0,
+                component_0=0.01 * x + 0.0001 * ((x * 7 + y * 3) % 5),
+                component_90=0.0 if (x, y) != (0, 0) else 0.05,
+                reference_offset=0.0,
+            )
+            for x, y in positions
+        ],
+    )
+
+    spatial_outliers = measurement.detect_spatial_outliers()
+
+    assert spatial_outliers.flagged_points == ['0_0']
+    assert measurement.results[positions.index((0, 0))].spatial_outlier
+    statistics = spatial_outliers.map_statistics
+    assert np.isclose(statistics.tilt_max.magnitude, 0.01)
+    assert np.isclose(measurement.generate_map_statistics().tilt_max.magnitude, 0.02)
+    assert np.isclose(statistics.center_tilt.magnitude, 0.01)
+
+
+def test_map_index_is_kept_until_the_results_change():
+    measurement = OmegaThetaXRD(
+        results=[
+            ParameterList(x_pos=x, y_pos=y, tilt=0.0, tilt_direction=0.0)
+            for x in range(-2, 3)
+            for y in range(-2, 3)
+        ]
+    )
+    measurement.set_map_geometry({'grid_size': 1, 'wafer_diameter': 6}, None)
+    map_index = measurement.get_map_index()
+    map_grid = measurement.get_map_grid()
+    assert measurement.get_map_index() is map_index
+    assert measurement.get_map_grid() is map_grid
+
+    measurement.results = measurement.results[:-1]
+    measurement.set_map_geometry({'grid_size': 1, 'wafer_diameter': 6}, None)
+
+    assert measurement.get_map_index() is not map_index
+    assert len(measurement.get_map_grid().row) == len(measurement.results)
+
+
+def test_map_plot_of_near_constant_values():
+    # e.g. the asymmetry of symmetric curves, which is zero up to rounding errors
+    asymmetry = 1e-13 + 1e-25 * np.array([0, 0.5, 1 - 1e-9, 1])
+    constant = np.full(len(asymmetry), 1e-13)
+
+    for values in [asymmetry, constant]:
+        colors = get_colors_pl(values)
+        assert all(re.fullmatch(r'rgb\(\d+, \d+, \d+\)', color) for color in colors)
+        positions = np.arange(len(values), dtype=float)
+        create_map_plot(
+            positions, np.zeros(len(values)), values, 'Asymmetry', 10.0, 1.0
+        )
+    assert len(set(get_colors_pl(constant))) == 1
@@ -0,0 +1,8 @@
+from nomad_ikz_omega_theta_xrd.schema_packages.parallel import parallel_map
+
+
+def test_parallel_map():
+    items = list(range(-20, 20))
+    expected = [abs(item) for item in items]
+    assert parallel_map(abs, items, max_workers=2) == expected
+    assert parallel_map(abs, items, max_workers=1) == expected
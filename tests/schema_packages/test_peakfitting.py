@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.peakfitting import (
+    curve_quality,
+    fit_peaks,
+    peak_profile,
+    stack_curves,
+)
+
+
+@pytest.mark.parametrize(
+    'profile, eta', [('gaussian', 0), ('lorentzian', 1), ('pseudo_voigt', 0.4)]
+)
+def test_fit_peaks(profile, eta):
+    rng = np.random.default_rng(0)
+    centers = np.array([17.0, 17.05, 16.98])
+    widths = np.array([0.02, 0.03, 0.05])
+    curves = []
+    for center, width, n_samples in zip(centers, widths, [201, 151, 251]):
+        omega = np.linspace(center - 0.4, center + 0.4, n_samples)
+        intensity = 20 + 1000 * peak_profile(omega, center, width, eta)
+        curves.append((omega, intensity + rng.normal(0, 1, n_samples)))
+
+    fit = fit_peaks(*stack_curves(curves), profile=profile)
+
+    assert np.all(fit['converged'])
+    assert np.allclose(fit['peak_position'], centers, atol=1e-3)
+    assert np.allclose(fit['fwhm'], widths, rtol=0.02)
+    assert np.allclose(fit['background'], 20, atol=2)
+
+
+# Peak position of the curves, lower limits of the metrics of the curve with a
+# tail and the curve with a second grain and upper limit for the other curves
+CENTER = 17.0
+MIN_ASYMMETRY = 0.03
+MIN_SECONDARY_PEAK = 0.1
+MAX_SECONDARY_PEAK = 0.02
+
+
+def test_curve_quality():
+    rng = np.random.default_rng(0)
+    omega = np.linspace(16.6, 17.4, 201)
+    peak = 20 + 1000 * peak_profile(omega, CENTER, 0.03, 0.4)
+    tailed = 20 + 1000 * np.where(
+        omega > CENTER,
+        peak_profile(omega, CENTER, 0.05, 0.4),
+        peak_profile(omega, CENTER, 0.025, 0.4),
+    )
+    curves = [
+        (omega, peak),
+        (omega[::-1], peak[::-1]),
+        (omega, peak + 150 * peak_profile(omega, 17.12, 0.02, 0)),
+        (omega[:150], tailed[:150]),
+    ]
+    curves = [
+        (curve_omega, intensity + rng.normal(0, 2, len(intensity)))
+        for curve_omega, intensity in curves
+    ]
+    omega, intensity = stack_curves(curves)
+
+    quality = curve_quality(omega, intensity, fit_peaks(omega, intensity))
+
+    assert np.allclose(quality['noise'][:2], 2, rtol=0.2)
+    assert np.allclose(quality['snr'][:2], 500, rtol=0.2)
+    assert np.allclose(quality['asymmetry'][:3], 0, atol=0.01)
+    assert quality['asymmetry'][3] > MIN_ASYMMETRY
+    assert np.all(quality['secondary_peak'][:2] < MAX_SECONDARY_PEAK)
+    assert quality['secondary_peak'][2] > MIN_SECONDARY_PEAK
@@ -0,0 +1,28 @@
+import numpy as np
+
+from nomad_ikz_omega_theta_xrd.schema_packages.profiles import (
+    extract_line_profile,
+    extract_radial_profile,
+    min_max_direction,
+)
+
+WAFER_DIAMETER = 20
+
+
+def test_profiles():
+    axis = np.arange(-10, 10.1, 2.5)
+    x, y = (grid.ravel() for grid in np.meshgrid(axis, axis))
+    values = 0.01 * (x + y)
+
+    origin, angle = min_max_direction(x, y, values)
+    assert origin == (-10, -10) and np.isclose(angle, 45)
+
+    position, profile = extract_line_profile(
+        (x, y), values, ((0, 0), 45), wafer_diameter=WAFER_DIAMETER, step=1
+    )
+    assert np.allclose(position[[0, -1]], [-WAFER_DIAMETER / 2, WAFER_DIAMETER / 2])
+    assert np.allclose(profile, 0.01 * np.sqrt(2) * position)
+
+    radius, profile = extract_radial_profile(x, y, np.abs(values), 2.5)
+    assert radius[0] == 0 and profile[0] == 0
+    assert np.all(np.diff(radius) > 0)
@@ -0,0 +1,42 @@
+import numpy as np
+
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    create_stereographic_projection_plot,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.projection import (
+    arrow_angles,
+    line_segments,
+    stereographic_projection,
+)
+
+
+def test_stereographic_projection():
+    x, y = stereographic_projection([0, 90, 60], [0, 90, 180])
+    assert np.allclose(x, [0, 0, -np.tan(np.radians(30))])
+    assert np.allclose(y, [0, 1, 0])
+
+
+def test_line_segments():
+    x, y = line_segments([0, 1], [0, 1], [2, 3], [4, 5])
+    assert np.allclose(x, [0, 2, np.nan, 1, 3, np.nan], equal_nan=True)
+    assert np.allclose(y, [0, 4, np.nan, 1, 5, np.nan], equal_nan=True)
+    assert np.allclose(arrow_angles([1, 0], [0, 1]), [90, 0])
+
+
+def test_stereographic_projection_plot_traces():
+    n_points = 500
+    rng = np.random.default_rng(0)
+    tilt = rng.uniform(0, 0.1, n_points)
+    tilt_direction = rng.uniform(0, 360, n_points)
+    fig = create_stereographic_projection_plot(
+        rng.uniform(-20, 20, n_points),
+        rng.uniform(-20, 20, n_points),
+        tilt,
+        tilt_direction,
+        'Stereographic Projection',
+    )
+    # one trace with the poles of all points
+    assert [trace.mode for trace in fig.data] == ['markers']
+    pole_x, pole_y = stereographic_projection(tilt, tilt_direction)
+    assert np.allclose(fig.data[0].x, pole_x)
+    assert np.allclose(fig.data[0].y, pole_y)
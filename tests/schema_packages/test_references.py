@@ -0,0 +1,105 @@
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.utils import get_logger
+
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    AggregatedMap,
+    OmegaThetaXRD,
+    Samples,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.references import (
+    LabIdResolver,
+    get_entry_id,
+    resolver,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import get_reference
+
+
+def test_resolve_sections_from_cache():
+    archive = EntryArchive(metadata=EntryMetadata(upload_id='upload'))
+    resolver = LabIdResolver()
+    resolver.add(archive, 'W1', '../uploads/upload/archive/entry#/data')
+    samples = [Samples(lab_id='W1'), Samples(lab_id='W1')]
+
+    resolver.resolve_sections(archive, samples, get_logger(__name__))
+
+    for sample in samples:
+        assert sample.m_to_dict()['reference'] == (
+            '../uploads/upload/archive/entry#/data'
+        )
+        assert sample.name == 'W1'
+
+
+def recording_search(entries, searches):
+    def search(lab_ids, user_id):
+        searches.append(lab_ids)
+        return [
+            entry
+            for entry in entries
+            if set(entry['results']['eln']['lab_ids']).intersection(lab_ids)
+        ]
+
+    return search
+
+
+def test_resolve_lab_ids_with_one_search():
+    archive = EntryArchive(metadata=EntryMetadata(upload_id='upload'))
+    entries = [
+        dict(
+            entry_id=entry_id,
+            upload_id='upload',
+            results={'eln': {'lab_ids': [lab_id]}},
+        )
+        for entry_id, lab_id in [('sample', 'W1'), ('instrument', '26-0019')]
+    ]
+    searches = []
+    resolver = LabIdResolver()
+    resolver.search = recording_search(entries, searches)
+
+    references = resolver.resolve(
+        archive, ['W1', '26-0019', 'W1', 'W2'], get_logger(__name__)
+    )
+
+    assert searches == [['W1', '26-0019', 'W2']]
+    assert references == {
+        'W1': get_reference('upload', 'sample'),
+        '26-0019': get_reference('upload', 'instrument'),
+        'W2': None,
+    }
+
+
+def test_missing_lab_id_is_searched_once(monkeypatch):
+    searches = []
+    monkeypatch.setattr(resolver, 'search', recording_search([], searches))
+    logger = get_logger(__name__)
+    for entry_name in ('W2-MI_1.xrd', 'W2-MI_2.xrd'):
+        archive = EntryArchive(
+            metadata=EntryMetadata(upload_id='missing', entry_name=entry_name)
+        )
+        sample = Samples(lab_id='W2')
+        sample.normalize(archive, logger)
+        assert sample.reference is None
+        assert sample.name == 'W2'
+    assert searches == [['W2']]
+
+    # an entry created during processing replaces the cached miss
+    resolver.add(archive, 'W2', get_reference('missing', 'sample'))
+    references = resolver.resolve(archive, ['W2'], logger)
+    assert references == {'W2': get_reference('missing', 'sample')}
+    assert len(searches) == 1
+
+
+def test_get_entry_id():
+    measurement = OmegaThetaXRD()
+    aggregated_maps = [
+        AggregatedMap(reference=get_reference('upload', 'entry')),
+        AggregatedMap(reference='../upload/archive/mainfile/map.xrd#/data'),
+        AggregatedMap(reference=measurement),
+    ]
+
+    assert [get_entry_id(item.reference) for item in aggregated_maps] == [
+        'entry',
+        None,
+        None,
+    ]
+    EntryArchive(metadata=EntryMetadata(entry_id='map'), data=measurement)
+    assert get_entry_id(aggregated_maps[2].reference) == 'map'
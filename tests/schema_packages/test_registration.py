@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.registration import (
+    register_map,
+    transform_map,
+)
+
+# Accepted error of the found rotation in degrees
+ANGLE_TOLERANCE = 0.5
+
+
+def tilt_field(x, y):
+    return 0.005 * x + 0.0002 * y**2, -0.003 * y + 0.01 + 0.0001 * x * y
+
+
+@pytest.mark.parametrize('rotation, flip', [(0, False), (-120, False), (37, True)])
+def test_register_map(rotation, flip):
+    axis = np.arange(-12.5, 12.6, 2.5)
+    grid_x, grid_y = np.meshgrid(axis, axis)
+    inside = grid_x**2 + grid_y**2 <= 12.5**2
+    x, y = grid_x[inside], grid_y[inside]
+    reference = dict(x_pos=x, y_pos=y, tilt=np.hypot(*tilt_field(x, y)))
+
+    # the same wafer measured after turning it by `rotation` (and over)
+    sign = -1 if flip else 1
+    angle = np.radians(-rotation)
+    wafer_x = sign * (np.cos(angle) * x - np.sin(angle) * y)
+    wafer_y = np.sin(angle) * x + np.cos(angle) * y
+    _, (component_0, component_90) = transform_map(
+        (0, 0), tilt_field(wafer_x, wafer_y), rotation, flip
+    )
+    moving = dict(x_pos=x, y_pos=y, tilt=np.hypot(component_0, component_90))
+
+    registration = register_map(reference, moving)
+
+    assert registration['flip'] == flip
+    expected = rotation if flip else -rotation
+    assert (
+        abs((registration['rotation'] - expected + 180) % 360 - 180) < ANGLE_TOLERANCE
+    )
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.spatial import MapGrid, MapIndex
+
+# Neighbors within one grid spacing of a point inside and at the corner of a grid
+N_NEIGHBORS = 4
+N_CORNER_NEIGHBORS = 2
+# Radius of the measured area on a wafer with a diameter of 25
+MEASURED_RADIUS = 12
+
+
+def test_map_index():
+    axis = np.arange(-10, 10.1, 2.5)
+    x, y = (grid.ravel() for grid in np.meshgrid(axis, axis))
+    # positions as written by the instrument are not exactly on the grid
+    x = x + np.random.default_rng(0).normal(0, 0.01, x.size)
+    map_index = MapIndex(x, y, grid_size=2.5)
+
+    index, _ = map_index.nearest(0.2, -0.3)
+    assert np.isclose(x[index], 0, atol=0.1) and y[index] == 0
+    assert len(map_index.within_radius(0, 0, 2.6)) == 1 + N_NEIGHBORS
+    assert np.all(y[map_index.row(0.4)] == 0)
+    assert np.all(np.diff(x[map_index.row(0.4)]) > 0)
+    assert np.allclose(x[map_index.column(-9)], -10, atol=0.1)
+    neighbors = map_index.neighbors(4, max_distance=2.6)
+    assert np.sum(neighbors[0] >= 0) == N_CORNER_NEIGHBORS
+
+
+def test_map_grid():
+    axis = np.arange(-10, 10.1, 2.5) + 1.25
+    x, y = (grid.ravel() for grid in np.meshgrid(axis, axis))
+    inside = np.hypot(x, y) < MEASURED_RADIUS
+    x, y = x[inside], y[inside]
+    x_measured = x + np.random.default_rng(0).normal(0, 0.05, x.size)
+
+    map_grid = MapGrid(x_measured, y, grid_size=2.5, wafer_diameter=25)
+
+    assert np.allclose(map_grid.x_axis, np.arange(-11.25, 11.3, 2.5), atol=0.05)
+    assert map_grid.shape == (10, 10)
+    assert np.allclose(map_grid.x_axis[map_grid.column], x, atol=0.05)
+    assert np.allclose(map_grid.y_axis[map_grid.row], y)
+    values = map_grid.to_array(x)
+    assert np.array_equal(np.isnan(values), ~map_grid.measured)
+    assert np.array_equal(map_grid.from_array(values), x)
+    assert np.all(map_grid.measured <= map_grid.inside)
+
+    x_off_lattice = x.copy()
+    x_off_lattice[0] += 1.25
+    with pytest.raises(ValueError, match='lattice'):
+        MapGrid(x_off_lattice, y, grid_size=2.5, wafer_diameter=25)
+    with pytest.raises(ValueError, match='wafer'):
+        MapGrid(x, y, grid_size=2.5, wafer_diameter=20)
+    with pytest.raises(ValueError, match='cell'):
+        MapGrid(np.append(x, x[0]), np.append(y, y[0]), 2.5, 25)
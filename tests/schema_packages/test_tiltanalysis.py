@@ -0,0 +1,95 @@
+import numpy as np
+
+from nomad_ikz_omega_theta_xrd.schema_packages.spatial import MapIndex
+from nomad_ikz_omega_theta_xrd.schema_packages.tiltanalysis import (
+    detect_spatial_outliers,
+    recompute_tilt,
+    tilt_from_components,
+)
+
+# Radius of the test map in grid spacings and the score above which points are
+# flagged
+MAP_RADIUS = 5.5
+THRESHOLD = 5.0
+
+
+def peak_positions(component_0, component_90, geometry):
+    # exact rotation of the nominal plane normal by the tilt vectors and the
+    # rotation angles at which the tilted plane reflects
+    inclination = np.radians(geometry['plane_inclination'])
+    normal = np.array([np.sin(inclination), 0, np.cos(inclination)])
+    tilt = np.radians(np.column_stack([component_0, component_90]))
+    angle = np.linalg.norm(tilt, axis=1)
+    axis = np.column_stack([-tilt[:, 1], tilt[:, 0], np.zeros(len(tilt))])
+    axis /= angle[:, np.newaxis]
+    normal = (
+        normal * np.cos(angle)[:, np.newaxis]
+        + np.cross(axis, normal) * np.sin(angle)[:, np.newaxis]
+        + axis * (axis @ normal)[:, np.newaxis] * (1 - np.cos(angle))[:, np.newaxis]
+    )
+    incidence = np.radians(geometry['incidence_angle'])
+    half_separation = np.degrees(
+        np.arccos(
+            (
+                np.sin(np.radians(geometry['bragg_angle']))
+                + np.sin(incidence) * normal[:, 2]
+            )
+            / (np.cos(incidence) * np.hypot(normal[:, 0], normal[:, 1]))
+        )
+    )
+    azimuth = np.degrees(np.arctan2(normal[:, 1], normal[:, 0]))
+    azimuth += geometry['azimuth_offset']
+    return azimuth + half_separation, azimuth - half_separation
+
+
+def test_recompute_tilt_flags_inconsistent_point():
+    geometry = {
+        'bragg_angle': 17.0,
+        'incidence_angle': 5.0,
+        'plane_inclination': 30.0,
+        'azimuth_offset': 45.0,
+    }
+    rng = np.random.default_rng(1)
+    component_0 = rng.normal(0, 0.05, 50)
+    component_90 = rng.normal(0, 0.05, 50)
+    peak_r, peak_l = peak_positions(component_0, component_90, geometry)
+    component_0_reported = component_0.copy()
+    inconsistent = 7
+    component_0_reported[inconsistent] += 0.02
+
+    recomputed = recompute_tilt(
+        peak_r, peak_l, component_0_reported, component_90, geometry
+    )
+
+    assert np.argmax(recomputed['residual']) == inconsistent
+    assert np.isclose(recomputed['residual'][inconsistent], 0.02, atol=1e-3)
+    assert np.allclose(np.delete(recomputed['residual'], inconsistent), 0, atol=1e-3)
+    tilt, tilt_direction = tilt_from_components(component_0, component_90)
+    assert np.allclose(recomputed['tilt'], tilt, atol=1e-3)
+    assert np.allclose(
+        np.cos(np.radians(recomputed['tilt_direction'] - tilt_direction)), 1
+    )
+
+
+def test_detect_spatial_outliers_on_curved_map():
+    x, y = np.meshgrid(np.arange(-5.0, 6.0), np.arange(-5.0, 6.0))
+    inside = np.hypot(x, y) <= MAP_RADIUS
+    x, y = x[inside], y[inside]
+    rng = np.random.default_rng(0)
+    values = np.column_stack(
+        [
+            0.01 * x + 0.002 * x**2 + rng.normal(0, 0.001, x.size),
+            0.02 * y + rng.normal(0, 0.001, x.size),
+        ]
+    )
+    # one point at the edge of the wafer and one inside
+    values[0, 0] -= 0.02
+    values[17, 1] += 0.02
+    neighbors = MapIndex(x, y, 1).neighbors(8, max_distance=1.5)
+
+    score, flagged = detect_spatial_outliers(
+        x, y, values, neighbors, threshold=THRESHOLD
+    )
+
+    assert np.flatnonzero(flagged).tolist() == [0, 17]
+    assert np.all(np.delete(score, [0, 17]) < THRESHOLD)
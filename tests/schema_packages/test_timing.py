@@ -0,0 +1,37 @@
+import pytest
+
+from nomad_ikz_omega_theta_xrd.schema_packages.timing import Timer
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def info(self, event, **kwargs):
+        self.events.append((event, kwargs))
+
+
+def test_timer_laps():
+    logger = RecordingLogger()
+    timer = Timer(logger, 'test', mode='log')
+    n_points = 3
+    timer.lap('first', points=n_points)
+    timer.lap('second')
+
+    assert [span[0] for span in timer.spans] == ['first', 'second']
+    assert timer.spans[0][2] == {'points': n_points}
+    assert timer.total == pytest.approx(sum(span[1] for span in timer.spans))
+    event, kwargs = logger.events[0]
+    assert event == 'test timing'
+    assert kwargs['stage'] == 'first'
+    assert kwargs['points'] == n_points
+
+
+def test_timer_off():
+    logger = RecordingLogger()
+    timer = Timer(logger, 'test', mode='off')
+    timer.lap('first', points=3)
+
+    assert timer.spans == []
+    assert logger.events == []
+    assert timer.total == 0
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from nomad.datamodel import EntryArchive, EntryMetadata
+from nomad.datamodel.context import ServerLocalContext
+
+from nomad_ikz_omega_theta_xrd.schema_packages import utils
+from nomad_ikz_omega_theta_xrd.schema_packages.omegascan import (
+    OmegaThetaXRDInstrument,
+)
+from nomad_ikz_omega_theta_xrd.schema_packages.utils import create_archive
+
+FILE_NAME = 'Freiberger_Omega_Theta_XRD_1.archive.json'
+
+
+class RecordingContext(ServerLocalContext):
+    def __init__(self, mainfile_dir):
+        super().__init__(mainfile_dir)
+        self.processed = []
+
+    def raw_path(self):
+        return str(self._mainfile_dir)
+
+    def process_updated_raw_file(self, path, allow_modify=False):
+        self.processed.append(path)
+
+
+class RacingContext(RecordingContext):
+    # the file does not exist yet for all concurrently processed entries
+    def raw_path_exists(self, path):
+        return False
+
+
+def create_instruments(context, lab_ids, **kwargs):
+    archive = EntryArchive(m_context=context, metadata=EntryMetadata(upload_id='u'))
+    for lab_id in lab_ids:
+        create_archive(
+            OmegaThetaXRDInstrument(lab_id=lab_id), archive, FILE_NAME, **kwargs
+        )
+    with open(context._mainfile_dir / FILE_NAME) as file:
+        return json.load(file)['data']
+
+
+def test_create_archive_once(tmp_path):
+    context = RacingContext(tmp_path)
+    assert create_instruments(context, ['1', '2'])['lab_id'] == '1'
+    assert context.processed == [FILE_NAME]
+
+
+def test_create_archive_overwrite_changed(tmp_path):
+    context = RecordingContext(tmp_path)
+    data = create_instruments(context, ['1', '1', '2'], overwrite=True)
+    assert data['lab_id'] == '2'
+    # the unchanged content is not written again
+    assert context.processed == [FILE_NAME, FILE_NAME]
+
+
+def test_create_archive_keeps_file_on_failed_write(tmp_path, monkeypatch):
+    context = RecordingContext(tmp_path)
+    create_instruments(context, ['1'])
+
+    def failing_iter_section_json(*args, **kwargs):
+        yield b'{'
+        raise RuntimeError('serialization failed')
+
+    monkeypatch.setattr(utils, 'iter_section_json', failing_iter_section_json)
+    with pytest.raises(RuntimeError):
+        create_instruments(context, ['2'], overwrite=True)
+
+    assert create_instruments(context, [])['lab_id'] == '1'
+    assert [path.name for path in tmp_path.iterdir()] == [FILE_NAME]
+    assert context.processed == [FILE_NAME]